@@ -0,0 +1,156 @@
+# encoding: utf-8
+
+import concurrent.futures
+from workbookwithheader import *
+
+
+# Lightweight and picklable summary of a loaded workbook.
+# keyword_list_by_tab: { <tab name>: [ <keyword>, <keyword>, ......], ......}
+# tab_list_by_type: { <tab type>: [ <tab name>, <tab name>, ......], ......}
+# row_list_by_tab: { <tab name>: [ <record of data row>, ......], ......}, or None if rows were not extracted.
+WorkbookSummary = namedtuple('WorkbookSummary', ['workbook_path', 'tab_list', 'keyword_list_by_tab',
+                                                 'tab_list_by_type', 'row_list_by_tab'])
+
+
+def load_workbook_summary(workbook_path, registered_tab_type=None, header_row_no=0, include_rows=False):
+    """
+    Load one workbook and return its summary. Used as the task of worker process in load_workbook_summaries().
+
+    :param workbook_path: Path of workbook located.
+    :param registered_tab_type: RegisteredTabType object used to classify the tabs.
+    :param header_row_no: default row number of the header row in worksheet.
+    :param include_rows: True to extract the data rows by WorksheetWithHeader.iterate_rows().
+    :return: WorkbookSummary of the workbook.
+             Will raise WorkbookNotValid exception if specified path is invalid or not a workbook file.
+    """
+
+    workbook_obj = WorkbookWithHeader()
+    if registered_tab_type is not None: workbook_obj.set_tab_type_list(registered_tab_type)
+    workbook_obj.set_default_header_row_no(header_row_no)
+    workbook_obj.load_workbook(workbook_path)
+
+    keyword_list_by_tab = dict()
+    row_list_by_tab = dict() if include_rows else None
+    for tab_name in workbook_obj.get_tab_list():
+        worksheet_obj = workbook_obj.get_worksheet_by_name(tab_name)
+        keyword_list_by_tab[tab_name] = worksheet_obj.get_keyword_list()
+        if include_rows: row_list_by_tab[tab_name] = list(worksheet_obj.iterate_rows())
+
+    tab_list_by_type = dict((tab_type, workbook_obj.get_tab_list_by_type(tab_type))
+                            for tab_type in workbook_obj.tab_list_by_type.keys())
+
+    return WorkbookSummary(workbook_path, workbook_obj.get_tab_list(), keyword_list_by_tab,
+                           tab_list_by_type, row_list_by_tab)
+
+
+def load_workbook_summaries(workbook_path_list, registered_tab_type=None, max_workers=None, header_row_no=0,
+                            include_rows=False):
+    """
+    Load a batch of workbooks across a pool of worker processes.
+    A failure of one workbook does not abort the batch, it is returned as WorkbookNotValid in place of the summary.
+
+    :param workbook_path_list: list of path of workbooks.
+    :param registered_tab_type: RegisteredTabType object used to classify the tabs.
+    :param max_workers: number of worker processes, default is the number of CPUs.
+                        Workbooks are loaded in current process if max_workers is 1.
+    :param header_row_no: default row number of the header row in worksheet.
+    :param include_rows: True to extract the data rows of each tab into the summary.
+    :return: list of WorkbookSummary or WorkbookNotValid, in the same order as workbook_path_list.
+    """
+
+    internal_logger = get_internal_logger()
+    task_args = (registered_tab_type, header_row_no, include_rows)
+
+    if max_workers == 1:
+        future_list = []
+        for workbook_path in workbook_path_list:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(load_workbook_summary(workbook_path, *task_args))
+            except Exception as workbook_error:
+                future.set_exception(workbook_error)
+            future_list.append(future)
+        return [get_summary_result(workbook_path, future, internal_logger)
+                for workbook_path, future in zip(workbook_path_list, future_list)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        future_list = [executor.submit(load_workbook_summary, workbook_path, *task_args)
+                       for workbook_path in workbook_path_list]
+        return [get_summary_result(workbook_path, future, internal_logger)
+                for workbook_path, future in zip(workbook_path_list, future_list)]
+
+
+def get_summary_result(workbook_path, future, internal_logger):
+    """
+    Return the result of a finished summary task, errors are converted to WorkbookNotValid.
+
+    :param workbook_path: Path of workbook of the task.
+    :param future: Future object of the task.
+    :param internal_logger: Logger object to record the error.
+    :return: WorkbookSummary, or WorkbookNotValid if the task failed.
+    """
+
+    try:
+        return future.result()
+    except WorkbookNotValid as workbook_error:
+        return workbook_error
+    except Exception as workbook_error:
+        internal_logger.exception('Failed to load Workbook file %s', workbook_path)
+        return WorkbookNotValid(workbook_path, 'Failed to load Workbook file: %s' % workbook_error)
+
+
+def export_workbooks(workbook_path_list, registered_tab_type, tab_type, output_path,
+                     export_format=EXPORT_FORMAT_JSON_LINES, chunk_row_count=1000, keyword_list=None, header_row_no=0,
+                     add_tab_name=True, add_tab_type=False, add_workbook_path=True):
+    """
+    Export the data rows of every tab of specified tab type in a batch of workbooks to one file, in one pass.
+    Workbooks are loaded one at a time in lazy mode, tabs are classified from their header rows, and each worksheet
+    is released after it is written, so memory is bounded by the largest worksheet instead of the batch. A failure of
+    one workbook does not abort the batch.
+
+    :param workbook_path_list: list of path of workbooks, or path of a directory to export the workbooks of all
+                               formats known by readerbackend in it.
+    :param registered_tab_type: RegisteredTabType object used to classify the tabs.
+    :param tab_type: Name of the tab type to be exported.
+    :param output_path: Path of the output file.
+    :param export_format: EXPORT_FORMAT_JSON_LINES, EXPORT_FORMAT_PARQUET or EXPORT_FORMAT_ARROW.
+    :param chunk_row_count: number of rows converted and written in each chunk.
+    :param keyword_list: list of keyword in header to be exported. All keywords in header by default.
+    :param header_row_no: default row number of the header row in worksheet.
+    :param add_tab_name: True to add the tab name as EXPORT_TAB_NAME_COLUMN.
+    :param add_tab_type: True to add the tab type as EXPORT_TAB_TYPE_COLUMN.
+    :param add_workbook_path: True to add the workbook path as EXPORT_WORKBOOK_PATH_COLUMN.
+    :return: list of number of rows written or WorkbookNotValid, in the same order as workbook_path_list.
+             Will raise ImportError if pyarrow is not installed for Parquet and Arrow format.
+    """
+
+    internal_logger = get_internal_logger()
+    if isinstance(workbook_path_list, str) and os.path.isdir(workbook_path_list):
+        workbook_path_list = [os.path.join(workbook_path_list, file_name) for file_name in sorted(os.listdir(workbook_path_list))
+                              if os.path.splitext(file_name)[1].lower() in reader_backend_name_by_extension.keys()]
+
+    result_list = []
+    with TabTypeExporter(output_path, export_format, tab_type, chunk_row_count, keyword_list, add_tab_name=add_tab_name,
+                         add_tab_type=add_tab_type, add_workbook_path=add_workbook_path) as tab_type_exporter:
+        for workbook_path in workbook_path_list:
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_tab_type_list(registered_tab_type)
+            workbook_obj.set_default_header_row_no(header_row_no)
+            workbook_obj.set_reader_backend(READER_BACKEND_AUTO)
+            workbook_obj.set_lazy_load(True)
+            try:
+                workbook_obj.load_workbook(workbook_path)
+                # Tabs of other types are not exported, none of them is kept loaded.
+                target_tab_name_set = set(workbook_obj.get_tab_list_by_type(tab_type))
+                for tab_name in list(workbook_obj.worksheet_list_by_name.keys()):
+                    if tab_name not in target_tab_name_set: workbook_obj.unload_worksheet(tab_name)
+                result_list.append(tab_type_exporter.write_workbook(workbook_obj))
+            except WorkbookNotValid as workbook_error:
+                result_list.append(workbook_error)
+            except Exception as workbook_error:
+                internal_logger.exception('Failed to export Workbook file %s', workbook_path)
+                result_list.append(WorkbookNotValid(workbook_path, 'Failed to export Workbook file: %s' % workbook_error))
+            finally:
+                workbook_obj.release_worksheet_data()
+
+    return result_list
@@ -0,0 +1,51 @@
+# encoding: utf-8
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'unittests'))
+
+from workbookfixture import write_workbook
+
+
+def get_keyword_pool(keyword_count, header_width):
+    """
+    Return the pool of header keywords of the synthetic workbook.
+
+    :param keyword_count: size of the keyword pool.
+    :param header_width: number of keywords in header row of each tab, the pool is at least as large.
+    :return: list of keywords.
+    """
+
+    return ['Keyword%05d' % keyword_no for keyword_no in range(max(keyword_count, header_width))]
+
+
+def generate_workbook(workbook_path, tab_count=10, header_width=20, row_count=100, keyword_count=100, seed=0):
+    """
+    Generate a synthetic workbook with header row in each tab.
+    Header keywords are picked from a pool of keyword_count keywords, so they can be registered as tab type keywords.
+
+    :param workbook_path: Path of workbook to be written.
+    :param tab_count: number of tabs.
+    :param header_width: number of keywords in header row of each tab.
+    :param row_count: number of data rows below the header row of each tab.
+    :param keyword_count: size of the keyword pool.
+    :param seed: seed of the random generator.
+    :return: list of the keyword pool.
+    """
+
+    random_generator = random.Random(seed)
+    keyword_pool = get_keyword_pool(keyword_count, header_width)
+
+    row_list_by_tab = dict()
+    for tab_no in range(tab_count):
+        row_list = [random_generator.sample(keyword_pool, header_width)]
+        for row_no in range(row_count):
+            row_list.append([random_generator.randint(0, 1000) if column_no % 2 else 'Value%d' % (row_no % 50)
+                             for column_no in range(header_width)])
+        row_list_by_tab['Tab%04d' % tab_no] = row_list
+
+    write_workbook(workbook_path, row_list_by_tab)
+
+    return keyword_pool
@@ -0,0 +1,273 @@
+# encoding: utf-8
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from workbookwithheader import *
+from workbookgenerator import generate_workbook, get_keyword_pool
+
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Pure Python workload timed in every run, wall times are compared relative to it so that the baseline recorded on
+# one machine can be compared on another. Its process is also the reference of the peak RSS.
+REFERENCE_BENCH_NAME = 'reference'
+BENCH_NAME_LIST = ['load_workbook', 'build_tab_list_by_type', 'get_tab_type_by_keywords', 'iterate_rows']
+
+# Absolute increase ignored whatever the ratio, so that fast benchmarks are not flagged for timer or allocator noise.
+METRIC_FLOOR_BY_NAME = {'wall_time': 0.005,                 # 5 ms.
+                        'peak_alloc_bytes': 64 * 1024,      # 64 KB.
+                        'peak_rss_kb': 1024}                # 1 MB.
+
+
+def get_peak_rss_kb():
+    """
+    Return the peak resident set size of current process in KB, or None if it is not available on the platform.
+
+    :return: peak RSS in KB.
+    """
+
+    if resource is None: return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+def measure(bench_func, repeat):
+    """
+    Measure the benchmark function, in a process running this benchmark only.
+    Wall time is the median of repeated runs. Peak RSS is read after the timed runs, so it covers the process, the
+    setup of the benchmark and the benchmark function. Allocations are traced in one extra run, as tracing slows down
+    the run and holds memory of its own.
+
+    :param bench_func: function without argument to be measured.
+    :param repeat: number of timed runs.
+    :return: dict of wall_time in seconds, peak_alloc_bytes and peak_rss_kb.
+    """
+
+    wall_time_list = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        bench_func()
+        wall_time_list.append(time.perf_counter() - start_time)
+    peak_rss_kb = get_peak_rss_kb()
+
+    tracemalloc.start()
+    try:
+        bench_func()
+        peak_alloc_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'wall_time': statistics.median(wall_time_list), 'peak_alloc_bytes': peak_alloc_bytes,
+            'peak_rss_kb': peak_rss_kb}
+
+
+def run_reference():
+    value_by_key = dict()
+    for value in range(200000):
+        value_by_key['Key%d' % (value % 5000)] = value
+    sorted(value_by_key.items())
+
+
+def run_benchmark(bench_name, workbook_path, keyword_pool, registry_size, repeat):
+    """
+    Run one benchmark against the workbook, in current process.
+
+    :param bench_name: REFERENCE_BENCH_NAME or one of BENCH_NAME_LIST.
+    :param workbook_path: Path of the synthetic workbook.
+    :param keyword_pool: keyword pool of the synthetic workbook.
+    :param registry_size: number of keywords registered to RegisteredTabType.
+    :param repeat: number of timed runs.
+    :return: dict of the result of the benchmark, see measure().
+             Will raise ValueError if the benchmark is unknown.
+    """
+
+    if bench_name == REFERENCE_BENCH_NAME: return measure(run_reference, repeat)
+    if bench_name not in BENCH_NAME_LIST: raise ValueError('Unknown benchmark %s' % bench_name)
+
+    registered_tab_type_obj = RegisteredTabType()
+    registered_tab_type_obj.registered_one_keyword_to_multiple_type(True)
+    for keyword_no, keyword in enumerate(keyword_pool[:registry_size]):
+        registered_tab_type_obj.registered_tab_type_identify('Type%d' % (keyword_no % 10), keyword)
+
+    workbook_obj = WorkbookWithHeader()
+    workbook_obj.set_tab_type_list(registered_tab_type_obj)
+
+    def load_workbook():
+        workbook_obj.load_workbook(workbook_path)
+
+    def build_tab_list_by_type():
+        # The registry changes between two builds, as a rule is registered then unregistered, so the rule matcher is
+        # compiled again and every tab is classified with the changed registry.
+        rule_id = registered_tab_type_obj.registered_tab_type_rule('RuleType', RULE_ANY_OF, keyword_pool[-10:],
+                                                                   [r'Keyword0*[1-9]\d'], ignore_case=True)
+        workbook_obj.build_tab_list_by_type()
+        registered_tab_type_obj.unregistered_tab_type_rule(rule_id)
+
+    def get_tab_type_by_keywords():
+        for tab_name in workbook_obj.get_tab_list():
+            registered_tab_type_obj.get_tab_type_by_keywords(workbook_obj.get_keyword_list_by_name(tab_name))
+
+    def iterate_rows():
+        for tab_name in workbook_obj.get_tab_list():
+            for _ in workbook_obj.get_worksheet_by_name(tab_name).iterate_rows(): pass
+
+    bench_func_by_name = {'load_workbook': load_workbook, 'build_tab_list_by_type': build_tab_list_by_type,
+                          'get_tab_type_by_keywords': get_tab_type_by_keywords, 'iterate_rows': iterate_rows}
+    if bench_name != 'load_workbook':
+        load_workbook()
+        workbook_obj.build_tab_list_by_type()
+
+    return measure(bench_func_by_name[bench_name], repeat)
+
+
+def run_benchmarks(workbook_path, args):
+    """
+    Run the reference and every benchmark against the workbook, each one in a new process so that the peak RSS of
+    a benchmark is not the peak of the benchmarks run before it.
+
+    :param workbook_path: Path of the synthetic workbook.
+    :param args: parsed command line arguments.
+    :return: dict of the result of each benchmark.
+    """
+
+    result_dict = dict()
+    for bench_name in [REFERENCE_BENCH_NAME] + BENCH_NAME_LIST:
+        bench_output = subprocess.check_output([
+            sys.executable, os.path.abspath(__file__), '--run-benchmark', bench_name, '--workbook', workbook_path,
+            '--header-width', str(args.header_width), '--keywords', str(args.keywords),
+            '--registry-size', str(args.registry_size), '--repeat', str(args.repeat)])
+        result_dict[bench_name] = json.loads(bench_output.decode('utf-8').splitlines()[-1])
+
+    return result_dict
+
+
+def get_expected_value(metric_name, baseline_value, result_dict, baseline_dict):
+    """
+    Return the baseline value of the metric scaled to current run with the reference benchmark: wall time in the
+    ratio of the reference wall times, peak RSS above the peak RSS of the reference process.
+
+    :param metric_name: one of METRIC_FLOOR_BY_NAME.
+    :param baseline_value: value of the metric in the baseline.
+    :param result_dict: dict of the result of each benchmark.
+    :param baseline_dict: dict of the baseline result of each benchmark.
+    :return: expected value of the metric, or None if the reference is not available.
+    """
+
+    if metric_name == 'peak_alloc_bytes': return baseline_value
+
+    reference_value = result_dict.get(REFERENCE_BENCH_NAME, {}).get(metric_name)
+    baseline_reference_value = baseline_dict.get(REFERENCE_BENCH_NAME, {}).get(metric_name)
+    if not reference_value or not baseline_reference_value: return None
+
+    if metric_name == 'wall_time': return baseline_value * reference_value / baseline_reference_value
+    return baseline_value - baseline_reference_value + reference_value
+
+
+def compare_with_baseline(result_dict, baseline_dict, tolerance):
+    """
+    Compare the wall time, allocations and peak RSS of each benchmark with the baseline, see get_expected_value().
+    A metric regressed if it increased more than the tolerance ratio and more than its floor in METRIC_FLOOR_BY_NAME.
+
+    :param result_dict: dict of the result of each benchmark.
+    :param baseline_dict: dict of the baseline result of each benchmark.
+    :param tolerance: allowed ratio of increase, e.g. 0.2 for 20%.
+    :return: list of regression message.
+    """
+
+    regression_list = []
+    for bench_name, result in result_dict.items():
+        if bench_name == REFERENCE_BENCH_NAME or bench_name not in baseline_dict.keys(): continue
+        for metric_name, metric_floor in METRIC_FLOOR_BY_NAME.items():
+            baseline_value = baseline_dict[bench_name].get(metric_name)
+            if not baseline_value or result.get(metric_name) is None: continue
+            expected_value = get_expected_value(metric_name, baseline_value, result_dict, baseline_dict)
+            if not expected_value: continue
+            if result[metric_name] > expected_value * (1 + tolerance) and \
+                    result[metric_name] - expected_value > metric_floor:
+                regression_list.append('%s %s: %.6g, expected %.6g from baseline (+%.1f%%)' % (
+                    bench_name, metric_name, result[metric_name], expected_value,
+                    (result[metric_name] / expected_value - 1) * 100))
+
+    return regression_list
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmark workbook load, tab classification and row extraction.')
+    parser.add_argument('--tabs', type=int, default=20, help='number of tabs in the synthetic workbook')
+    parser.add_argument('--header-width', type=int, default=30, help='number of keywords in each header row')
+    parser.add_argument('--rows', type=int, default=1000, help='number of data rows in each tab')
+    parser.add_argument('--keywords', type=int, default=500, help='size of the header keyword pool')
+    parser.add_argument('--registry-size', type=int, default=200, help='number of registered tab type keywords')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs of each benchmark')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='path of the baseline result file')
+    parser.add_argument('--save-baseline', action='store_true', help='save the result as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed ratio of regression against baseline')
+    parser.add_argument('--run-benchmark', help=argparse.SUPPRESS)
+    parser.add_argument('--workbook', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_benchmark:
+        result = run_benchmark(args.run_benchmark, args.workbook, get_keyword_pool(args.keywords, args.header_width),
+                               args.registry_size, args.repeat)
+        print(json.dumps(result))
+        return 0
+
+    workbook_dir = tempfile.mkdtemp()
+    try:
+        workbook_path = os.path.join(workbook_dir, 'synthetic.xlsx')
+        generate_workbook(workbook_path, args.tabs, args.header_width, args.rows, args.keywords)
+        result_dict = run_benchmarks(workbook_path, args)
+    finally:
+        shutil.rmtree(workbook_dir)
+
+    parameter_dict = {'tabs': args.tabs, 'header_width': args.header_width, 'rows': args.rows,
+                      'keywords': args.keywords, 'registry_size': args.registry_size}
+    for bench_name, result in result_dict.items():
+        print('%-26s wall %9.4fs  peak alloc %10d B  peak rss %s KB' % (
+            bench_name, result['wall_time'], result['peak_alloc_bytes'], result['peak_rss_kb']))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({'parameters': parameter_dict, 'results': result_dict}, baseline_file, indent=2)
+        print('Baseline saved to %s' % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline found at %s' % args.baseline)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get('parameters') != parameter_dict:
+        print('Baseline was recorded with different parameters %s, skip comparison.' % baseline.get('parameters'))
+        return 0
+    if REFERENCE_BENCH_NAME not in baseline['results'].keys():
+        print('Baseline was recorded without the reference benchmark, skip comparison.')
+        return 0
+
+    regression_list = compare_with_baseline(result_dict, baseline['results'], args.tolerance)
+    for regression in regression_list: print('REGRESSION %s' % regression)
+
+    return 1 if regression_list else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# encoding: utf-8
+
+import datetime
+import math
+from readerbackend import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Column types of the column schema of WorksheetWithHeader.
+COLUMN_TYPE_TEXT = 'text'                   # str, numbers without fraction are written without '.0'.
+COLUMN_TYPE_INTEGER = 'integer'             # int, numbers with fraction are kept as float.
+COLUMN_TYPE_FLOAT = 'float'                 # float.
+COLUMN_TYPE_BOOLEAN = 'boolean'             # bool.
+COLUMN_TYPE_DATE = 'date'                   # datetime.datetime, from date serial number or ISO 8601 text.
+COLUMN_TYPE_RAW = 'raw'                     # Cell value as read.
+
+# Number of data rows sampled to infer the column schema.
+COLUMN_SCHEMA_SAMPLE_ROW_COUNT = 100
+
+# Day 0 of the Excel date serial number, by workbook datemode.
+EXCEL_EPOCH_BY_DATEMODE = {0: '1899-12-30', 1: '1904-01-01'}
+
+# Serial number of 1900-02-29, which Excel counts though 1900 is not a leap year. In datemode 0 the serial numbers
+# before it are one day later than the epoch, as xlrd converts them.
+EXCEL_LEAP_BUG_SERIAL = 60
+
+# Cell types holding a number, date serial number and boolean are numbers too.
+NUMBER_CELL_TYPES = frozenset([CELL_NUMBER, CELL_DATE, CELL_BOOLEAN])
+
+# Text of boolean cells, case insensitive.
+BOOLEAN_BY_TEXT = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+
+def get_datetime64_array(serial_array, datemode):
+    """
+    Convert date serial numbers to datetime64[ms] array.
+
+    :param serial_array: float64 array of the date serial numbers, NaN for empty cell.
+    :param datemode: datemode of the workbook.
+    :return: datetime64[ms] array, NaT for empty cell.
+    """
+
+    epoch = numpy.datetime64(EXCEL_EPOCH_BY_DATEMODE[datemode], 'ms')
+    date_array = numpy.full(serial_array.shape, numpy.datetime64('NaT'), dtype='datetime64[ms]')
+    valid_mask = ~numpy.isnan(serial_array)
+    date_array[valid_mask] = epoch + numpy.round(serial_array[valid_mask] * 86400000).astype('timedelta64[ms]')
+    if datemode == 0:
+        date_array[valid_mask & (serial_array < EXCEL_LEAP_BUG_SERIAL)] += numpy.timedelta64(1, 'D')
+
+    return date_array
+
+
+def get_datetime_list(serial_list, datemode):
+    """
+    Convert date serial numbers to datetime objects, vectorized by numpy if it is installed.
+
+    :param serial_list: list of the date serial numbers, None for empty cell.
+    :param datemode: datemode of the workbook.
+    :return: list of datetime.datetime object, None for empty cell.
+    """
+
+    if numpy is not None:
+        serial_array = numpy.array([numpy.nan if serial is None else serial for serial in serial_list], dtype=numpy.float64)
+        return get_datetime64_array(serial_array, datemode).tolist()
+
+    epoch = datetime.datetime.fromisoformat(EXCEL_EPOCH_BY_DATEMODE[datemode])
+    return [None if serial is None else
+            epoch + datetime.timedelta(days=1 if datemode == 0 and serial < EXCEL_LEAP_BUG_SERIAL else 0,
+                                       milliseconds=round(serial * 86400000))
+            for serial in serial_list]
+
+
+def get_number(value, cell_type):
+    """
+    Return the number of the cell, text is parsed as number.
+
+    :param value: cell value.
+    :param cell_type: normalized cell type.
+    :return: float of the cell, or None if it is empty or not a number. Text nan and inf are not numbers.
+    """
+
+    if cell_type in NUMBER_CELL_TYPES: return float(value)
+    if cell_type == CELL_TEXT:
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+
+    return None
+
+
+def convert_text_column(value_list, type_list, datemode):
+    text_list = []
+    date_row_index_list = []
+    for row_index, (value, cell_type) in enumerate(zip(value_list, type_list)):
+        if cell_type == CELL_TEXT:
+            text_list.append(value)
+        elif cell_type == CELL_NUMBER:
+            text_list.append(str(int(value)) if float(value).is_integer() else str(value))
+        elif cell_type == CELL_BOOLEAN:
+            text_list.append('TRUE' if value else 'FALSE')
+        else:
+            text_list.append(None)
+            if cell_type == CELL_DATE: date_row_index_list.append(row_index)
+
+    # Date cells of the column are converted in one batch.
+    date_list = get_datetime_list([value_list[row_index] for row_index in date_row_index_list], datemode)
+    for row_index, date_value in zip(date_row_index_list, date_list):
+        text_list[row_index] = date_value.isoformat()
+
+    return text_list
+
+
+def convert_integer_column(value_list, type_list, datemode):
+    number_list = [get_number(value, cell_type) for value, cell_type in zip(value_list, type_list)]
+
+    return [number if number is None or not number.is_integer() else int(number) for number in number_list]
+
+
+def convert_float_column(value_list, type_list, datemode):
+    return [get_number(value, cell_type) for value, cell_type in zip(value_list, type_list)]
+
+
+def convert_boolean_column(value_list, type_list, datemode):
+    return [bool(value) if cell_type in NUMBER_CELL_TYPES else
+            BOOLEAN_BY_TEXT.get(value.strip().lower()) if cell_type == CELL_TEXT else None
+            for value, cell_type in zip(value_list, type_list)]
+
+
+def convert_date_column(value_list, type_list, datemode):
+    date_list = get_datetime_list([value if cell_type in [CELL_DATE, CELL_NUMBER] else None
+                                   for value, cell_type in zip(value_list, type_list)], datemode)
+
+    # Date exported as text, e.g. in CSV.
+    for row_index, cell_type in enumerate(type_list):
+        if cell_type != CELL_TEXT: continue
+        try:
+            date_list[row_index] = datetime.datetime.fromisoformat(value_list[row_index].strip())
+        except ValueError:
+            pass
+
+    return date_list
+
+
+def convert_raw_column(value_list, type_list, datemode):
+    return [None if cell_type in NO_VALUE_CELL_TYPES else value for value, cell_type in zip(value_list, type_list)]
+
+
+# Converter of each column type, called as converter(value_list, type_list, datemode) for a batch of cells of
+# one column. Empty and error cells, and cells can not be converted are converted to None.
+COLUMN_CONVERTER_BY_TYPE = {
+    COLUMN_TYPE_TEXT: convert_text_column,
+    COLUMN_TYPE_INTEGER: convert_integer_column,
+    COLUMN_TYPE_FLOAT: convert_float_column,
+    COLUMN_TYPE_BOOLEAN: convert_boolean_column,
+    COLUMN_TYPE_DATE: convert_date_column,
+    COLUMN_TYPE_RAW: convert_raw_column,
+}
+
+
+def infer_column_type(value_list, type_list):
+    """
+    Infer the column type from the cells of a column.
+    Date cells are only known from workbooks with number formats, e.g. read by xlrd. Dates read as numbers need to
+    be declared as COLUMN_TYPE_DATE.
+
+    :param value_list: list of cell value.
+    :param type_list: list of normalized cell type.
+    :return: column type, COLUMN_TYPE_RAW if the column is empty or has mixed types.
+    """
+
+    type_set = set(type_list) - {CELL_EMPTY, CELL_BLANK}
+
+    if type_set == {CELL_NUMBER}:
+        if all(float(value).is_integer() for value, cell_type in zip(value_list, type_list) if cell_type == CELL_NUMBER):
+            return COLUMN_TYPE_INTEGER
+        return COLUMN_TYPE_FLOAT
+    if type_set == {CELL_DATE}: return COLUMN_TYPE_DATE
+    if type_set == {CELL_BOOLEAN}: return COLUMN_TYPE_BOOLEAN
+    if type_set == {CELL_TEXT}: return COLUMN_TYPE_TEXT
+
+    return COLUMN_TYPE_RAW
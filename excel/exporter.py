@@ -0,0 +1,231 @@
+# encoding: utf-8
+
+import datetime
+import itertools
+import json
+from columnschema import *
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# Formats of the export output.
+EXPORT_FORMAT_JSON_LINES = 'jsonl'          # One JSON object per row.
+EXPORT_FORMAT_PARQUET = 'parquet'           # Parquet file, requires pyarrow.
+EXPORT_FORMAT_ARROW = 'arrow'               # Arrow IPC file, requires pyarrow.
+
+# Columns added to the exported rows.
+EXPORT_TAB_NAME_COLUMN = '_tab_name'
+EXPORT_TAB_TYPE_COLUMN = '_tab_type'
+EXPORT_WORKBOOK_PATH_COLUMN = '_workbook_path'
+
+
+def get_export_text(value):
+    """
+    Return the text of a typed value, for the string columns of Arrow and the values JSON can not encode.
+
+    :param value: typed value.
+    :return: str of the value, or None for None.
+    """
+
+    if value is None or isinstance(value, str): return value
+    if isinstance(value, (datetime.date, datetime.datetime)): return value.isoformat()
+    if isinstance(value, float) and value.is_integer(): return str(int(value))
+
+    return str(value)
+
+
+def get_arrow_type(column_type):
+    """
+    Return the Arrow type of the column type. Text, raw and unknown columns are written as string.
+
+    :param column_type: column type of the column schema.
+    :return: pyarrow DataType object.
+    """
+
+    arrow_type_by_column_type = {
+        COLUMN_TYPE_INTEGER: pyarrow.int64(),
+        COLUMN_TYPE_FLOAT: pyarrow.float64(),
+        COLUMN_TYPE_BOOLEAN: pyarrow.bool_(),
+        COLUMN_TYPE_DATE: pyarrow.timestamp('ms'),
+    }
+
+    return arrow_type_by_column_type.get(column_type, pyarrow.string())
+
+
+class TabTypeExporter(object):
+    """
+    Writer of the data rows of every tab of one tab type, from one or more workbooks, to one output file.
+
+    Rows are converted by WorksheetWithHeader.iterate_typed_rows() and written in chunks of chunk_row_count rows, so
+    only one chunk of converted rows is held at once. In lazy mode, worksheets loaded by the export are unloaded
+    after they are written. The Arrow schema is fixed by the first tab written: its keywords, or keyword_list if
+    given, typed by its column schema. Keywords of later tabs not in the schema are dropped. A column inferred as
+    integer from the sample rows can not take a fraction number later, declare COLUMN_TYPE_FLOAT for such column.
+    """
+
+    output_path = None                      # Path of the output file.
+    export_format = None                    # EXPORT_FORMAT_JSON_LINES, EXPORT_FORMAT_PARQUET or EXPORT_FORMAT_ARROW.
+    tab_type = None                         # Tab type to be exported.
+    chunk_row_count = None                  # Number of rows written in each chunk.
+    keyword_list = None                     # Keywords to be exported, None for all keywords in header.
+    extra_column_list = None                # Columns added to the rows, e.g. EXPORT_TAB_NAME_COLUMN.
+    output_file = None                      # Opened output file of JSON Lines.
+    arrow_writer = None                     # ParquetWriter or RecordBatchFileWriter, opened on first chunk.
+    arrow_sink = None                       # Opened output file of Arrow format.
+    arrow_schema = None                     # pyarrow Schema of the output.
+    row_count = None                        # Number of rows written.
+
+    def __init__(self, output_path, export_format, tab_type, chunk_row_count=1000, keyword_list=None,
+                 add_tab_name=True, add_tab_type=False, add_workbook_path=False):
+        """
+        Open the output file.
+
+        :param output_path: Path of the output file.
+        :param export_format: EXPORT_FORMAT_JSON_LINES, EXPORT_FORMAT_PARQUET or EXPORT_FORMAT_ARROW.
+        :param tab_type: Name of the tab type to be exported.
+        :param chunk_row_count: number of rows converted and written in each chunk.
+        :param keyword_list: list of keyword in header to be exported. All keywords in header by default.
+        :param add_tab_name: True to add the tab name as EXPORT_TAB_NAME_COLUMN.
+        :param add_tab_type: True to add the tab type as EXPORT_TAB_TYPE_COLUMN.
+        :param add_workbook_path: True to add the workbook path as EXPORT_WORKBOOK_PATH_COLUMN.
+                                  Will raise ValueError if the format is unknown,
+                                  and ImportError if pyarrow is not installed for Parquet and Arrow format.
+        """
+
+        if export_format not in [EXPORT_FORMAT_JSON_LINES, EXPORT_FORMAT_PARQUET, EXPORT_FORMAT_ARROW]:
+            raise ValueError('Unknown export format %s' % export_format)
+        if export_format != EXPORT_FORMAT_JSON_LINES and pyarrow is None:
+            raise ImportError('pyarrow is required to export to %s format.' % export_format)
+
+        self.output_path = output_path
+        self.export_format = export_format
+        self.tab_type = tab_type
+        self.chunk_row_count = max(1, int(chunk_row_count))
+        self.keyword_list = list(keyword_list) if keyword_list is not None else None
+        self.extra_column_list = [column_name for column_name, is_added in [(EXPORT_WORKBOOK_PATH_COLUMN, add_workbook_path),
+                                                                            (EXPORT_TAB_NAME_COLUMN, add_tab_name),
+                                                                            (EXPORT_TAB_TYPE_COLUMN, add_tab_type)]
+                                  if is_added]
+        self.row_count = 0
+
+        if export_format == EXPORT_FORMAT_JSON_LINES: self.output_file = open(output_path, 'w', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_workbook(self, workbook_obj):
+        """
+        Write the data rows of every tab of the tab type in the workbook.
+        In lazy mode, the worksheets loaded to be written are unloaded after they are written.
+
+        :param workbook_obj: loaded WorkbookWithHeader object.
+        :return: number of rows written from the workbook.
+        """
+
+        start_row_count = self.row_count
+        for tab_name in workbook_obj.get_tab_list_by_type(self.tab_type):
+            is_loaded = workbook_obj.is_worksheet_loaded(tab_name)
+            worksheet_obj = workbook_obj.get_worksheet_by_name(tab_name)
+            self.write_worksheet(worksheet_obj, {EXPORT_WORKBOOK_PATH_COLUMN: workbook_obj.workbook_path,
+                                                 EXPORT_TAB_NAME_COLUMN: tab_name,
+                                                 EXPORT_TAB_TYPE_COLUMN: self.tab_type})
+            if workbook_obj.lazy_load and not is_loaded: workbook_obj.unload_worksheet(tab_name)
+
+        return self.row_count - start_row_count
+
+    def write_worksheet(self, worksheet_obj, extra_value_by_column):
+        """
+        Write the data rows of one worksheet in chunks.
+
+        :param worksheet_obj: WorksheetWithHeader object.
+        :param extra_value_by_column: dict of the value of each extra column.
+        :return: None.
+        """
+
+        extra_record = dict((column_name, extra_value_by_column[column_name]) for column_name in self.extra_column_list)
+        if self.export_format != EXPORT_FORMAT_JSON_LINES and self.arrow_schema is None:
+            self.open_arrow_writer(worksheet_obj)
+
+        keyword_list = self.keyword_list
+        if self.arrow_schema is not None:
+            keyword_list = [column_name for column_name in self.arrow_schema.names if column_name not in extra_record]
+
+        row_iterator = worksheet_obj.iterate_typed_rows(keyword_list, chunk_row_count=self.chunk_row_count)
+        while True:
+            record_list = list(itertools.islice(row_iterator, self.chunk_row_count))
+            if not record_list: break
+
+            if self.export_format == EXPORT_FORMAT_JSON_LINES:
+                self.output_file.write(''.join(json.dumps(dict(extra_record, **record), ensure_ascii=False,
+                                                          default=get_export_text) + '\n'
+                                               for record in record_list))
+            else:
+                self.write_arrow_chunk(record_list, extra_record)
+            self.row_count += len(record_list)
+
+    def open_arrow_writer(self, worksheet_obj):
+        """
+        Fix the Arrow schema by the worksheet, and open the Parquet or Arrow writer.
+
+        :param worksheet_obj: WorksheetWithHeader object of the first tab written, or None if no tab was written.
+        :return: None. arrow_schema and arrow_writer will be updated.
+        """
+
+        column_type_by_keyword = worksheet_obj.get_column_schema() if worksheet_obj is not None else dict()
+        keyword_list = self.keyword_list if self.keyword_list is not None else list(column_type_by_keyword.keys())
+
+        field_list = [pyarrow.field(column_name, pyarrow.string()) for column_name in self.extra_column_list]
+        field_list.extend(pyarrow.field(str(keyword), get_arrow_type(column_type_by_keyword.get(keyword)))
+                          for keyword in keyword_list if keyword not in self.extra_column_list)
+        self.arrow_schema = pyarrow.schema(field_list)
+
+        if self.export_format == EXPORT_FORMAT_PARQUET:
+            self.arrow_writer = pyarrow.parquet.ParquetWriter(self.output_path, self.arrow_schema)
+        else:
+            self.arrow_sink = pyarrow.OSFile(self.output_path, 'wb')
+            self.arrow_writer = pyarrow.ipc.new_file(self.arrow_sink, self.arrow_schema)
+
+    def write_arrow_chunk(self, record_list, extra_record):
+        """
+        Write one chunk of rows to the Parquet or Arrow writer.
+
+        :param record_list: list of typed record.
+        :param extra_record: dict of the value of each extra column.
+        :return: None.
+        """
+
+        array_list = []
+        for field in self.arrow_schema:
+            if field.name in extra_record.keys():
+                value_list = [extra_record[field.name]] * len(record_list)
+            else:
+                value_list = [record.get(field.name) for record in record_list]
+            if pyarrow.types.is_string(field.type): value_list = [get_export_text(value) for value in value_list]
+            array_list.append(pyarrow.array(value_list, type=field.type))
+
+        self.arrow_writer.write_table(pyarrow.Table.from_arrays(array_list, schema=self.arrow_schema))
+
+    def close(self):
+        """
+        Finish and close the output file. An Arrow output without any tab written only has the extra columns and
+        keyword_list as string columns.
+
+        :return: None.
+        """
+
+        if self.export_format != EXPORT_FORMAT_JSON_LINES and self.arrow_schema is None: self.open_arrow_writer(None)
+
+        if self.output_file is not None: self.output_file.close()
+        if self.arrow_writer is not None: self.arrow_writer.close()
+        if self.arrow_sink is not None: self.arrow_sink.close()
+        self.output_file = None
+        self.arrow_writer = None
+        self.arrow_sink = None
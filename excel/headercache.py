@@ -0,0 +1,195 @@
+# encoding: utf-8
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from internallogging import *
+from workbookwithheader import get_file_fingerprint, get_file_content_hash
+
+
+class WorkbookHeaderCache(object):
+    """
+    Persistent cache of tab names and header keywords of workbooks, stored in a SQLite file.
+    Entries are keyed by the workbook path, the reader backend and the header row number. An entry is valid while
+    the file size and mtime are unchanged; the content hash is only read when the mtime changed with the same size,
+    e.g. a file touched or copied, and the entry is kept if the content is the same.
+    Least recently used entries are evicted when the number of entries exceeds max_entries, or the size of their
+    stored keywords exceeds max_size, so a few workbooks with many large headers do not grow the file without limit.
+    """
+
+    cache_path = None                       # Path of the SQLite cache file.
+    max_entries = None                      # Max number of entries kept, least recently used entries are evicted.
+    max_size = None                         # Max size in bytes of the keywords stored by all entries.
+    connection = None                       # SQLite connection object.
+    connection_lock = None                  # Lock to share the connection between threads.
+    internal_logger = None                  # Internal logger object.
+
+    def __init__(self, cache_path, max_entries=1000, max_size=64 * 1024 * 1024):
+
+        self.internal_logger = get_internal_logger()
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.connection_lock = threading.Lock()
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False)
+
+        # Cache files written before the reader backend was part of the key are dropped, entries are rebuilt on load.
+        column_name_list = [column_info[1] for column_info in
+                            self.connection.execute('PRAGMA table_info(workbook_header)').fetchall()]
+        if column_name_list and 'reader_backend' not in column_name_list:
+            self.connection.execute('DROP TABLE workbook_header')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS workbook_header ('
+                                'workbook_path TEXT, reader_backend TEXT, header_row_no INTEGER, file_size INTEGER, '
+                                'mtime_ns INTEGER, content_hash TEXT, keyword_list_by_name TEXT, last_access REAL, '
+                                'PRIMARY KEY (workbook_path, reader_backend, header_row_no))')
+        self.connection.commit()
+
+    @staticmethod
+    def get_fingerprint(workbook_path, reader_backend):
+        """
+        Return the fingerprint of the workbook file, from its stat only.
+
+        :param workbook_path: Path of workbook located.
+        :param reader_backend: name of the reader backend the workbook is opened with.
+        :return: tuple of (absolute path, reader backend, size, mtime in nanoseconds).
+        """
+
+        workbook_path, file_size, mtime_ns = get_file_fingerprint(workbook_path)
+        return workbook_path, reader_backend, file_size, mtime_ns
+
+    def get(self, fingerprint, header_row_no):
+        """
+        Return the cached tab names and header keywords of the workbook.
+        The file content is hashed only if the size is the same and the mtime is not.
+
+        :param fingerprint: fingerprint returned by get_fingerprint().
+        :param header_row_no: row number of the header row.
+        :return: ordered dict of { <tab name>: [ <keyword>, ......], ......}, or None if the cache has no entry
+                 matching the fingerprint.
+        """
+
+        workbook_path, reader_backend, file_size, mtime_ns = fingerprint
+        entry_key = (workbook_path, reader_backend, header_row_no)
+        with self.connection_lock:
+            cached_row = self.connection.execute(
+                'SELECT file_size, mtime_ns, content_hash, keyword_list_by_name FROM workbook_header '
+                'WHERE workbook_path = ? AND reader_backend = ? AND header_row_no = ?', entry_key).fetchone()
+            if cached_row is None: return None
+            if cached_row[0] != file_size: return None
+
+        if cached_row[1] != mtime_ns:
+            try:
+                content_hash = get_file_content_hash(workbook_path)
+            except (IOError, OSError):
+                return None
+            if content_hash != cached_row[2]: return None
+
+        with self.connection_lock:
+            self.connection.execute('UPDATE workbook_header SET mtime_ns = ?, last_access = ? '
+                                    'WHERE workbook_path = ? AND reader_backend = ? AND header_row_no = ?',
+                                    (mtime_ns, time.time()) + entry_key)
+            self.connection.commit()
+
+        return dict((tab_name, keyword_list) for tab_name, keyword_list in json.loads(cached_row[3]))
+
+    def put(self, fingerprint, header_row_no, keyword_list_by_name):
+        """
+        Store the tab names and header keywords of the workbook, and evict least recently used entries.
+        Keywords larger than max_size alone are not stored.
+
+        :param fingerprint: fingerprint returned by get_fingerprint().
+        :param header_row_no: row number of the header row.
+        :param keyword_list_by_name: ordered dict of { <tab name>: [ <keyword>, ......], ......}
+        :return: None.
+        """
+
+        workbook_path, reader_backend, file_size, mtime_ns = fingerprint
+        try:
+            cached_value = json.dumps(list(keyword_list_by_name.items()))
+            content_hash = get_file_content_hash(workbook_path)
+            is_file_changed = get_file_fingerprint(workbook_path)[1:] != (file_size, mtime_ns)
+        except (TypeError, ValueError, IOError, OSError):
+            self.internal_logger.exception('Failed to store header cache of %s', workbook_path)
+            return
+
+        # The file changed since it was loaded, the hash may not match the keywords.
+        if is_file_changed: return
+        if len(cached_value.encode('utf-8')) > self.max_size: return
+
+        with self.connection_lock:
+            self.connection.execute('INSERT OR REPLACE INTO workbook_header VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (workbook_path, reader_backend, header_row_no, file_size, mtime_ns, content_hash,
+                                     cached_value, time.time()))
+            self.connection.execute('DELETE FROM workbook_header WHERE rowid NOT IN '
+                                    '(SELECT rowid FROM workbook_header ORDER BY last_access DESC, rowid DESC LIMIT ?)',
+                                    (self.max_entries,))
+            self.evict_by_size()
+            self.connection.commit()
+
+    def evict_by_size(self):
+        """
+        Evict least recently used entries until the keywords of the kept entries fit in max_size.
+        Must be called with connection_lock held.
+
+        :return: None.
+        """
+
+        total_size = 0
+        evicted_entry_list = []
+        for rowid, entry_size in self.connection.execute(
+                'SELECT rowid, length(CAST(keyword_list_by_name AS BLOB)) FROM workbook_header '
+                'ORDER BY last_access DESC, rowid DESC'):
+            total_size += entry_size
+            if total_size > self.max_size: evicted_entry_list.append((rowid,))
+
+        if evicted_entry_list:
+            self.connection.executemany('DELETE FROM workbook_header WHERE rowid = ?', evicted_entry_list)
+
+    def invalidate(self, workbook_path=None):
+        """
+        Remove the cached entries of specified workbook, or all entries.
+
+        :param workbook_path: Path of workbook located, None to remove all entries.
+        :return: None.
+        """
+
+        with self.connection_lock:
+            if workbook_path is None:
+                self.connection.execute('DELETE FROM workbook_header')
+            else:
+                self.connection.execute('DELETE FROM workbook_header WHERE workbook_path = ?',
+                                        (os.path.abspath(workbook_path),))
+            self.connection.commit()
+
+    def get_entry_count(self):
+        """
+        Return the number of cached entries.
+
+        :return: number of cached entries.
+        """
+
+        with self.connection_lock:
+            return self.connection.execute('SELECT COUNT(*) FROM workbook_header').fetchone()[0]
+
+    def get_total_size(self):
+        """
+        Return the size in bytes of the keywords stored by all entries, as limited by max_size.
+
+        :return: size in bytes.
+        """
+
+        with self.connection_lock:
+            return self.connection.execute('SELECT COALESCE(SUM(length(CAST(keyword_list_by_name AS BLOB))), 0) '
+                                           'FROM workbook_header').fetchone()[0]
+
+    def close(self):
+        """
+        Close the cache file.
+
+        :return: None.
+        """
+
+        with self.connection_lock:
+            self.connection.close()
@@ -0,0 +1,71 @@
+# encoding: utf-8
+
+import time
+
+
+# Registered metrics hooks. Timing is skipped entirely when the list is empty.
+metrics_hook_list = []
+
+# Names of the metrics emitted.
+METRIC_WORKBOOK_OPEN_TIME = 'workbook_open_time'              # seconds to open the workbook file, tag workbook_path
+METRIC_SHEET_HEADER_PARSE_TIME = 'sheet_header_parse_time'    # seconds to load one worksheet, tag worksheet_name
+METRIC_SHEET_CELL_COUNT = 'sheet_cell_count'                  # rows x columns of one worksheet, tag worksheet_name
+METRIC_CLASSIFICATION_TIME = 'classification_time'            # seconds to build tab list by type, tag workbook_path
+
+
+def add_metrics_hook(metrics_hook):
+    """
+    Add a metrics hook. The hook is called as metrics_hook(metric_name, value, tag_dict).
+
+    :param metrics_hook: callable to receive the metrics.
+    :return: None.
+    """
+
+    if callable(metrics_hook) and metrics_hook not in metrics_hook_list: metrics_hook_list.append(metrics_hook)
+
+
+def remove_metrics_hook(metrics_hook):
+    """
+    Remove a metrics hook.
+
+    :param metrics_hook: callable added by add_metrics_hook().
+    :return: None.
+    """
+
+    if metrics_hook in metrics_hook_list: metrics_hook_list.remove(metrics_hook)
+
+
+def start_timer():
+    """
+    Return the start time of a timed section, or None if no metrics hook is registered.
+
+    :return: start time from time.perf_counter(), or None.
+    """
+
+    return time.perf_counter() if metrics_hook_list else None
+
+
+def emit_metric(metric_name, value, **tag_dict):
+    """
+    Pass the metric to every metrics hook.
+
+    :param metric_name: name of the metric.
+    :param value: value of the metric.
+    :param tag_dict: tags of the metric, e.g. workbook_path.
+    :return: None.
+    """
+
+    for metrics_hook in metrics_hook_list: metrics_hook(metric_name, value, tag_dict)
+
+
+def emit_elapsed_time(metric_name, start_time, **tag_dict):
+    """
+    Pass the elapsed time since start_time to every metrics hook. Nothing is done if start_time is None.
+
+    :param metric_name: name of the metric.
+    :param start_time: start time returned by start_timer().
+    :param tag_dict: tags of the metric, e.g. workbook_path.
+    :return: None.
+    """
+
+    if start_time is not None: emit_metric(metric_name, time.perf_counter() - start_time, **tag_dict)
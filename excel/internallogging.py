@@ -3,19 +3,43 @@
 import logging
 
 
-def get_internal_logger(log_level=logging.DEBUG):
+# Default log level of the internal logger. Records below this level are dropped before being formatted.
+internal_log_level = logging.WARNING
+
+
+def set_internal_log_level(log_level):
     """
-    Return a Logger object based on the function name who call the get internal logger function.
+    Set the default log level of the internal logger, and apply it to the logger if it was created.
 
     :param log_level: The log level defined in logging module.
+    :return: None.
+    """
+
+    global internal_log_level
+    internal_log_level = log_level
+
+    internal_logger = logging.getLogger(__name__)
+    internal_logger.setLevel(log_level)
+    for log_handler in internal_logger.handlers: log_handler.setLevel(log_level)
+
+
+def get_internal_logger(log_level=None):
+    """
+    Return a Logger object based on the function name who call the get internal logger function.
+    The log file is opened on the first record emitted, so loading workbooks does not touch the disk
+    unless something is logged at the enabled level.
+
+    :param log_level: The log level defined in logging module. internal_log_level is used by default.
     :return: the Logger object based on the function name who call the get internal logger function.
     """
+    if log_level is None: log_level = internal_log_level
+
     internal_logger = logging.getLogger(__name__)
     internal_logger.setLevel(log_level)
 
     if not internal_logger.hasHandlers():
         # Add a file handler only if no handler before. To avoid duplicate logging record.
-        file_handler = logging.FileHandler('%s.log' % __name__, 'w+')
+        file_handler = logging.FileHandler('%s.log' % __name__, 'w+', delay=True)
         file_handler.setLevel(log_level)
 
         logging_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(funcName)s - %(lineno)d - %(message)s')
@@ -0,0 +1,498 @@
+# encoding: utf-8
+
+import csv
+import io
+import os
+import re
+from collections import namedtuple
+import xlrd
+from xlsxreader import XlsxHeaderReader
+
+
+# Normalized cell types of all reader backends, same values as the xlrd cell type constants.
+CELL_EMPTY = 0
+CELL_TEXT = 1
+CELL_NUMBER = 2
+CELL_DATE = 3
+CELL_BOOLEAN = 4
+CELL_ERROR = 5
+CELL_BLANK = 6
+
+# Cell types which are not a value, e.g. not a keyword in header row.
+NO_VALUE_CELL_TYPES = frozenset([CELL_EMPTY, CELL_BLANK, CELL_ERROR])
+
+# Cell of any reader backend, compatible with xlrd.sheet.Cell. Empty cell has value ''.
+SheetCell = namedtuple('SheetCell', ['ctype', 'value'])
+
+EMPTY_CELL = SheetCell(CELL_EMPTY, '')
+
+# Attributes of the sheet object returned by ReaderBackend.sheet_by_name(), the part of xlrd.sheet.Sheet interface
+# used by WorksheetWithHeader. The sheet may also have a book attribute providing datemode.
+SHEET_PROTOCOL_NAME_LIST = ['name', 'nrows', 'ncols', 'row_types', 'row_values', 'row_len', 'cell_type', 'cell_value',
+                            'col_types', 'col_values']
+
+# Names of the reader backends.
+READER_BACKEND_XLRD = 'xlrd'                # .xls and .xlsx parsed by xlrd.
+READER_BACKEND_CSV = 'csv'                  # .csv and .tsv export of one sheet.
+READER_BACKEND_XLSX_STREAM = 'xlsx_stream'  # .xlsx streamed sheet by sheet, on demand.
+
+# Number in CSV cell, Excel writes numbers without thousands separator to CSV.
+CSV_NUMBER_PATTERN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+# Number with leading zero in CSV cell, e.g. 00123, it is an identifier kept as text.
+CSV_LEADING_ZERO_PATTERN = re.compile(r'[+-]?0\d')
+
+# Boolean in CSV cell, as written by Excel.
+CSV_BOOLEAN_BY_TEXT = {'TRUE': True, 'FALSE': False}
+
+
+def get_csv_cell(cell_text):
+    """
+    Return the normalized cell of the CSV cell text.
+
+    :param cell_text: text of the CSV cell.
+    :return: SheetCell object, number and boolean text are converted to float and bool. Number with leading zero is
+             kept as text.
+    """
+
+    if cell_text == '': return EMPTY_CELL
+    if CSV_NUMBER_PATTERN.fullmatch(cell_text) and not CSV_LEADING_ZERO_PATTERN.match(cell_text):
+        return SheetCell(CELL_NUMBER, float(cell_text))
+    if cell_text in CSV_BOOLEAN_BY_TEXT.keys(): return SheetCell(CELL_BOOLEAN, CSV_BOOLEAN_BY_TEXT[cell_text])
+
+    return SheetCell(CELL_TEXT, cell_text)
+
+
+def is_sheet_object(sheet_obj):
+    """
+    Return whether the object has the sheet protocol, e.g. xlrd.sheet.Sheet, MemorySheet or the sheet of a backend
+    registered by register_reader_backend().
+
+    :param sheet_obj: object to be checked.
+    :return: True if the object has every attribute in SHEET_PROTOCOL_NAME_LIST.
+    """
+
+    return all(hasattr(sheet_obj, attribute_name) for attribute_name in SHEET_PROTOCOL_NAME_LIST)
+
+
+def get_sheet_datemode(sheet_obj):
+    """
+    Return the date mode of the workbook of the sheet.
+
+    :param sheet_obj: sheet object.
+    :return: 0 for 1900 based, 1 for 1904 based. 0 if the sheet has no book with datemode.
+    """
+
+    return getattr(getattr(sheet_obj, 'book', None), 'datemode', 0)
+
+
+def get_sheet_row(sheet_obj, row_no):
+    """
+    Return the cells of one row of the sheet, by the sheet protocol.
+
+    :param sheet_obj: sheet object.
+    :param row_no: row number, start from 0.
+    :return: list of SheetCell object.
+    """
+
+    return [SheetCell(ctype, value) for ctype, value in zip(sheet_obj.row_types(row_no), sheet_obj.row_values(row_no))]
+
+
+def get_sheet_header_row(sheet_obj, row_no):
+    """
+    Return the cells of one row of the sheet read as header row. Keywords are text, so cells of a text format, e.g.
+    CSV, are returned as written if the sheet provides the optional row_texts() method, e.g. 2019 but not 2019.0.
+
+    :param sheet_obj: sheet object.
+    :param row_no: row number, start from 0.
+    :return: list of SheetCell object.
+    """
+
+    cell_list = get_sheet_row(sheet_obj, row_no)
+    text_list = sheet_obj.row_texts(row_no) if hasattr(sheet_obj, 'row_texts') else None
+    if text_list is None: return cell_list
+
+    return [SheetCell(CELL_TEXT, cell_text) if cell.ctype not in NO_VALUE_CELL_TYPES and cell_text is not None else cell
+            for cell, cell_text in zip(cell_list, text_list)]
+
+
+def get_xlsx_stream_cell(cell_value):
+    """
+    Return the normalized cell of the cell value read by XlsxHeaderReader.
+    Date cells are read as numbers, as the number formats in styles are not parsed.
+
+    :param cell_value: str, float or bool cell value.
+    :return: SheetCell object.
+    """
+
+    if isinstance(cell_value, bool): return SheetCell(CELL_BOOLEAN, cell_value)
+    if isinstance(cell_value, float): return SheetCell(CELL_NUMBER, cell_value)
+
+    return SheetCell(CELL_TEXT, cell_value)
+
+
+class MemorySheet(object):
+    """
+    Sheet held in memory, with the part of xlrd.sheet.Sheet interface used by WorksheetWithHeader.
+    Rows are padded with empty cells to ncols, as xlrd does for non ragged rows.
+    """
+
+    name = None                             # Name of the sheet.
+    book = None                             # Reader backend object of the sheet, provides datemode.
+    nrows = None                            # Number of rows.
+    ncols = None                            # Number of columns.
+    type_list_by_row = None                 # list of cell type list of each row.
+    value_list_by_row = None                # list of cell value list of each row.
+    text_list_by_row = None                 # dict of source text list of each row with a converted cell.
+
+    def __init__(self, name, book, row_list, text_list_by_row=None):
+        """
+        Build the sheet from rows.
+
+        :param name: name of the sheet.
+        :param book: reader backend object of the sheet.
+        :param row_list: list of rows, each row is a list of SheetCell object.
+        :param text_list_by_row: dict of { <row number>: [<cell text>, ......]} of text format, for the rows with a
+                                 cell converted from text, e.g. number. None if the sheet is not read from text.
+        """
+
+        self.name = name
+        self.book = book
+        self.nrows = len(row_list)
+        self.ncols = max([len(cell_list) for cell_list in row_list] or [0])
+
+        self.type_list_by_row = []
+        self.value_list_by_row = []
+        for cell_list in row_list:
+            padding_count = self.ncols - len(cell_list)
+            self.type_list_by_row.append([cell.ctype for cell in cell_list] + [CELL_EMPTY] * padding_count)
+            self.value_list_by_row.append([cell.value for cell in cell_list] + [''] * padding_count)
+        self.text_list_by_row = text_list_by_row or dict()
+
+    def row(self, rowx):
+        return [SheetCell(ctype, value) for ctype, value in zip(self.type_list_by_row[rowx], self.value_list_by_row[rowx])]
+
+    def row_types(self, rowx):
+        return list(self.type_list_by_row[rowx])
+
+    def row_values(self, rowx):
+        return list(self.value_list_by_row[rowx])
+
+    def row_len(self, rowx):
+        return len(self.value_list_by_row[rowx])
+
+    def cell_type(self, rowx, colx):
+        return self.type_list_by_row[rowx][colx]
+
+    def cell_value(self, rowx, colx):
+        return self.value_list_by_row[rowx][colx]
+
+    def col_types(self, colx, start_rowx=0, end_rowx=None):
+        return [type_list[colx] for type_list in self.type_list_by_row[start_rowx:end_rowx]]
+
+    def col_values(self, colx, start_rowx=0, end_rowx=None):
+        return [value_list[colx] for value_list in self.value_list_by_row[start_rowx:end_rowx]]
+
+    def row_texts(self, rowx):
+        # Source text of the row, None for rows without converted cell.
+        text_list = self.text_list_by_row.get(rowx)
+        return None if text_list is None else text_list + [None] * (self.ncols - len(text_list))
+
+
+class ReaderBackend(object):
+    """
+    Interface of the reader backends of WorkbookWithHeader.
+
+    A backend lists the sheets of a workbook, fetches the header row, iterates rows with normalized cell types,
+    and returns the sheet object used by WorksheetWithHeader, any object with the attributes in
+    SHEET_PROTOCOL_NAME_LIST, e.g. xlrd.sheet.Sheet or MemorySheet.
+    Backends which can read the header row without reading the whole sheet override get_header_row().
+    """
+
+    name = None                             # Name of the backend, used by register_reader_backend().
+    workbook_path = None                    # Path of workbook, only used in messages if workbook is from contents.
+    on_demand = None                        # Whether sheets are read on demand and can be released by unload_sheet().
+    datemode = None                         # Date mode of the workbook, 0 for 1900 based, 1 for 1904 based.
+
+    def __init__(self, workbook_path, file_contents=None, on_demand=False, use_mmap=True):
+        """
+        Open the workbook.
+
+        :param workbook_path: Path of workbook located.
+        :param file_contents: the workbook contents as bytes or mmap, workbook_path is only used in messages if given.
+        :param on_demand: True to read sheets on demand, if the backend supports it.
+        :param use_mmap: True to memory map the workbook file, if the backend supports it.
+                         Will raise exception of the underlying reader if it is not a valid workbook.
+        """
+
+        self.workbook_path = workbook_path
+        self.on_demand = False
+        self.datemode = 0
+
+    def sheet_names(self):
+        """
+        Return the sheet names in workbook order.
+
+        :return: list of sheet name.
+        """
+
+        raise NotImplementedError
+
+    def sheet_by_name(self, sheet_name):
+        """
+        Return the sheet object of specified sheet.
+
+        :param sheet_name: name of the sheet.
+        :return: sheet object with the attributes in SHEET_PROTOCOL_NAME_LIST.
+        """
+
+        raise NotImplementedError
+
+    def get_header_row(self, sheet_name, header_row_no):
+        """
+        Return the cells with value in the header row.
+
+        :param sheet_name: name of the sheet.
+        :param header_row_no: row number of the header row, start from 0.
+        :return: list of (<column number>, <SheetCell>) in column order. Empty list if the sheet is shorter.
+        """
+
+        sheet_obj = self.sheet_by_name(sheet_name)
+        if header_row_no >= sheet_obj.nrows: return []
+
+        return [(column_no, cell) for column_no, cell in enumerate(get_sheet_header_row(sheet_obj, header_row_no))
+                if cell.ctype not in NO_VALUE_CELL_TYPES]
+
+    def iterate_rows(self, sheet_name, row_count=None):
+        """
+        Yield the rows of the sheet.
+
+        :param sheet_name: name of the sheet.
+        :param row_count: number of rows to read, None to read all rows.
+        :return: generator of (<row number>, [<SheetCell>, ......]), row number start from 0.
+        """
+
+        sheet_obj = self.sheet_by_name(sheet_name)
+        for row_no in range(sheet_obj.nrows if row_count is None else min(row_count, sheet_obj.nrows)):
+            yield row_no, get_sheet_row(sheet_obj, row_no)
+
+    def iterate_header_rows(self, sheet_name, row_count):
+        """
+        Yield the first rows of the sheet read as header row, the candidates of header row detection.
+
+        :param sheet_name: name of the sheet.
+        :param row_count: number of rows to read.
+        :return: generator of (<row number>, [<SheetCell>, ......]), row number start from 0.
+        """
+
+        sheet_obj = self.sheet_by_name(sheet_name)
+        for row_no in range(min(row_count, sheet_obj.nrows)):
+            yield row_no, get_sheet_header_row(sheet_obj, row_no)
+
+    def unload_sheet(self, sheet_name):
+        """
+        Release the data of specified sheet read on demand, it will be read again on next request.
+
+        :param sheet_name: name of the sheet.
+        :return: None.
+        """
+
+        pass
+
+    def close(self):
+        """
+        Release the workbook file, sheets already returned are still usable.
+
+        :return: None.
+        """
+
+        pass
+
+
+class XlrdReaderBackend(ReaderBackend):
+    """
+    Reader backend of .xls and .xlsx workbook parsed by xlrd.
+    Contents of .xlsx workbook are copied by xlrd into a BytesIO, WorkbookWithHeader reads them by
+    XlsxStreamReaderBackend instead.
+    """
+
+    name = READER_BACKEND_XLRD
+    book = None                             # xlrd Book object.
+
+    def __init__(self, workbook_path, file_contents=None, on_demand=False, use_mmap=True):
+
+        super(XlrdReaderBackend, self).__init__(workbook_path, file_contents, on_demand, use_mmap)
+        self.book = xlrd.open_workbook(workbook_path, file_contents=file_contents, use_mmap=use_mmap, on_demand=on_demand)
+        # xlrd does not support on demand loading for .xlsx format.
+        self.on_demand = self.book.on_demand
+        self.datemode = self.book.datemode
+
+    def sheet_names(self):
+        return self.book.sheet_names()
+
+    def sheet_by_name(self, sheet_name):
+        return self.book.sheet_by_name(sheet_name)
+
+    def unload_sheet(self, sheet_name):
+        if self.on_demand: self.book.unload_sheet(sheet_name)
+
+    def close(self):
+        self.book.release_resources()
+
+
+class CsvReaderBackend(ReaderBackend):
+    """
+    Reader backend of CSV export of one sheet, the sheet is named after the file name without extension.
+    Delimiter is detected from the first line, text is decoded as UTF-8 with optional BOM.
+    """
+
+    name = READER_BACKEND_CSV
+    sheet_obj = None                        # MemorySheet object of the only sheet.
+
+    def __init__(self, workbook_path, file_contents=None, on_demand=False, use_mmap=True):
+
+        super(CsvReaderBackend, self).__init__(workbook_path, file_contents, on_demand, use_mmap)
+        if file_contents is None:
+            with open(workbook_path, 'rb') as workbook_file:
+                file_contents = workbook_file.read()
+
+        csv_text = bytes(file_contents).decode('utf-8-sig')
+        try:
+            csv_dialect = csv.Sniffer().sniff(csv_text.split('\n', 1)[0], delimiters=',;\t')
+        except csv.Error:
+            csv_dialect = csv.excel
+
+        row_list = []
+        text_list_by_row = dict()
+        for text_list in csv.reader(io.StringIO(csv_text, newline=''), csv_dialect):
+            cell_list = [get_csv_cell(cell_text) for cell_text in text_list]
+            # Source text is kept for the rows with converted cells, any of them may be the header row.
+            if any(cell.ctype in (CELL_NUMBER, CELL_BOOLEAN) for cell in cell_list):
+                text_list_by_row[len(row_list)] = text_list
+            row_list.append(cell_list)
+
+        sheet_name = os.path.splitext(os.path.basename(workbook_path))[0]
+        self.sheet_obj = MemorySheet(sheet_name, self, row_list, text_list_by_row)
+
+    def sheet_names(self):
+        return [self.sheet_obj.name]
+
+    def sheet_by_name(self, sheet_name):
+        if sheet_name != self.sheet_obj.name: raise KeyError(sheet_name)
+
+        return self.sheet_obj
+
+
+class XlsxStreamReaderBackend(ReaderBackend):
+    """
+    Reader backend of .xlsx workbook streamed by XlsxHeaderReader.
+    Header rows are read without reading the rest of the sheet, and each sheet is only read when it is requested.
+    Date cells are read as numbers, as the number formats in styles are not parsed.
+    """
+
+    name = READER_BACKEND_XLSX_STREAM
+    header_reader = None                    # XlsxHeaderReader object.
+    sheet_obj_by_name = None                # dict of MemorySheet object of the sheets read.
+
+    def __init__(self, workbook_path, file_contents=None, on_demand=False, use_mmap=True):
+
+        super(XlsxStreamReaderBackend, self).__init__(workbook_path, file_contents, on_demand, use_mmap)
+        # Without mmap, the workbook file is read into memory instead of being read by zipfile from the file.
+        if file_contents is None and not use_mmap:
+            with open(workbook_path, 'rb') as workbook_file:
+                file_contents = workbook_file.read()
+
+        self.header_reader = XlsxHeaderReader(workbook_path if file_contents is None else file_contents)
+        self.on_demand = True
+        self.sheet_obj_by_name = dict()
+
+    def sheet_names(self):
+        return self.header_reader.sheet_names()
+
+    def sheet_by_name(self, sheet_name):
+        if sheet_name not in self.sheet_obj_by_name.keys():
+            row_list = [cell_list for _, cell_list in self.iterate_rows(sheet_name)]
+            self.sheet_obj_by_name[sheet_name] = MemorySheet(sheet_name, self, row_list)
+
+        return self.sheet_obj_by_name[sheet_name]
+
+    def get_header_row(self, sheet_name, header_row_no):
+        return [(column_no, get_xlsx_stream_cell(cell_value))
+                for column_no, cell_value in self.header_reader.get_header_row(sheet_name, header_row_no)]
+
+    def iterate_rows(self, sheet_name, row_count=None):
+        for row_no, value_by_column_no in self.header_reader.iterate_rows(sheet_name, row_count):
+            cell_list = [EMPTY_CELL] * (max(value_by_column_no.keys()) + 1 if value_by_column_no else 0)
+            for column_no, cell_value in value_by_column_no.items():
+                cell_list[column_no] = get_xlsx_stream_cell(cell_value)
+            yield row_no, cell_list
+
+    def iterate_header_rows(self, sheet_name, row_count):
+        return self.iterate_rows(sheet_name, row_count)
+
+    def unload_sheet(self, sheet_name):
+        self.sheet_obj_by_name.pop(sheet_name, None)
+
+    def close(self):
+        self.header_reader.close()
+
+
+# Reader backend classes by name, extended by register_reader_backend().
+reader_backend_class_by_name = {
+    READER_BACKEND_XLRD: XlrdReaderBackend,
+    READER_BACKEND_CSV: CsvReaderBackend,
+    READER_BACKEND_XLSX_STREAM: XlsxStreamReaderBackend,
+}
+
+# Reader backend used for each file extension by get_reader_backend_name_by_format().
+reader_backend_name_by_extension = {
+    '.xls': READER_BACKEND_XLRD,
+    '.xlsx': READER_BACKEND_XLSX_STREAM,
+    '.xlsm': READER_BACKEND_XLSX_STREAM,
+    '.csv': READER_BACKEND_CSV,
+    '.tsv': READER_BACKEND_CSV,
+}
+
+
+def register_reader_backend(backend_name, backend_class, extension_list=()):
+    """
+    Register a reader backend, e.g. a faster reader or a reader of another format.
+
+    :param backend_name: name of the backend, passed to WorkbookWithHeader.set_reader_backend().
+    :param backend_class: subclass of ReaderBackend.
+    :param extension_list: list of file extension, e.g. ['.ods'], routed to this backend by format.
+    :return: None.
+    """
+
+    reader_backend_class_by_name[backend_name] = backend_class
+    for extension in extension_list:
+        reader_backend_name_by_extension[extension.lower()] = backend_name
+
+
+def get_reader_backend_class(backend_name):
+    """
+    Return the reader backend class by name.
+
+    :param backend_name: name of the backend.
+    :return: subclass of ReaderBackend. Will raise KeyError if the backend is not registered.
+    """
+
+    return reader_backend_class_by_name[backend_name]
+
+
+def get_reader_backend_name_by_format(workbook_path, file_contents=None):
+    """
+    Return the reader backend for the format of the workbook.
+    The format is detected by the file extension, or by the zip signature for workbook contents.
+
+    :param workbook_path: Path of workbook located.
+    :param file_contents: the workbook contents, if the workbook is not read from workbook_path.
+    :return: name of the reader backend, READER_BACKEND_XLRD if the format is not known.
+    """
+
+    if file_contents is not None:
+        return READER_BACKEND_XLSX_STREAM if bytes(file_contents[:4]) == b'PK\x03\x04' else READER_BACKEND_XLRD
+
+    extension = os.path.splitext(workbook_path)[1].lower()
+
+    return reader_backend_name_by_extension.get(extension, READER_BACKEND_XLRD)
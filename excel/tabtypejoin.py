@@ -0,0 +1,247 @@
+# encoding: utf-8
+
+from collections import namedtuple
+
+
+# Types of join between two tab types.
+JOIN_INNER = 'inner'                        # Only the rows matched on both sides.
+JOIN_LEFT = 'left'                          # Also the unmatched rows of left side, with None for the right side.
+
+# Record joined from one row of each side, left_* and right_* are None for the missing side of unmatched left row.
+JoinedRecord = namedtuple('JoinedRecord', ['key', 'left_tab_name', 'left_row_no', 'left_record',
+                                           'right_tab_name', 'right_row_no', 'right_record'])
+
+
+def get_data_row_count(workbook_obj, tab_type):
+    """
+    Return the number of data rows below the header row of every tab of the tab type, empty rows included.
+
+    :param workbook_obj: loaded WorkbookWithHeader object.
+    :param tab_type: Name of the tab type in registered tab type list.
+    :return: number of data rows.
+    """
+
+    row_count = 0
+    for tab_name in workbook_obj.get_tab_list_by_type(tab_type):
+        worksheet_obj = workbook_obj.get_worksheet_by_name(tab_name)
+        if worksheet_obj.worksheet_object is not None:
+            row_count += max(0, worksheet_obj.worksheet_object.nrows - worksheet_obj.header_row_no - 1)
+
+    return row_count
+
+
+def is_empty_row(sheet_obj, row_no):
+    return all(value == '' for value in sheet_obj.row_values(row_no))
+
+
+class TabTypeJoinIndex(object):
+    """
+    Hash index of the key column over every tab of one tab type, merged from the hash index of each worksheet.
+    Rows with empty key, or in a tab without the key column, are not indexed and kept as unkeyed rows. Empty rows
+    are ignored.
+    """
+
+    tab_type = None                         # Tab type indexed.
+    key_keyword = None                      # Keyword of the key column in header.
+    row_list_by_key = None                  # dict of [ (<tab name>, <row number>), ......] of each key value.
+    unkeyed_row_list = None                 # list of (<tab name>, <row number>) of not empty rows without key.
+    source_list = None                      # list of (<tab name>, <sheet object>) indexed, to validate the reuse.
+
+    def __init__(self, workbook_obj, tab_type, key_keyword):
+        """
+        Build the index.
+
+        :param workbook_obj: loaded WorkbookWithHeader object.
+        :param tab_type: Name of the tab type in registered tab type list.
+        :param key_keyword: keyword of the key column in header.
+        """
+
+        self.tab_type = tab_type
+        self.key_keyword = key_keyword
+        self.row_list_by_key = dict()
+        self.unkeyed_row_list = []
+        self.source_list = []
+
+        for tab_name in workbook_obj.get_tab_list_by_type(tab_type):
+            worksheet_obj = workbook_obj.get_worksheet_by_name(tab_name)
+            sheet_obj = worksheet_obj.worksheet_object
+            self.source_list.append((tab_name, sheet_obj))
+            if sheet_obj is None: continue
+
+            if key_keyword in worksheet_obj.column_no_by_keyword.keys():
+                for key, row_no_list in worksheet_obj.get_hash_index(key_keyword).items():
+                    if key == '':
+                        self.unkeyed_row_list.extend((tab_name, row_no) for row_no in row_no_list
+                                                     if not is_empty_row(sheet_obj, row_no))
+                    else:
+                        self.row_list_by_key.setdefault(key, []).extend((tab_name, row_no) for row_no in row_no_list)
+            else:
+                self.unkeyed_row_list.extend((tab_name, row_no)
+                                             for row_no in range(worksheet_obj.header_row_no + 1, sheet_obj.nrows)
+                                             if not is_empty_row(sheet_obj, row_no))
+
+        self.sort_tab_rows(self.unkeyed_row_list)
+
+    def sort_tab_rows(self, tab_row_list):
+        """
+        Sort the rows in the order of the workbook, by tab order then row number.
+
+        :param tab_row_list: list of tuple starting with (<tab name>, <row number>) of the indexed tabs.
+        :return: None. The list is sorted in place.
+        """
+
+        tab_order_by_name = dict((tab_name, tab_order) for tab_order, (tab_name, _) in enumerate(self.source_list))
+        tab_row_list.sort(key=lambda tab_row: (tab_order_by_name[tab_row[0]], tab_row[1]))
+
+    def is_valid(self, workbook_obj):
+        """
+        Return whether the index is still valid for the workbook: same tabs of the tab type, with the same sheet
+        data loaded. Worksheets are not loaded by the check.
+
+        :param workbook_obj: WorkbookWithHeader object.
+        :return: True if the index can be reused.
+        """
+
+        tab_name_list = workbook_obj.get_tab_list_by_type(self.tab_type)
+        if tab_name_list != [tab_name for tab_name, _ in self.source_list]: return False
+
+        for tab_name, sheet_obj in self.source_list:
+            worksheet_obj = workbook_obj.worksheet_list_by_name.get(tab_name)
+            if worksheet_obj is None or worksheet_obj.worksheet_object is not sheet_obj: return False
+
+        return True
+
+    def get_duplicate_key_count(self):
+        """
+        Return the keys indexed for more than one row.
+
+        :return: dict of the number of rows of each duplicate key.
+        """
+
+        return dict((key, len(row_list)) for key, row_list in self.row_list_by_key.items() if len(row_list) > 1)
+
+
+class TabTypeJoinReport(object):
+    """
+    Report of a join, filled while the joined records are streamed and complete when the stream is exhausted.
+    """
+
+    build_tab_type = None                   # Tab type the hash index was built on, the smaller side.
+    probe_tab_type = None                   # Tab type streamed and looked up in the index.
+    joined_count = None                     # Number of records joined from a row of each side.
+    unmatched_row_list_by_tab_type = None   # dict of [ (<tab name>, <row number>, <key>), ......] of each side.
+    duplicate_key_count_by_tab_type = None  # dict of { <key>: <number of rows>, ......} of each side.
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.build_tab_type = None
+        self.probe_tab_type = None
+        self.joined_count = 0
+        self.unmatched_row_list_by_tab_type = dict()
+        self.duplicate_key_count_by_tab_type = dict()
+
+
+def iterate_joined_records(workbook_obj, left_tab_type, right_tab_type, left_key_keyword, right_key_keyword=None,
+                           join_type=JOIN_INNER, left_keyword_list=None, right_keyword_list=None, join_report=None):
+    """
+    Hash join the data rows of two tab types on the key column, see WorkbookWithHeader.join_tab_types().
+
+    :param workbook_obj: loaded WorkbookWithHeader object.
+    :param left_tab_type: Name of the tab type of left side.
+    :param right_tab_type: Name of the tab type of right side.
+    :param left_key_keyword: keyword of the key column in header of left side.
+    :param right_key_keyword: keyword of the key column in header of right side, same as left side by default.
+    :param join_type: JOIN_INNER or JOIN_LEFT.
+    :param left_keyword_list: list of keyword in header of left side to be projected. All keywords by default.
+    :param right_keyword_list: list of keyword in header of right side to be projected. All keywords by default.
+    :param join_report: TabTypeJoinReport object to be filled, or None.
+    :return: generator of JoinedRecord.
+             Will raise ValueError if the join type is unknown.
+    """
+
+    if join_type not in [JOIN_INNER, JOIN_LEFT]: raise ValueError('Unknown join type %s' % join_type)
+
+    if right_key_keyword is None: right_key_keyword = left_key_keyword
+    if join_report is None: join_report = TabTypeJoinReport()
+    join_report.reset()
+
+    # Index the smaller side, the right side on a tie as it is usually the side looked up.
+    is_left_built = get_data_row_count(workbook_obj, left_tab_type) < get_data_row_count(workbook_obj, right_tab_type)
+    if is_left_built:
+        build_tab_type, build_key_keyword, build_keyword_list = left_tab_type, left_key_keyword, left_keyword_list
+        probe_tab_type, probe_key_keyword, probe_keyword_list = right_tab_type, right_key_keyword, right_keyword_list
+    else:
+        build_tab_type, build_key_keyword, build_keyword_list = right_tab_type, right_key_keyword, right_keyword_list
+        probe_tab_type, probe_key_keyword, probe_keyword_list = left_tab_type, left_key_keyword, left_keyword_list
+
+    join_index = workbook_obj.get_join_index(build_tab_type, build_key_keyword)
+    join_report.build_tab_type = build_tab_type
+    join_report.probe_tab_type = probe_tab_type
+    build_unmatched_row_list = join_report.unmatched_row_list_by_tab_type.setdefault(build_tab_type, [])
+    probe_unmatched_row_list = join_report.unmatched_row_list_by_tab_type.setdefault(probe_tab_type, [])
+    join_report.duplicate_key_count_by_tab_type[build_tab_type] = join_index.get_duplicate_key_count()
+
+    def make_joined_record(key, probe_tab_row_record, build_tab_row_record):
+        left_tab_row_record, right_tab_row_record = (build_tab_row_record, probe_tab_row_record) if is_left_built else \
+            (probe_tab_row_record, build_tab_row_record)
+        return JoinedRecord(key, *(left_tab_row_record + right_tab_row_record))
+
+    # Rows of the index side are read once, however many rows of the streamed side they are joined to.
+    build_record_by_tab_row = dict()
+
+    def get_build_record(tab_name, row_no):
+        if (tab_name, row_no) not in build_record_by_tab_row.keys():
+            worksheet_obj = workbook_obj.get_worksheet_by_name(tab_name)
+            keyword_list = worksheet_obj.keywords_in_header if build_keyword_list is None else build_keyword_list
+            build_record_by_tab_row[(tab_name, row_no)] = worksheet_obj.get_record(
+                row_no, [keyword for keyword in keyword_list if keyword in worksheet_obj.column_no_by_keyword.keys()])
+        return build_record_by_tab_row[(tab_name, row_no)]
+
+    is_probe_kept = join_type == JOIN_LEFT and not is_left_built
+    is_build_kept = join_type == JOIN_LEFT and is_left_built
+    probe_key_count = dict()
+    for tab_name in workbook_obj.get_tab_list_by_type(probe_tab_type):
+        worksheet_obj = workbook_obj.get_worksheet_by_name(tab_name)
+        sheet_obj = worksheet_obj.worksheet_object
+        if sheet_obj is None: continue
+
+        keyword_list = worksheet_obj.keywords_in_header if probe_keyword_list is None else probe_keyword_list
+        keyword_list = [keyword for keyword in keyword_list if keyword in worksheet_obj.column_no_by_keyword.keys()]
+        key_column_no = worksheet_obj.column_no_by_keyword.get(probe_key_keyword)
+
+        for row_no in range(worksheet_obj.header_row_no + 1, sheet_obj.nrows):
+            key = sheet_obj.cell_value(row_no, key_column_no) \
+                if key_column_no is not None and key_column_no < sheet_obj.row_len(row_no) else ''
+            if key == '' and is_empty_row(sheet_obj, row_no): continue
+
+            build_tab_row_list = join_index.row_list_by_key.get(key, []) if key != '' else []
+            if key != '': probe_key_count[key] = probe_key_count.get(key, 0) + 1
+
+            if not build_tab_row_list:
+                probe_unmatched_row_list.append((tab_name, row_no, key))
+                if is_probe_kept:
+                    yield make_joined_record(key, (tab_name, row_no, worksheet_obj.get_record(row_no, keyword_list)),
+                                             (None, None, None))
+                continue
+
+            probe_record = worksheet_obj.get_record(row_no, keyword_list)
+            for build_tab_name, build_row_no in build_tab_row_list:
+                join_report.joined_count += 1
+                yield make_joined_record(key, (tab_name, row_no, probe_record),
+                                         (build_tab_name, build_row_no, get_build_record(build_tab_name, build_row_no)))
+
+    join_report.duplicate_key_count_by_tab_type[probe_tab_type] = dict(
+        (key, key_count) for key, key_count in probe_key_count.items() if key_count > 1)
+
+    # Rows of the index side not joined, in the order of the workbook.
+    unmatched_tab_row_list = [(tab_name, row_no, key) for key, tab_row_list in join_index.row_list_by_key.items()
+                              if key not in probe_key_count.keys() for tab_name, row_no in tab_row_list]
+    unmatched_tab_row_list.extend((tab_name, row_no, '') for tab_name, row_no in join_index.unkeyed_row_list)
+    join_index.sort_tab_rows(unmatched_tab_row_list)
+    build_unmatched_row_list.extend(unmatched_tab_row_list)
+
+    if is_build_kept:
+        for tab_name, row_no, key in unmatched_tab_row_list:
+            yield make_joined_record(key, (None, None, None), (tab_name, row_no, get_build_record(tab_name, row_no)))
@@ -0,0 +1,166 @@
+# encoding: utf-8
+
+import re
+from collections import namedtuple
+
+
+# Types of the classification rule of RegisteredTabType.
+RULE_ANY_OF = 'any_of'                      # Tab type matches if any token matches a keyword in header.
+RULE_ALL_OF = 'all_of'                      # Tab type matches if every token matches a keyword in header.
+RULE_NONE_OF = 'none_of'                    # Tab type does not match if any token matches a keyword in header.
+
+# Classification rule of a tab type. Tokens are the keywords and the regular expressions of the rule, a regular
+# expression token matches a keyword if it matches the whole keyword.
+TabTypeRule = namedtuple('TabTypeRule', ['tab_type', 'rule_type', 'keywords', 'patterns', 'ignore_case'])
+
+# Numbered backreference \1 ... \99 or conditional group (?(1)...) in a pattern, not preceded by an escaped backslash.
+GROUP_REFERENCE_PATTERN = re.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\()')
+
+
+def get_pattern_fragment(group_name, pattern, ignore_case):
+    """
+    Return the fragment of a pattern in the combined regular expression of TabTypeRuleMatcher.
+    Each pattern is an optional lookahead, so one match reports every pattern matching the keyword.
+
+    :param group_name: name of the group reporting the pattern matched.
+    :param pattern: regular expression token of a rule.
+    :param ignore_case: True if the rule matches case insensitively.
+    :return: text of the regular expression fragment.
+    """
+
+    return '(?=(?P<%s>(?%s:%s)\\Z))?' % (group_name, 'i' if ignore_case else '', pattern)
+
+
+def validate_pattern(pattern, ignore_case=False):
+    """
+    Check that the pattern can be compiled into the combined regular expression of TabTypeRuleMatcher, where group
+    names are shared, groups are numbered across all patterns and each pattern is wrapped in a group.
+
+    :param pattern: regular expression token of a rule.
+    :param ignore_case: True if the rule matches case insensitively.
+    :return: None.
+             Will raise re.error if the pattern is not a valid regular expression, and ValueError if it has named
+             groups, refers to a group or can not be wrapped in a group, e.g. with global inline flags like (?i).
+    """
+
+    if re.compile(pattern).groupindex or GROUP_REFERENCE_PATTERN.search(pattern):
+        raise ValueError('Pattern %s of tab type rule can not have named groups or group references.' % pattern)
+
+    try:
+        re.compile(get_pattern_fragment('rule', pattern, ignore_case))
+    except re.error as pattern_error:
+        raise ValueError('Pattern %s of tab type rule can not be combined with other patterns: %s. Use ignore_case '
+                         'or scoped inline flags like (?i:...) instead of global flags.' % (pattern, pattern_error))
+
+
+def normalize_keyword(keyword):
+    """
+    Return the normalized keyword of case insensitive rule, white spaces are collapsed and case is folded.
+
+    :param keyword: keyword in header row.
+    :return: normalized keyword, or None if the keyword is not text.
+    """
+
+    if not isinstance(keyword, str): return None
+
+    return ' '.join(keyword.split()).casefold()
+
+
+class TabTypeRuleMatcher(object):
+    """
+    Classification rules of RegisteredTabType compiled into one matcher.
+
+    Exact keyword tokens are looked up in one hash table, case insensitive tokens in one hash table of normalized
+    keywords, and all regular expression tokens are tested by one combined regular expression. So each keyword in
+    header is looked up once, however many rules are registered. Each token is compiled to a hit, the pair of
+    (<rule index>, <token index>), and a rule is evaluated by the number of its tokens hit.
+    """
+
+    rule_list = None                        # list of TabTypeRule compiled, indexed by rule index.
+    hit_list_by_keyword = None              # dict of hits of the exact keyword tokens.
+    hit_list_by_normalized_keyword = None   # dict of hits of the case insensitive keyword tokens.
+    hit_by_group_name = None                # dict of hit of each regular expression token by group name.
+    combined_pattern = None                 # Compiled regular expression of all pattern tokens, None if no pattern.
+
+    def __init__(self, rule_list):
+        """
+        Compile the rules.
+
+        :param rule_list: list of TabTypeRule.
+                          Will raise re.error if a pattern is not a valid regular expression.
+        """
+
+        self.rule_list = list(rule_list)
+        self.hit_list_by_keyword = dict()
+        self.hit_list_by_normalized_keyword = dict()
+        self.hit_by_group_name = dict()
+
+        pattern_text_list = []
+        for rule_index, rule in enumerate(self.rule_list):
+            for token_index, keyword in enumerate(rule.keywords):
+                if rule.ignore_case:
+                    self.hit_list_by_normalized_keyword.setdefault(normalize_keyword(keyword), []).append((rule_index, token_index))
+                else:
+                    self.hit_list_by_keyword.setdefault(keyword, []).append((rule_index, token_index))
+
+            for pattern_index, pattern in enumerate(rule.patterns):
+                group_name = 'rule%d_%d' % (rule_index, pattern_index)
+                self.hit_by_group_name[group_name] = (rule_index, len(rule.keywords) + pattern_index)
+                pattern_text_list.append(get_pattern_fragment(group_name, pattern, rule.ignore_case))
+
+        if pattern_text_list: self.combined_pattern = re.compile(''.join(pattern_text_list))
+
+    def iterate_hits(self, keyword):
+        """
+        Yield the hits of the keyword.
+
+        :param keyword: keyword in header row.
+        :return: generator of (<rule index>, <token index>).
+        """
+
+        try:
+            yield from self.hit_list_by_keyword.get(keyword, [])
+        except TypeError:
+            return
+
+        if self.hit_list_by_normalized_keyword and isinstance(keyword, str):
+            yield from self.hit_list_by_normalized_keyword.get(normalize_keyword(keyword), [])
+
+        if self.combined_pattern is not None and isinstance(keyword, str):
+            for group_name, group_value in self.combined_pattern.match(keyword).groupdict().items():
+                if group_value is not None: yield self.hit_by_group_name[group_name]
+
+    def is_matched_keyword(self, keyword):
+        """
+        Return whether the keyword matches any token of the any_of and all_of rules. Tokens of none_of rules only
+        exclude tab types, they do not make the keyword a header keyword.
+
+        :param keyword: keyword in header row.
+        :return: True if the keyword matches a token.
+        """
+
+        return any(self.rule_list[rule_index].rule_type != RULE_NONE_OF for rule_index, _ in self.iterate_hits(keyword))
+
+    def match(self, keyword_set):
+        """
+        Match the keywords in header with the rules in one pass.
+
+        :param keyword_set: set of keywords in header.
+        :return: tuple of (set of tab type matched by any_of or all_of rule, set of tab type matched by none_of rule)
+        """
+
+        token_index_set_by_rule_index = dict()
+        for keyword in keyword_set:
+            for rule_index, token_index in self.iterate_hits(keyword):
+                token_index_set_by_rule_index.setdefault(rule_index, set()).add(token_index)
+
+        matched_tab_type_set = set()
+        excluded_tab_type_set = set()
+        for rule_index, token_index_set in token_index_set_by_rule_index.items():
+            rule = self.rule_list[rule_index]
+            if rule.rule_type == RULE_NONE_OF:
+                excluded_tab_type_set.add(rule.tab_type)
+            elif rule.rule_type == RULE_ANY_OF or len(token_index_set) == len(rule.keywords) + len(rule.patterns):
+                matched_tab_type_set.add(rule.tab_type)
+
+        return matched_tab_type_set, excluded_tab_type_set
@@ -0,0 +1,54 @@
+# encoding: utf-8
+
+import unittest
+import sys
+sys.path.append('..')
+
+from batchloader import *
+
+
+class BatchLoaderTest(unittest.TestCase):
+
+    workbook_path = os.path.abspath(os.path.join(os.path.dirname(os.getcwd()), 'samp', 'Sample_Spread_with_Header.xlsx'))
+
+    def setUp(self):
+        print('Setup for BatchLoaderTest')
+
+    def tearDown(self):
+        print('Teardown for BatchLoaderTest')
+
+    def load_workbook_summaries_test(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+        # A listening workbook should not stop the registry being passed to worker process.
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+
+        for max_workers in [1, 2]:
+            summary_list = load_workbook_summaries([self.workbook_path, 'TestPath', self.workbook_path],
+                                                   registered_tab_type_obj, max_workers=max_workers, include_rows=True)
+
+            self.assertEqual(3, len(summary_list))
+            self.assertIsInstance(summary_list[0], WorkbookSummary)
+            self.assertIsInstance(summary_list[1], WorkbookNotValid)
+            self.assertEqual('TestPath', summary_list[1].expression)
+            self.assertEqual(summary_list[0], summary_list[2])
+
+            self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], summary_list[0].tab_list)
+            self.assertEqual(['KeysInHeader', 'KeysInRows'], summary_list[0].tab_list_by_type['TestCases'])
+            self.assertEqual(['ConfigName', 'Section', 'Key', 'Values'], summary_list[0].keyword_list_by_tab['Configs'])
+            self.assertEqual('Test Config', summary_list[0].row_list_by_tab['Configs'][0]['ConfigName'])
+
+
+def batch_loader_tests():
+    suite = unittest.TestSuite()
+    suite.addTest(BatchLoaderTest('load_workbook_summaries_test'))
+    return suite
+
+
+if __name__ == '__main__':
+        runner = unittest.TextTestRunner()
+
+        runner.run(batch_loader_tests())
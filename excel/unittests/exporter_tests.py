@@ -0,0 +1,130 @@
+# encoding: utf-8
+
+import json
+import unittest
+import shutil
+import tempfile
+import sys
+sys.path.append('..')
+
+from batchloader import *
+from exporter import *
+
+
+class TabTypeExporterTest(unittest.TestCase):
+
+    workbook_path = os.path.abspath(os.path.join(os.path.dirname(os.getcwd()), 'samp', 'Sample_Spread_with_Header.xlsx'))
+
+    def setUp(self):
+        print('Setup for TabTypeExporterTest')
+        self.output_dir = tempfile.mkdtemp()
+        self.registered_tab_type_obj = RegisteredTabType()
+        self.registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        self.registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+    def tearDown(self):
+        print('Teardown for TabTypeExporterTest')
+        shutil.rmtree(self.output_dir)
+
+    @staticmethod
+    def read_json_lines(output_path):
+        with open(output_path, encoding='utf-8') as output_file:
+            return [json.loads(line) for line in output_file]
+
+    def export_tab_type_test(self):
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(self.registered_tab_type_obj)
+        workbook_obj.load_workbook(self.workbook_path)
+
+        output_path = os.path.join(self.output_dir, 'TestCases.jsonl')
+        row_count = workbook_obj.export_tab_type('TestCases', output_path, chunk_row_count=4,
+                                                 keyword_list=['TestID', 'ReturnCode'], add_tab_type=True)
+        record_list = self.read_json_lines(output_path)
+        self.assertEqual(row_count, len(record_list))
+        self.assertEqual(sum(len(list(workbook_obj.get_worksheet_by_name(tab_name).iterate_typed_rows(['TestID', 'ReturnCode'])))
+                             for tab_name in workbook_obj.get_tab_list_by_type('TestCases')), row_count)
+        self.assertEqual({EXPORT_TAB_NAME_COLUMN: 'KeysInHeader', EXPORT_TAB_TYPE_COLUMN: 'TestCases',
+                          'TestID': 'Case#1', 'ReturnCode': 200}, record_list[0])
+        self.assertEqual('KeysInRows', record_list[-1][EXPORT_TAB_NAME_COLUMN])
+
+        self.assertRaises(ValueError, TabTypeExporter, output_path, 'xml', 'TestCases')
+        if pyarrow is None:
+            self.assertRaises(ImportError, workbook_obj.export_tab_type, 'Configs',
+                              os.path.join(self.output_dir, 'Configs.parquet'), EXPORT_FORMAT_PARQUET)
+        else:
+            for export_format in [EXPORT_FORMAT_PARQUET, EXPORT_FORMAT_ARROW]:
+                output_path = os.path.join(self.output_dir, 'Configs.%s' % export_format)
+                self.assertEqual(2, workbook_obj.export_tab_type('Configs', output_path, export_format, chunk_row_count=1))
+                if export_format == EXPORT_FORMAT_PARQUET:
+                    table = pyarrow.parquet.read_table(output_path)
+                else:
+                    table = pyarrow.ipc.open_file(output_path).read_all()
+                self.assertEqual([EXPORT_TAB_NAME_COLUMN, 'ConfigName', 'Section', 'Key', 'Values'], table.column_names)
+                self.assertEqual('Test Config', table.column('ConfigName')[0].as_py())
+
+    def export_lazy_workbook_test(self):
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(self.registered_tab_type_obj)
+        workbook_obj.set_reader_backend(READER_BACKEND_AUTO)
+        workbook_obj.set_lazy_load(True)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual({}, workbook_obj.worksheet_list_by_name)
+
+        # Exported tabs are unloaded after they are written, other tabs are never loaded.
+        with TabTypeExporter(os.path.join(self.output_dir, 'TestCases.jsonl'), EXPORT_FORMAT_JSON_LINES,
+                             'TestCases') as tab_type_exporter:
+            self.assertLess(0, tab_type_exporter.write_workbook(workbook_obj))
+        self.assertEqual({}, workbook_obj.worksheet_list_by_name)
+        self.assertEqual({}, workbook_obj.workbook_obj.sheet_obj_by_name)
+
+        # Tabs loaded before the export are kept.
+        workbook_obj.get_worksheet_by_name('KeysInRows')
+        with TabTypeExporter(os.path.join(self.output_dir, 'TestCases.jsonl'), EXPORT_FORMAT_JSON_LINES,
+                             'TestCases') as tab_type_exporter:
+            tab_type_exporter.write_workbook(workbook_obj)
+        self.assertEqual(['KeysInRows'], list(workbook_obj.worksheet_list_by_name.keys()))
+        self.assertEqual(['KeysInRows'], list(workbook_obj.workbook_obj.sheet_obj_by_name.keys()))
+
+    def export_workbooks_test(self):
+
+        workbook_dir = os.path.join(self.output_dir, 'workbooks')
+        os.mkdir(workbook_dir)
+        shutil.copy(self.workbook_path, os.path.join(workbook_dir, 'Plan1.xlsx'))
+        with open(os.path.join(workbook_dir, 'Plan2.csv'), 'w', encoding='utf-8') as csv_file:
+            csv_file.write('ConfigName,Section,Key\nCSV Config,general,port\n')
+        with open(os.path.join(workbook_dir, 'Plan3.xlsx'), 'wb') as broken_file:
+            broken_file.write(b'Not a workbook')
+        with open(os.path.join(workbook_dir, 'README.md'), 'w') as readme_file:
+            readme_file.write('Not exported')
+
+        output_path = os.path.join(self.output_dir, 'Configs.jsonl')
+        result_list = export_workbooks(workbook_dir, self.registered_tab_type_obj, 'Configs', output_path,
+                                       chunk_row_count=1)
+        self.assertEqual(3, len(result_list))
+        self.assertEqual([2, 1], result_list[:2])
+        self.assertIsInstance(result_list[2], WorkbookNotValid)
+
+        record_list = self.read_json_lines(output_path)
+        self.assertEqual(3, len(record_list))
+        self.assertEqual(os.path.join(workbook_dir, 'Plan1.xlsx'), record_list[0][EXPORT_WORKBOOK_PATH_COLUMN])
+        self.assertEqual('Test Config', record_list[0]['ConfigName'])
+        self.assertEqual({EXPORT_WORKBOOK_PATH_COLUMN: os.path.join(workbook_dir, 'Plan2.csv'),
+                          EXPORT_TAB_NAME_COLUMN: 'Plan2', 'ConfigName': 'CSV Config', 'Section': 'general',
+                          'Key': 'port'}, record_list[2])
+
+
+def tab_type_exporter_tests():
+    suite = unittest.TestSuite()
+    suite.addTest(TabTypeExporterTest('export_tab_type_test'))
+    suite.addTest(TabTypeExporterTest('export_lazy_workbook_test'))
+    suite.addTest(TabTypeExporterTest('export_workbooks_test'))
+    return suite
+
+
+if __name__ == '__main__':
+        runner = unittest.TextTestRunner()
+
+        runner.run(tab_type_exporter_tests())
@@ -0,0 +1,144 @@
+# encoding: utf-8
+
+import json
+import unittest
+import shutil
+import tempfile
+from unittest import mock
+import sys
+sys.path.append('..')
+
+from workbookwithheader import *
+from headercache import *
+
+
+class WorkbookHeaderCacheTest(unittest.TestCase):
+
+    workbook_path = os.path.abspath(os.path.join(os.path.dirname(os.getcwd()), 'samp', 'Sample_Spread_with_Header.xlsx'))
+
+    def setUp(self):
+        print('Setup for WorkbookHeaderCacheTest')
+        self.cache_dir = tempfile.mkdtemp()
+        self.header_cache = WorkbookHeaderCache(os.path.join(self.cache_dir, 'header_cache.db'), max_entries=2)
+
+    def tearDown(self):
+        print('Teardown for WorkbookHeaderCacheTest')
+        self.header_cache.close()
+        shutil.rmtree(self.cache_dir)
+
+    def load_workbook_from_cache_test(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_header_cache(self.header_cache)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertIsNotNone(workbook_obj.workbook_obj)
+        self.assertEqual(1, self.header_cache.get_entry_count())
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_header_cache(self.header_cache)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertIsNone(workbook_obj.workbook_obj)
+        self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], workbook_obj.get_tab_list())
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual(['ConfigName', 'Section', 'Key', 'Values'], workbook_obj.get_keyword_list_by_name('Configs'))
+        self.assertIsNone(workbook_obj.workbook_obj)
+
+        # Worksheet is loaded from the file on request.
+        self.assertEqual('Configs', workbook_obj.get_worksheet_by_name('Configs').get_worksheet_name())
+        self.assertIsNotNone(workbook_obj.workbook_obj)
+
+    def cache_eviction_and_invalidation_test(self):
+
+        fingerprint = WorkbookHeaderCache.get_fingerprint(self.workbook_path, READER_BACKEND_XLRD)
+        self.assertIsNone(self.header_cache.get(fingerprint, 0))
+
+        for header_row_no in range(3):
+            self.header_cache.put(fingerprint, header_row_no, {'Tab%s' % header_row_no: ['Keyword']})
+        self.assertEqual(2, self.header_cache.get_entry_count())
+        self.assertEqual({'Tab2': ['Keyword']}, self.header_cache.get(fingerprint, 2))
+
+        changed_fingerprint = fingerprint[:2] + (fingerprint[2] + 1, fingerprint[3])
+        self.assertIsNone(self.header_cache.get(changed_fingerprint, 2))
+
+        # Entries of another reader backend are not shared.
+        stream_fingerprint = WorkbookHeaderCache.get_fingerprint(self.workbook_path, READER_BACKEND_XLSX_STREAM)
+        self.assertIsNone(self.header_cache.get(stream_fingerprint, 2))
+
+        self.header_cache.invalidate(self.workbook_path)
+        self.assertEqual(0, self.header_cache.get_entry_count())
+
+    def cache_eviction_by_size_test(self):
+
+        fingerprint = WorkbookHeaderCache.get_fingerprint(self.workbook_path, READER_BACKEND_XLRD)
+        entry_size = len(json.dumps([('Tab', ['Keyword%04d' % keyword_no for keyword_no in range(100)])]))
+        header_cache = WorkbookHeaderCache(os.path.join(self.cache_dir, 'sized_header_cache.db'),
+                                           max_size=entry_size * 2)
+        try:
+            for header_row_no in range(3):
+                header_cache.put(fingerprint, header_row_no,
+                                 {'Tab': ['Keyword%04d' % keyword_no for keyword_no in range(100)]})
+            self.assertEqual(2, header_cache.get_entry_count())
+            self.assertEqual(entry_size * 2, header_cache.get_total_size())
+            self.assertIsNone(header_cache.get(fingerprint, 0))
+            self.assertIsNotNone(header_cache.get(fingerprint, 2))
+
+            # Keywords larger than the cache alone are not stored, and do not evict other entries.
+            header_cache.put(fingerprint, 3, {'Tab': ['Keyword%04d' % keyword_no for keyword_no in range(300)]})
+            self.assertIsNone(header_cache.get(fingerprint, 3))
+            self.assertEqual(2, header_cache.get_entry_count())
+        finally:
+            header_cache.close()
+
+    def content_hashed_on_mtime_change_test(self):
+
+        workbook_path = os.path.join(self.cache_dir, 'Sample_Spread_with_Header.xlsx')
+        shutil.copyfile(self.workbook_path, workbook_path)
+        fingerprint = WorkbookHeaderCache.get_fingerprint(workbook_path, READER_BACKEND_XLRD)
+        self.header_cache.put(fingerprint, 0, {'Tab': ['Keyword']})
+
+        hashed_path_list = []
+
+        def get_counted_content_hash(hashed_path):
+            hashed_path_list.append(hashed_path)
+            return get_file_content_hash(hashed_path)
+
+        with mock.patch('headercache.get_file_content_hash', get_counted_content_hash):
+            # Same size and mtime, the file is not read.
+            self.assertEqual({'Tab': ['Keyword']}, self.header_cache.get(fingerprint, 0))
+            self.assertEqual([], hashed_path_list)
+
+            # Touched with the same content, the entry is kept and its mtime updated.
+            os.utime(workbook_path, ns=(fingerprint[3] + 10 ** 9, fingerprint[3] + 10 ** 9))
+            touched_fingerprint = WorkbookHeaderCache.get_fingerprint(workbook_path, READER_BACKEND_XLRD)
+            self.assertEqual({'Tab': ['Keyword']}, self.header_cache.get(touched_fingerprint, 0))
+            self.assertEqual({'Tab': ['Keyword']}, self.header_cache.get(touched_fingerprint, 0))
+            self.assertEqual([workbook_path], hashed_path_list)
+
+            # Changed content of the same size.
+            with open(workbook_path, 'r+b') as workbook_file:
+                workbook_file.write(b'XX')
+            os.utime(workbook_path, ns=(fingerprint[3] + 2 * 10 ** 9, fingerprint[3] + 2 * 10 ** 9))
+            changed_fingerprint = WorkbookHeaderCache.get_fingerprint(workbook_path, READER_BACKEND_XLRD)
+            self.assertEqual(fingerprint[2], changed_fingerprint[2])
+            self.assertIsNone(self.header_cache.get(changed_fingerprint, 0))
+
+
+def workbook_header_cache_tests():
+    suite = unittest.TestSuite()
+    suite.addTest(WorkbookHeaderCacheTest('load_workbook_from_cache_test'))
+    suite.addTest(WorkbookHeaderCacheTest('cache_eviction_and_invalidation_test'))
+    suite.addTest(WorkbookHeaderCacheTest('cache_eviction_by_size_test'))
+    suite.addTest(WorkbookHeaderCacheTest('content_hashed_on_mtime_change_test'))
+    return suite
+
+
+if __name__ == '__main__':
+        runner = unittest.TextTestRunner()
+
+        runner.run(workbook_header_cache_tests())
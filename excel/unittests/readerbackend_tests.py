@@ -0,0 +1,240 @@
+# encoding: utf-8
+
+import unittest
+import shutil
+import tempfile
+import sys
+sys.path.append('..')
+
+from workbookwithheader import *
+from readerbackend import *
+
+
+class ReaderBackendTest(unittest.TestCase):
+
+    workbook_path = os.path.abspath(os.path.join(os.path.dirname(os.getcwd()), 'samp', 'Sample_Spread_with_Header.xlsx'))
+
+    def setUp(self):
+        print('Setup for ReaderBackendTest')
+        self.csv_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        print('Teardown for ReaderBackendTest')
+        shutil.rmtree(self.csv_dir)
+
+    @staticmethod
+    def get_trimmed_row_values(sheet_obj):
+        row_value_list = []
+        for row_no in range(sheet_obj.nrows):
+            value_list = sheet_obj.row_values(row_no)
+            while value_list and value_list[-1] == '': value_list.pop()
+            row_value_list.append(value_list)
+        while row_value_list and not row_value_list[-1]: row_value_list.pop()
+
+        return row_value_list
+
+    def xlsx_stream_backend_test(self):
+
+        xlrd_backend = XlrdReaderBackend(self.workbook_path)
+        stream_backend = XlsxStreamReaderBackend(self.workbook_path)
+        self.assertEqual(xlrd_backend.sheet_names(), stream_backend.sheet_names())
+
+        for sheet_name in xlrd_backend.sheet_names():
+            self.assertEqual([(column_no, cell.value) for column_no, cell in xlrd_backend.get_header_row(sheet_name, 0)],
+                             [(column_no, cell.value) for column_no, cell in stream_backend.get_header_row(sheet_name, 0)])
+            self.assertEqual(self.get_trimmed_row_values(xlrd_backend.sheet_by_name(sheet_name)),
+                             self.get_trimmed_row_values(stream_backend.sheet_by_name(sheet_name)))
+
+        self.assertEqual(SheetCell(CELL_NUMBER, 200.0), dict(stream_backend.get_header_row('KeysInHeader', 1))[8])
+        self.assertEqual([0, 1], [row_no for row_no, _ in stream_backend.iterate_rows('Configs', 2)])
+
+        # Sheets read on demand are released by unload_sheet().
+        self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], list(stream_backend.sheet_obj_by_name.keys()))
+        stream_backend.unload_sheet('Configs')
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], list(stream_backend.sheet_obj_by_name.keys()))
+        stream_backend.close()
+        xlrd_backend.close()
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+        xlrd_workbook_obj = WorkbookWithHeader()
+        xlrd_workbook_obj.load_workbook(self.workbook_path)
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_reader_backend(READER_BACKEND_XLSX_STREAM)
+        workbook_obj.set_lazy_load(True)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertIsInstance(workbook_obj.workbook_obj, XlsxStreamReaderBackend)
+        self.assertEqual({}, workbook_obj.workbook_obj.sheet_obj_by_name)
+        workbook_obj.build_tab_list_by_type()
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+        for tab_name in workbook_obj.get_tab_list():
+            self.assertEqual(xlrd_workbook_obj.get_keyword_list_by_name(tab_name),
+                             workbook_obj.get_keyword_list_by_name(tab_name))
+            self.assertEqual(list(xlrd_workbook_obj.get_worksheet_by_name(tab_name).iterate_rows()),
+                             list(workbook_obj.get_worksheet_by_name(tab_name).iterate_rows()))
+
+        workbook_obj.unload_worksheet('Configs')
+        self.assertNotIn('Configs', workbook_obj.workbook_obj.sheet_obj_by_name.keys())
+
+    def csv_backend_test(self):
+
+        csv_path = os.path.join(self.csv_dir, 'TestPlan.csv')
+        with open(csv_path, 'w', encoding='utf-8-sig', newline='') as csv_file:
+            csv_file.write('TestFileName;TestID;Passed;Parameters;Port\r\n')
+            csv_file.write('login.py;1;TRUE;;8080\r\n')
+            csv_file.write('"logout;v2.py";2;FALSE\r\n')
+
+        csv_backend = CsvReaderBackend(csv_path)
+        self.assertEqual(['TestPlan'], csv_backend.sheet_names())
+        self.assertEqual([(0, SheetCell(CELL_TEXT, 'TestFileName')), (1, SheetCell(CELL_TEXT, 'TestID'))],
+                         csv_backend.get_header_row('TestPlan', 0)[:2])
+        row_list = list(csv_backend.iterate_rows('TestPlan'))
+        self.assertEqual(3, len(row_list))
+        self.assertEqual([SheetCell(CELL_TEXT, 'logout;v2.py'), SheetCell(CELL_NUMBER, 2.0), SheetCell(CELL_BOOLEAN, False),
+                          EMPTY_CELL, EMPTY_CELL], row_list[2][1])
+        self.assertRaises(KeyError, csv_backend.sheet_by_name, 'Sheet1')
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_reader_backend(READER_BACKEND_AUTO)
+        workbook_obj.load_workbook(csv_path)
+        self.assertIsInstance(workbook_obj.workbook_obj, CsvReaderBackend)
+        self.assertEqual(['TestPlan'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        worksheet_obj = workbook_obj.get_worksheet_by_name('TestPlan')
+        self.assertEqual([{'TestFileName': 'login.py', 'TestID': 1.0}, {'TestFileName': 'logout;v2.py', 'TestID': 2.0}],
+                         list(worksheet_obj.iterate_rows(['TestFileName', 'TestID'])))
+        self.assertEqual({'Port': 8080.0}, worksheet_obj.get_parameters(1))
+
+    def csv_number_text_test(self):
+
+        csv_path = os.path.join(self.csv_dir, 'Budget.csv')
+        with open(csv_path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write('Title,Notes\n')
+            csv_file.write('AccountID,2019,2020,TRUE\n')
+            csv_file.write('00123,1.5,-007,0\n')
+            csv_file.write('456,0.25,+8,1e3\n')
+
+        self.assertEqual(SheetCell(CELL_TEXT, '00123'), get_csv_cell('00123'))
+        self.assertEqual(SheetCell(CELL_TEXT, '-007'), get_csv_cell('-007'))
+        self.assertEqual(SheetCell(CELL_NUMBER, 0.0), get_csv_cell('0'))
+        self.assertEqual(SheetCell(CELL_NUMBER, 0.25), get_csv_cell('0.25'))
+
+        csv_backend = CsvReaderBackend(csv_path)
+        self.assertEqual([(0, SheetCell(CELL_TEXT, 'AccountID')), (1, SheetCell(CELL_TEXT, '2019')),
+                          (2, SheetCell(CELL_TEXT, '2020')), (3, SheetCell(CELL_TEXT, 'TRUE'))],
+                         csv_backend.get_header_row('Budget', 1))
+        self.assertEqual([SheetCell(CELL_TEXT, 'Title'), SheetCell(CELL_TEXT, 'Notes'), EMPTY_CELL, EMPTY_CELL],
+                         get_sheet_header_row(csv_backend.sheet_by_name('Budget'), 0))
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('Budget', 'AccountID')
+        registered_tab_type_obj.registered_tab_type_identify('Budget', '2019')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_reader_backend(READER_BACKEND_AUTO)
+        workbook_obj.set_header_auto_detect(3)
+        workbook_obj.load_workbook(csv_path)
+        self.assertEqual(['Budget'], workbook_obj.get_tab_list_by_type('Budget'))
+
+        worksheet_obj = workbook_obj.get_worksheet_by_name('Budget')
+        self.assertEqual(1, worksheet_obj.header_row_no)
+        self.assertEqual(['AccountID', '2019', '2020', 'TRUE'], worksheet_obj.get_keyword_list())
+        self.assertEqual([{'AccountID': '00123', '2019': 1.5, '2020': '-007'},
+                          {'AccountID': 456.0, '2019': 0.25, '2020': 8.0}],
+                         list(worksheet_obj.iterate_rows(['AccountID', '2019', '2020'])))
+        self.assertEqual([2], sorted(worksheet_obj.find_row_no_set('AccountID', QUERY_EQUAL, '00123')))
+
+    def plugin_backend_sheet_test(self):
+
+        class PluginSheet(object):
+            # Sheet of a plugin backend, with the sheet protocol but not derived from MemorySheet.
+            def __init__(self, memory_sheet):
+                self.memory_sheet = memory_sheet
+
+            def __getattr__(self, name):
+                return getattr(self.memory_sheet, name)
+
+        class PluginReaderBackend(CsvReaderBackend):
+            name = 'plugin'
+
+            def sheet_by_name(self, sheet_name):
+                return PluginSheet(super(PluginReaderBackend, self).sheet_by_name(sheet_name))
+
+        csv_path = os.path.join(self.csv_dir, 'Configs.csv')
+        with open(csv_path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write('ConfigName,Key\nTest Config,port\n')
+
+        register_reader_backend('plugin', PluginReaderBackend)
+        try:
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_reader_backend('plugin')
+            workbook_obj.load_workbook(csv_path)
+            worksheet_obj = workbook_obj.get_worksheet_by_name('Configs')
+            self.assertIsInstance(worksheet_obj.worksheet_object, PluginSheet)
+            self.assertEqual(['ConfigName', 'Key'], worksheet_obj.get_keyword_list())
+            self.assertEqual([{'ConfigName': 'Test Config', 'Key': 'port'}], list(worksheet_obj.iterate_rows()))
+            self.assertEqual([(0, SheetCell(CELL_TEXT, 'ConfigName')), (1, SheetCell(CELL_TEXT, 'Key'))],
+                             workbook_obj.workbook_obj.get_header_row('Configs', 0))
+        finally:
+            del reader_backend_class_by_name['plugin']
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(object())
+        self.assertIsNone(worksheet_obj.worksheet_object)
+
+    def reader_backend_routing_test(self):
+
+        self.assertEqual(READER_BACKEND_XLSX_STREAM, get_reader_backend_name_by_format('Plan.XLSX'))
+        self.assertEqual(READER_BACKEND_CSV, get_reader_backend_name_by_format('Plan.tsv'))
+        self.assertEqual(READER_BACKEND_XLRD, get_reader_backend_name_by_format('Plan.xls'))
+        self.assertEqual(READER_BACKEND_XLSX_STREAM, get_reader_backend_name_by_format(WORKBOOK_CONTENTS_NAME, b'PK\x03\x04'))
+
+        class OdsReaderBackend(CsvReaderBackend):
+            name = 'ods'
+
+        register_reader_backend('ods', OdsReaderBackend, ['.ODS'])
+        try:
+            self.assertEqual('ods', get_reader_backend_name_by_format('Plan.ods'))
+            self.assertIs(OdsReaderBackend, get_reader_backend_class('ods'))
+
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_reader_backend('ods')
+            self.assertEqual('ods', workbook_obj.reader_backend)
+            workbook_obj.set_reader_backend('not registered')
+            self.assertEqual('ods', workbook_obj.reader_backend)
+        finally:
+            del reader_backend_class_by_name['ods']
+            del reader_backend_name_by_extension['.ods']
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_reader_backend(READER_BACKEND_AUTO)
+        with open(self.workbook_path, 'rb') as workbook_file:
+            workbook_obj.load_workbook(workbook_file.read())
+        self.assertIsInstance(workbook_obj.workbook_obj, XlsxStreamReaderBackend)
+        self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], workbook_obj.get_tab_list())
+
+
+def reader_backend_tests():
+    suite = unittest.TestSuite()
+    suite.addTest(ReaderBackendTest('xlsx_stream_backend_test'))
+    suite.addTest(ReaderBackendTest('csv_backend_test'))
+    suite.addTest(ReaderBackendTest('csv_number_text_test'))
+    suite.addTest(ReaderBackendTest('plugin_backend_sheet_test'))
+    suite.addTest(ReaderBackendTest('reader_backend_routing_test'))
+    return suite
+
+
+if __name__ == '__main__':
+        runner = unittest.TextTestRunner()
+
+        runner.run(reader_backend_tests())
@@ -0,0 +1,101 @@
+# encoding: utf-8
+
+import zipfile
+from xml.sax.saxutils import escape
+
+
+CONTENT_TYPES_XML = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                     '<Default Extension="xml" ContentType="application/xml"/>'
+                     '<Override PartName="/xl/workbook.xml" '
+                     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                     '%s</Types>')
+
+ROOT_RELS_XML = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                 '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                 '<Relationship Id="rId1" Target="xl/workbook.xml" '
+                 'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+                 '</Relationships>')
+
+WORKBOOK_XML = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                '<sheets>%s</sheets></workbook>')
+
+WORKBOOK_RELS_XML = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                     '%s</Relationships>')
+
+WORKSHEET_XML = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                 '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                 '<sheetData>%s</sheetData></worksheet>')
+
+
+def get_column_letter(column_no):
+    """
+    Return the column letter of the column number, e.g. 0 to A, 26 to AA.
+
+    :param column_no: column number start from 0.
+    :return: column letter.
+    """
+
+    column_letter = ''
+    column_no += 1
+    while column_no:
+        column_no, remainder = divmod(column_no - 1, 26)
+        column_letter = chr(65 + remainder) + column_letter
+
+    return column_letter
+
+
+def get_cell_xml(row_no, column_no, value):
+    """
+    Return the xml of one cell, text is stored as inline string.
+
+    :param row_no: row number start from 0.
+    :param column_no: column number start from 0.
+    :param value: str, int or float value of the cell, None or '' for empty cell.
+    :return: xml of the cell.
+    """
+
+    if value is None or value == '': return ''
+
+    cell_name = '%s%d' % (get_column_letter(column_no), row_no + 1)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return '<c r="%s"><v>%r</v></c>' % (cell_name, value)
+    else:
+        return '<c r="%s" t="inlineStr"><is><t>%s</t></is></c>' % (cell_name, escape(str(value)))
+
+
+def write_workbook(workbook_path, row_list_by_tab):
+    """
+    Write a minimal .xlsx workbook.
+
+    :param workbook_path: Path of workbook to be written.
+    :param row_list_by_tab: ordered dict of { <tab name>: [ [ <cell value>, ......], ......], ......}
+    :return: None.
+    """
+
+    sheet_xml_list = []
+    rels_xml_list = []
+    content_type_xml_list = []
+    with zipfile.ZipFile(workbook_path, 'w', zipfile.ZIP_DEFLATED) as workbook_file:
+        for sheet_no, (tab_name, row_list) in enumerate(row_list_by_tab.items(), 1):
+            sheet_xml_list.append('<sheet name="%s" sheetId="%d" r:id="rId%d"/>' % (escape(tab_name), sheet_no, sheet_no))
+            rels_xml_list.append('<Relationship Id="rId%d" Target="worksheets/sheet%d.xml" '
+                                 'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+                                 % (sheet_no, sheet_no))
+            content_type_xml_list.append('<Override PartName="/xl/worksheets/sheet%d.xml" ContentType="application/'
+                                         'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' % sheet_no)
+
+            row_xml_list = []
+            for row_no, value_list in enumerate(row_list):
+                cell_xml = ''.join(get_cell_xml(row_no, column_no, value) for column_no, value in enumerate(value_list))
+                if cell_xml: row_xml_list.append('<row r="%d">%s</row>' % (row_no + 1, cell_xml))
+            workbook_file.writestr('xl/worksheets/sheet%d.xml' % sheet_no, WORKSHEET_XML % ''.join(row_xml_list))
+
+        workbook_file.writestr('[Content_Types].xml', CONTENT_TYPES_XML % ''.join(content_type_xml_list))
+        workbook_file.writestr('_rels/.rels', ROOT_RELS_XML)
+        workbook_file.writestr('xl/workbook.xml', WORKBOOK_XML % ''.join(sheet_xml_list))
+        workbook_file.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS_XML % ''.join(rels_xml_list))
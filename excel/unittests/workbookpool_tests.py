@@ -0,0 +1,204 @@
+# encoding: utf-8
+
+import unittest
+import shutil
+import tempfile
+from unittest import mock
+import sys
+sys.path.append('..')
+
+from workbookpool import *
+
+
+class WorkbookPoolTest(unittest.TestCase):
+
+    workbook_path = os.path.abspath(os.path.join(os.path.dirname(os.getcwd()), 'samp', 'Sample_Spread_with_Header.xlsx'))
+
+    def setUp(self):
+        print('Setup for WorkbookPoolTest')
+        self.workbook_dir = tempfile.mkdtemp()
+        self.registered_tab_type_obj = RegisteredTabType()
+        self.registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        self.registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+    def tearDown(self):
+        print('Teardown for WorkbookPoolTest')
+        shutil.rmtree(self.workbook_dir)
+
+    def copy_workbook(self, file_name):
+        workbook_path = os.path.join(self.workbook_dir, file_name)
+        shutil.copy(self.workbook_path, workbook_path)
+        return workbook_path
+
+    def single_flight_acquire_test(self):
+
+        workbook_pool = WorkbookPool(self.registered_tab_type_obj)
+        start_barrier = threading.Barrier(8)
+        pooled_workbook_list = []
+        pooled_workbook_lock = threading.Lock()
+
+        def acquire_workbook():
+            start_barrier.wait()
+            pooled_workbook_obj = workbook_pool.acquire(self.workbook_path)
+            with pooled_workbook_lock:
+                pooled_workbook_list.append(pooled_workbook_obj)
+
+        thread_list = [threading.Thread(target=acquire_workbook) for _ in range(8)]
+        for thread in thread_list: thread.start()
+        for thread in thread_list: thread.join()
+
+        statistics = workbook_pool.get_statistics()
+        self.assertEqual(1, statistics['load_count'])
+        self.assertEqual(7, statistics['hit_count'])
+        self.assertEqual(1, statistics['in_use_count'])
+        self.assertEqual(1, len(set(id(pooled_workbook_obj.pooled_workbook_obj) for pooled_workbook_obj in pooled_workbook_list)))
+
+        pooled_workbook_obj = pooled_workbook_list[0]
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], pooled_workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual('Test Config', next(pooled_workbook_obj.get_worksheet_by_name('Configs').iterate_rows())['ConfigName'])
+        self.assertRaises(AttributeError, getattr, pooled_workbook_obj, 'load_workbook')
+        self.assertRaises(AttributeError, getattr, pooled_workbook_obj, 'set_tab_type_list')
+        pooled_worksheet_obj = pooled_workbook_obj.get_worksheet_by_name('Configs')
+        self.assertIsInstance(pooled_worksheet_obj, PooledWorksheet)
+        self.assertEqual('Configs', pooled_worksheet_obj.get_worksheet_name())
+        self.assertRaises(AttributeError, getattr, pooled_worksheet_obj, 'set_header_row_number')
+        self.assertRaises(AttributeError, getattr, pooled_worksheet_obj, 'set_column_schema')
+        self.assertRaises(WorksheetNotFound, pooled_workbook_obj.get_worksheet_by_name, 'NotExist')
+
+        for pooled_workbook_obj in pooled_workbook_list: pooled_workbook_obj.release()
+        pooled_workbook_list[0].release()
+        self.assertEqual(0, workbook_pool.get_statistics()['in_use_count'])
+        self.assertEqual(1, workbook_pool.get_statistics()['entry_count'])
+
+        # Registry change makes the classification of pooled workbooks out of date.
+        self.registered_tab_type_obj.registered_tab_type_identify('Sections', 'Section')
+        self.assertEqual(0, workbook_pool.get_statistics()['entry_count'])
+        with workbook_pool.acquire(self.workbook_path) as pooled_workbook_obj:
+            self.assertEqual(['Configs'], pooled_workbook_obj.get_tab_list_by_type('Sections'))
+
+    def memory_budget_eviction_test(self):
+
+        workbook_pool = WorkbookPool(self.registered_tab_type_obj, memory_budget=250, size_estimator=lambda workbook_obj: 100)
+        first_path, second_path, third_path = [self.copy_workbook('Plan%d.xlsx' % file_no) for file_no in range(3)]
+
+        with workbook_pool.acquire(first_path):
+            pass
+        first_pooled_workbook_obj = workbook_pool.acquire(first_path)
+        with workbook_pool.acquire(second_path):
+            pass
+        with workbook_pool.acquire(third_path):
+            # The first workbook is in use, the least recently used idle one is evicted.
+            self.assertEqual(2, workbook_pool.get_statistics()['entry_count'])
+            self.assertIn(workbook_pool.get_pool_key(first_path), workbook_pool.entry_by_key.keys())
+            self.assertNotIn(workbook_pool.get_pool_key(second_path), workbook_pool.entry_by_key.keys())
+        first_pooled_workbook_obj.release()
+
+        statistics = workbook_pool.get_statistics()
+        self.assertEqual(1, statistics['eviction_count'])
+        self.assertEqual(200, statistics['estimated_size'])
+
+        # A changed file is loaded again, and the idle entry of previous version is dropped.
+        os.utime(third_path, ns=(os.stat(third_path).st_atime_ns, os.stat(third_path).st_mtime_ns + 1000000000))
+        with workbook_pool.acquire(third_path):
+            self.assertEqual(4, workbook_pool.get_statistics()['load_count'])
+            self.assertEqual([workbook_pool.get_pool_key(first_path), workbook_pool.get_pool_key(third_path)],
+                             list(workbook_pool.entry_by_key.keys()))
+
+        # The entry of previous version in use while the file changes is dropped when it is released.
+        previous_pooled_workbook_obj = workbook_pool.acquire(first_path)
+        previous_pool_key = workbook_pool.get_pool_key(first_path)
+        os.utime(first_path, ns=(os.stat(first_path).st_atime_ns, os.stat(first_path).st_mtime_ns + 1000000000))
+        with workbook_pool.acquire(first_path):
+            self.assertIn(previous_pool_key, workbook_pool.entry_by_key.keys())
+        previous_pooled_workbook_obj.release()
+        self.assertNotIn(previous_pool_key, workbook_pool.entry_by_key.keys())
+        self.assertIn(workbook_pool.get_pool_key(first_path), workbook_pool.entry_by_key.keys())
+
+    def acquire_error_test(self):
+
+        workbook_pool = WorkbookPool(self.registered_tab_type_obj)
+        self.assertRaises(WorkbookNotValid, workbook_pool.acquire, os.path.join(self.workbook_dir, 'NotExist.xlsx'))
+
+        broken_path = os.path.join(self.workbook_dir, 'Broken.xlsx')
+        with open(broken_path, 'wb') as broken_file:
+            broken_file.write(b'Not a workbook')
+        self.assertRaises(WorkbookNotValid, workbook_pool.acquire, broken_path)
+        self.assertEqual(0, workbook_pool.get_statistics()['entry_count'])
+
+        self.assertIs(get_workbook_pool(), get_workbook_pool())
+        configured_workbook_pool = configure_workbook_pool(self.registered_tab_type_obj, memory_budget=0)
+        self.assertIs(configured_workbook_pool, get_workbook_pool())
+        with get_workbook_pool().acquire(self.workbook_path) as pooled_workbook_obj:
+            self.assertEqual(['Configs'], pooled_workbook_obj.get_tab_list_by_type('Configs'))
+        self.assertEqual(0, get_workbook_pool().get_statistics()['entry_count'])
+
+    def shared_read_only_test(self):
+
+        workbook_pool = WorkbookPool(self.registered_tab_type_obj)
+        with workbook_pool.acquire(self.workbook_path) as pooled_workbook_obj:
+            # Only the reading methods are forwarded, including those filling caches of the shared workbook.
+            for name in ['reload', 'start_watching', 'load_worksheet_header', 'store_header_cache', 'join_index_by_key']:
+                self.assertRaises(AttributeError, getattr, pooled_workbook_obj, name)
+            pooled_worksheet_obj = pooled_workbook_obj.get_worksheet_by_name('Configs')
+            for name in ['hash_index_by_keyword', 'build_parameter_plan', 'declared_column_type_by_keyword']:
+                self.assertRaises(AttributeError, getattr, pooled_worksheet_obj, name)
+
+            # Column converters were built before the workbook was shared.
+            shared_worksheet_obj = pooled_workbook_obj.worksheet_list_by_name['Configs']
+            self.assertIsNotNone(shared_worksheet_obj.column_converter_by_keyword)
+
+            # Concurrent queries build the index once, under the lock of the entry.
+            start_barrier = threading.Barrier(8)
+            result_list = []
+            result_lock = threading.Lock()
+
+            def query_configs():
+                start_barrier.wait()
+                row_list = list(pooled_workbook_obj.query_rows('Configs', [('ConfigName', QUERY_EQUAL, 'Test Config')]))
+                with result_lock:
+                    result_list.append(row_list)
+
+            thread_list = [threading.Thread(target=query_configs) for _ in range(8)]
+            for thread in thread_list: thread.start()
+            for thread in thread_list: thread.join()
+            self.assertEqual(8, len(result_list))
+            self.assertTrue(result_list[0])
+            self.assertTrue(all(row_list == result_list[0] for row_list in result_list))
+            self.assertEqual(['ConfigName'], list(shared_worksheet_obj.hash_index_by_keyword.keys()))
+
+            join_index = pooled_workbook_obj.get_join_index('Configs', 'ConfigName')
+            self.assertIs(join_index, pooled_workbook_obj.get_join_index('Configs', 'ConfigName'))
+            list(pooled_workbook_obj.join_tab_types('TestCases', 'Configs', 'ConfigName'))
+
+    def file_changed_during_load_test(self):
+
+        workbook_path = self.copy_workbook('Changed.xlsx')
+        workbook_pool = WorkbookPool(self.registered_tab_type_obj)
+        pool_key = workbook_pool.get_pool_key(workbook_path)
+        stale_pool_key = pool_key[:2] + (pool_key[2] - 1,)
+
+        # The file is stat again after the load, the workbook is returned but not kept under the stale key.
+        with mock.patch.object(WorkbookPool, 'get_pool_key', side_effect=[stale_pool_key, pool_key]):
+            with workbook_pool.acquire(workbook_path) as pooled_workbook_obj:
+                self.assertEqual(['Configs'], pooled_workbook_obj.get_tab_list_by_type('Configs'))
+                self.assertEqual(0, workbook_pool.get_statistics()['entry_count'])
+        self.assertEqual(0, workbook_pool.get_statistics()['entry_count'])
+
+        with workbook_pool.acquire(workbook_path):
+            self.assertEqual([pool_key], list(workbook_pool.entry_by_key.keys()))
+
+
+def workbook_pool_tests():
+    suite = unittest.TestSuite()
+    suite.addTest(WorkbookPoolTest('single_flight_acquire_test'))
+    suite.addTest(WorkbookPoolTest('memory_budget_eviction_test'))
+    suite.addTest(WorkbookPoolTest('acquire_error_test'))
+    suite.addTest(WorkbookPoolTest('shared_read_only_test'))
+    suite.addTest(WorkbookPoolTest('file_changed_during_load_test'))
+    return suite
+
+
+if __name__ == '__main__':
+        runner = unittest.TextTestRunner()
+
+        runner.run(workbook_pool_tests())
@@ -1,10 +1,16 @@
 # encoding: utf-8
 
+import datetime
 import unittest
+import shutil
 import sys
+import tempfile
+from unittest import mock
 sys.path.append('..')
 
 from workbookwithheader import *
+from xlsxreader import BufferFile
+from workbookfixture import write_workbook
 
 
 class WorkbookWithHeaderTest(unittest.TestCase):
@@ -30,6 +36,340 @@ class WorkbookWithHeaderTest(unittest.TestCase):
             self.assertIsInstance(workbook_obj.get_worksheet_by_name(worksheet_name), WorksheetWithHeader)
             self.assertEqual(worksheet_name, workbook_obj.get_worksheet_by_name(worksheet_name).get_worksheet_name())
 
+    def workbook_load_contents_tests(self):
+
+        with open(self.workbook_path, 'rb') as workbook_file:
+            workbook_contents = workbook_file.read()
+
+        for file_contents in [workbook_contents, memoryview(workbook_contents), io.BytesIO(workbook_contents)]:
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.load_workbook(file_contents)
+            self.assertEqual(WORKBOOK_CONTENTS_NAME, workbook_obj.workbook_path)
+            self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], workbook_obj.get_tab_list())
+
+        with open(self.workbook_path, 'rb') as workbook_file:
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.load_workbook(workbook_file)
+            self.assertIn('ConfigName', workbook_obj.get_worksheet_by_name('Configs').get_keyword_list())
+            workbook_mmap = workbook_obj.workbook_mmap
+            self.assertIsInstance(workbook_mmap, mmap.mmap)
+            # .xlsx contents are read in place from the mapping, not copied by xlrd.
+            self.assertIsInstance(workbook_obj.workbook_obj, XlsxStreamReaderBackend)
+            self.assertIsInstance(workbook_obj.workbook_obj.header_reader.buffer_file, BufferFile)
+            workbook_obj.release_worksheet_data()
+            self.assertTrue(workbook_mmap.closed)
+            self.assertIsNone(workbook_obj.workbook_mmap)
+
+            # The previous reader backend and its mapping are closed when another workbook is loaded.
+            workbook_file.seek(0)
+            workbook_obj.load_workbook(workbook_file)
+            previous_backend, workbook_mmap = workbook_obj.workbook_obj, workbook_obj.workbook_mmap
+            workbook_obj.load_workbook(self.workbook_path)
+            self.assertIsNone(previous_backend.header_reader.zip_file.fp)
+            self.assertTrue(workbook_mmap.closed)
+            previous_backend = workbook_obj.workbook_obj
+            workbook_obj.load_workbook(self.workbook_path)
+            self.assertIsNot(previous_backend, workbook_obj.workbook_obj)
+            self.assertIsNone(previous_backend.book.mem)
+
+        # The workbook is read from the current position of the file object.
+        workbook_dir = tempfile.mkdtemp()
+        try:
+            archive_path = os.path.join(workbook_dir, 'archive.bin')
+            with open(archive_path, 'wb') as archive_file:
+                archive_file.write(b'HEADER' * 10)
+                archive_file.write(workbook_contents)
+            with open(archive_path, 'rb') as archive_file:
+                archive_file.seek(60)
+                workbook_obj = WorkbookWithHeader()
+                workbook_obj.load_workbook(archive_file)
+                self.assertIsNone(workbook_obj.workbook_mmap)
+                self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], workbook_obj.get_tab_list())
+        finally:
+            shutil.rmtree(workbook_dir)
+
+        workbook_obj = WorkbookWithHeader()
+        self.assertRaises(WorkbookNotValid, workbook_obj.load_workbook, b'')
+        self.assertRaises(WorkbookNotValid, workbook_obj.load_workbook, b'Not a workbook')
+
+    def workbook_lazy_load_tests(self):
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_lazy_load(True)
+        workbook_obj.load_workbook(self.workbook_path)
+
+        self.assertIn('Configs', workbook_obj.get_tab_list())
+        self.assertFalse(workbook_obj.is_worksheet_loaded('Configs'))
+
+        worksheet_obj = workbook_obj.get_worksheet_by_name('Configs')
+        self.assertTrue(workbook_obj.is_worksheet_loaded('Configs'))
+        self.assertEqual('Configs', worksheet_obj.get_worksheet_name())
+        self.assertIn('ConfigName', worksheet_obj.get_keyword_list())
+        self.assertFalse(workbook_obj.is_worksheet_loaded('KeysInRows'))
+
+        workbook_obj.unload_worksheet('Configs')
+        self.assertFalse(workbook_obj.is_worksheet_loaded('Configs'))
+        self.assertIn('ConfigName', workbook_obj.get_worksheet_by_name('Configs').get_keyword_list())
+
+        self.assertRaises(WorksheetNotFound, workbook_obj.get_worksheet_by_name, 'NotExist')
+
+        # Tabs are classified from the header rows on load, no worksheet is loaded.
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+        for reader_backend in [READER_BACKEND_XLRD, READER_BACKEND_AUTO]:
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_lazy_load(True)
+            workbook_obj.set_reader_backend(reader_backend)
+            workbook_obj.set_tab_type_list(registered_tab_type_obj)
+            workbook_obj.set_header_auto_detect(5)
+            workbook_obj.load_workbook(self.workbook_path)
+
+            self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+            self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+            self.assertEqual({}, workbook_obj.worksheet_list_by_name)
+            self.assertEqual(0, workbook_obj.get_worksheet_metadata('Configs').header_row_no)
+            self.assertEqual({}, workbook_obj.worksheet_list_by_name)
+
+    def workbook_load_metrics_tests(self):
+
+        metric_list = []
+        metrics_hook = lambda metric_name, value, tag_dict: metric_list.append((metric_name, value, tag_dict))
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        add_metrics_hook(metrics_hook)
+        try:
+            workbook_obj.load_workbook(self.workbook_path)
+        finally:
+            remove_metrics_hook(metrics_hook)
+
+        metric_name_list = [metric[0] for metric in metric_list]
+        self.assertEqual(1, metric_name_list.count(METRIC_WORKBOOK_OPEN_TIME))
+        self.assertEqual(3, metric_name_list.count(METRIC_SHEET_HEADER_PARSE_TIME))
+        self.assertEqual(1, metric_name_list.count(METRIC_CLASSIFICATION_TIME))
+        self.assertIn((METRIC_SHEET_CELL_COUNT, 12, {'worksheet_name': 'Configs'}), metric_list)
+
+        metric_list.clear()
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual([], metric_list)
+
+    def workbook_async_load_tests(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+
+        self.assertRaises(asyncio.TimeoutError, asyncio.run, workbook_obj.aload_workbook(self.workbook_path, timeout=0))
+        self.assertEqual([], workbook_obj.get_tab_list())
+
+        self.assertRaises(WorkbookNotValid, asyncio.run, workbook_obj.aload_workbook('TestPath'))
+
+        asyncio.run(workbook_obj.aload_workbook(self.workbook_path))
+        self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], workbook_obj.get_tab_list())
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        # The previous shared executor is still usable by its holders.
+        previous_executor = get_async_load_executor()
+        set_async_load_concurrency(2)
+        self.assertIsNot(previous_executor, get_async_load_executor())
+        self.assertEqual(1, previous_executor.submit(int, '1').result())
+        asyncio.run(workbook_obj.aload_workbook(self.workbook_path, executor=previous_executor))
+        set_async_load_concurrency(4)
+
+    def worksheet_metadata_tests(self):
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.load_workbook(self.workbook_path)
+
+        metadata_list = workbook_obj.get_worksheet_metadata_list()
+        self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], [metadata.worksheet_name for metadata in metadata_list])
+        self.assertEqual(WorksheetMetadata('Configs', 0, ['ConfigName', 'Section', 'Key', 'Values'], 3, 4),
+                         metadata_list[2])
+        self.assertFalse(hasattr(metadata_list[2], '__dict__'))
+
+        workbook_obj.release_worksheet_data()
+        self.assertIsNone(workbook_obj.workbook_obj)
+        self.assertFalse(workbook_obj.is_worksheet_loaded('Configs'))
+        self.assertEqual(metadata_list, workbook_obj.get_worksheet_metadata_list())
+        self.assertIsNone(workbook_obj.workbook_obj)
+
+        self.assertEqual('Configs', workbook_obj.get_worksheet_by_name('Configs').get_worksheet_name())
+
+    def query_rows_tests(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.load_workbook(self.workbook_path)
+
+        result_list = list(workbook_obj.query_rows('TestCases', [('TestID', QUERY_EQUAL, 'Case#3')], ['TestID', 'Method']))
+        self.assertEqual([('KeysInHeader', 13, {'TestID': 'Case#3', 'Method': 'PUT'}),
+                          ('KeysInRows', 13, {'TestID': 'Case#3', 'Method': 'PUT'})], result_list)
+
+        result_list = list(workbook_obj.query_rows('TestCases', [('TestID', QUERY_IN, ['Case#3', 'Case#4']),
+                                                                 ('StepName', QUERY_EQUAL, 'Step#001')]))
+        self.assertEqual(4, len(result_list))
+        self.assertEqual(15, len(result_list[0][2]))
+
+        result_list = list(workbook_obj.query_rows('TestCases', [('ReturnCode', QUERY_RANGE, (200, 200))], ['TestID']))
+        self.assertEqual(22, len(result_list))
+        self.assertEqual([], list(workbook_obj.query_rows('TestCases', [('ReturnCode', QUERY_RANGE, (201, None))])))
+        self.assertEqual([], list(workbook_obj.query_rows('TestCases', [('NotExist', QUERY_EQUAL, 'Value')])))
+        self.assertEqual([], list(workbook_obj.query_rows('Configs')))
+
+        worksheet_obj = workbook_obj.get_worksheet_by_name('KeysInHeader')
+        self.assertIn('TestID', worksheet_obj.hash_index_by_keyword.keys())
+        self.assertIn('ReturnCode', worksheet_obj.sorted_index_by_keyword.keys())
+        self.assertRaises(ValueError, list, worksheet_obj.query_rows([('TestID', 'like', 'Case')]))
+
+    def workbook_reload_tests(self):
+
+        workbook_dir = tempfile.mkdtemp()
+        try:
+            workbook_path = os.path.join(workbook_dir, 'reload.xlsx')
+            row_list_by_tab = {'Cases': [['TestID', 'Method'], ['Case#1', 'GET']],
+                               'Configs': [['ConfigName', 'Key'], ['Config', 'baseurl']]}
+            write_workbook(workbook_path, row_list_by_tab)
+
+            registered_tab_type_obj = RegisteredTabType()
+            registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestID')
+            registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_tab_type_list(registered_tab_type_obj)
+            workbook_obj.load_workbook(workbook_path)
+            cases_worksheet_obj = workbook_obj.get_worksheet_by_name('Cases')
+            configs_worksheet_obj = workbook_obj.get_worksheet_by_name('Configs')
+            self.assertEqual([], workbook_obj.reload())
+
+            row_list_by_tab['Configs'] = [['TestID', 'Key'], ['Case#2', 'PUT']]
+            row_list_by_tab['Others'] = [['Other']]
+            write_workbook(workbook_path, row_list_by_tab)
+            os.utime(workbook_path, ns=(0, workbook_obj.file_stat_fingerprint[1] + 1))
+
+            self.assertEqual(['Configs', 'Others'], workbook_obj.reload())
+            self.assertIs(cases_worksheet_obj, workbook_obj.get_worksheet_by_name('Cases'))
+            self.assertIs(workbook_obj.workbook_obj.sheet_by_name('Cases'), cases_worksheet_obj.worksheet_object)
+            self.assertIsNot(configs_worksheet_obj, workbook_obj.get_worksheet_by_name('Configs'))
+            self.assertEqual(['Cases', 'Configs'], workbook_obj.get_tab_list_by_type('TestCases'))
+            self.assertEqual([], workbook_obj.get_tab_list_by_type('Configs'))
+            self.assertEqual(['Cases', 'Configs', 'Others'], workbook_obj.get_tab_list())
+            self.assertEqual([], workbook_obj.reload())
+
+            # Digests of the previous reload are kept, Others loaded by the previous reload is digested for the first
+            # time, then only the sheets of the touched file are digested.
+            digested_sheet_list = []
+
+            def get_counted_sheet_digest(sheet_obj):
+                digested_sheet_list.append(sheet_obj)
+                return get_sheet_digest(sheet_obj)
+
+            others_sheet_obj = workbook_obj.workbook_obj.sheet_by_name('Others')
+            os.utime(workbook_path, ns=(0, workbook_obj.file_stat_fingerprint[1] + 1))
+            with mock.patch('workbookwithheader.get_sheet_digest', get_counted_sheet_digest):
+                self.assertEqual([], workbook_obj.reload())
+            self.assertEqual([others_sheet_obj] + [workbook_obj.workbook_obj.sheet_by_name(tab_name)
+                                                   for tab_name in ['Cases', 'Configs', 'Others']], digested_sheet_list)
+
+            reload_result_list = []
+            reload_event = threading.Event()
+            workbook_obj.start_watching(0.01, lambda obj, result: (reload_result_list.append(result), reload_event.set()))
+            del row_list_by_tab['Others']
+            write_workbook(workbook_path + '.tmp', row_list_by_tab)
+            os.utime(workbook_path + '.tmp', ns=(0, workbook_obj.file_stat_fingerprint[1] + 1))
+            # The watching thread does not reload while a reader holds the workbook lock.
+            with workbook_obj.workbook_lock:
+                os.replace(workbook_path + '.tmp', workbook_path)
+                self.assertFalse(reload_event.wait(0.2))
+                self.assertEqual(['Cases', 'Configs', 'Others'], workbook_obj.get_tab_list())
+            self.assertTrue(reload_event.wait(5))
+            workbook_obj.stop_watching()
+            self.assertEqual([['Others']], reload_result_list)
+
+            # In lazy mode only the loaded worksheets are compared by content, other tabs by header.
+            lazy_workbook_path = os.path.join(workbook_dir, 'lazy.xlsx')
+            shutil.copy(self.workbook_path, lazy_workbook_path)
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_lazy_load(True)
+            workbook_obj.set_tab_type_list(registered_tab_type_obj)
+            workbook_obj.load_workbook(lazy_workbook_path)
+            configs_worksheet_obj = workbook_obj.get_worksheet_by_name('Configs')
+            tab_list_by_type = dict(workbook_obj.tab_list_by_type)
+            os.utime(lazy_workbook_path, ns=(0, workbook_obj.file_stat_fingerprint[1] + 1))
+
+            self.assertEqual([], workbook_obj.reload())
+            self.assertEqual(['Configs'], list(workbook_obj.worksheet_list_by_name.keys()))
+            self.assertIs(configs_worksheet_obj, workbook_obj.get_worksheet_by_name('Configs'))
+            self.assertIs(workbook_obj.workbook_obj.sheet_by_name('Configs'), configs_worksheet_obj.worksheet_object)
+            self.assertEqual(tab_list_by_type, workbook_obj.tab_list_by_type)
+            self.assertIn('TestFileName', workbook_obj.get_keyword_list_by_name('KeysInHeader'))
+        finally:
+            shutil.rmtree(workbook_dir)
+
+    def join_tab_types_tests(self):
+
+        workbook_dir = tempfile.mkdtemp()
+        try:
+            workbook_path = os.path.join(workbook_dir, 'join.xlsx')
+            write_workbook(workbook_path, {
+                'Cases1': [['TestID', 'ConfigName'], ['Case#1', 'A'], ['Case#2', 'B'], ['Case#3', 'Missing'],
+                           ['Case#4', ''], [], ['Case#5', 'A']],
+                'Configs': [['ConfigName', 'Key'], ['A', 'port'], ['B', 'url'], ['B', 'url2'], ['C', 'host']],
+                'Cases2': [['TestID', 'ConfigName'], ['Case#6', 'B']]})
+
+            registered_tab_type_obj = RegisteredTabType()
+            registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestID')
+            registered_tab_type_obj.registered_tab_type_identify('Configs', 'Key')
+
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.set_tab_type_list(registered_tab_type_obj)
+            workbook_obj.load_workbook(workbook_path)
+
+            join_report = TabTypeJoinReport()
+            joined_record_list = list(workbook_obj.join_tab_types('TestCases', 'Configs', 'ConfigName',
+                                                                  left_keyword_list=['TestID'], join_report=join_report))
+            self.assertEqual([('Case#1', 'port'), ('Case#2', 'url'), ('Case#2', 'url2'), ('Case#5', 'port'),
+                              ('Case#6', 'url'), ('Case#6', 'url2')],
+                             [(joined_record.left_record['TestID'], joined_record.right_record['Key'])
+                              for joined_record in joined_record_list])
+            self.assertEqual(JoinedRecord('A', 'Cases1', 1, {'TestID': 'Case#1'}, 'Configs', 1,
+                                          {'ConfigName': 'A', 'Key': 'port'}), joined_record_list[0])
+            self.assertEqual('Configs', join_report.build_tab_type)
+            self.assertEqual(6, join_report.joined_count)
+            self.assertEqual({'TestCases': [('Cases1', 3, 'Missing'), ('Cases1', 4, '')], 'Configs': [('Configs', 4, 'C')]},
+                             join_report.unmatched_row_list_by_tab_type)
+            self.assertEqual({'TestCases': {'A': 2, 'B': 2}, 'Configs': {'B': 2}}, join_report.duplicate_key_count_by_tab_type)
+
+            # The index of the smaller side is reused, and unmatched left rows follow the matched ones.
+            join_index = workbook_obj.get_join_index('Configs', 'ConfigName')
+            joined_record_list = list(workbook_obj.join_tab_types('Configs', 'TestCases', 'ConfigName',
+                                                                  join_type=JOIN_LEFT, join_report=join_report))
+            self.assertIs(join_index, workbook_obj.get_join_index('Configs', 'ConfigName'))
+            self.assertEqual(7, len(joined_record_list))
+            self.assertEqual(JoinedRecord('C', 'Configs', 4, {'ConfigName': 'C', 'Key': 'host'}, None, None, None),
+                             joined_record_list[-1])
+            self.assertEqual(('Case#1', 'port'), (joined_record_list[0].right_record['TestID'],
+                                                  joined_record_list[0].left_record['Key']))
+
+            workbook_obj.unload_worksheet('Configs')
+            self.assertNotIn(('Configs', 'ConfigName'), workbook_obj.join_index_by_key.keys())
+            self.assertEqual(6, len(list(workbook_obj.join_tab_types('TestCases', 'Configs', 'ConfigName'))))
+            self.assertRaises(ValueError, list, workbook_obj.join_tab_types('TestCases', 'Configs', 'ConfigName',
+                                                                            join_type='outer'))
+        finally:
+            shutil.rmtree(workbook_dir)
+
     def workbook_load_error_tests(self):
 
         workbook_obj = WorkbookWithHeader()
@@ -60,12 +400,90 @@ class WorkbookWithHeaderTest(unittest.TestCase):
         self.assertIn("Configs", workbook_obj.get_tab_list_by_type('TestCases'))
         self.assertIn("Configs", workbook_obj.get_tab_list_by_type('Configs'))
 
+    def header_auto_detect_tests(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'StepName')
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_default_header_row_no(1)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual([], workbook_obj.get_tab_list_by_type('Configs'))
+
+        workbook_obj.set_header_auto_detect(5)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+        self.assertEqual(0, workbook_obj.get_worksheet_by_name('Configs').header_row_no)
+
+    def tab_list_by_type_change_event_tests(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_one_keyword_to_multiple_type(True)
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'ConfigName')
+        self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        registered_tab_type_obj.unregistered_tab_type_identify('TestCases', 'ConfigName')
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        registered_tab_type_obj.unregistered_tab_type_identify('Configs', 'ConfigName')
+        self.assertEqual([], workbook_obj.get_tab_list_by_type('Configs'))
+
+    def tab_type_rule_change_event_tests(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        rule_id = registered_tab_type_obj.registered_tab_type_rule('TestCases', RULE_NONE_OF, ['Key1'])
+        self.assertEqual(['KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        registered_tab_type_obj.registered_tab_type_rule('Configs', RULE_ALL_OF, ['configname'], ['Sect.*'], ignore_case=True)
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+
+        # Keyword added to a tab type with rules is still excluded by none_of rule.
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'StepName')
+        self.assertEqual(['KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        registered_tab_type_obj.unregistered_tab_type_rule(rule_id)
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+
 
 def workbook_with_header_tests():
     suite = unittest.TestSuite()
     suite.addTest(WorkbookWithHeaderTest('workbook_load_tests'))
+    suite.addTest(WorkbookWithHeaderTest('workbook_load_contents_tests'))
+    suite.addTest(WorkbookWithHeaderTest('workbook_lazy_load_tests'))
+    suite.addTest(WorkbookWithHeaderTest('workbook_load_metrics_tests'))
+    suite.addTest(WorkbookWithHeaderTest('workbook_async_load_tests'))
+    suite.addTest(WorkbookWithHeaderTest('worksheet_metadata_tests'))
+    suite.addTest(WorkbookWithHeaderTest('query_rows_tests'))
+    suite.addTest(WorkbookWithHeaderTest('workbook_reload_tests'))
+    suite.addTest(WorkbookWithHeaderTest('join_tab_types_tests'))
     suite.addTest(WorkbookWithHeaderTest('workbook_load_error_tests'))
     suite.addTest(WorkbookWithHeaderTest('build_tab_list_by_type_tests'))
+    suite.addTest(WorkbookWithHeaderTest('header_auto_detect_tests'))
+    suite.addTest(WorkbookWithHeaderTest('tab_list_by_type_change_event_tests'))
+    suite.addTest(WorkbookWithHeaderTest('tab_type_rule_change_event_tests'))
     return suite
 
 
@@ -167,6 +585,56 @@ class RegisteredTabTypeTest(unittest.TestCase):
         self.assertEqual([], registered_tab_type_obj.get_tab_type_by_keywords(['Keyword for Type3','Keyword for Type4']))
         self.assertEqual([], registered_tab_type_obj.get_tab_type_by_keywords([]))
 
+        self.assertEqual(['Type1', 'Type2'], registered_tab_type_obj.get_tab_type_by_keywords(['Keyword for Type2', 'Keyword for Type1']))
+
+        registered_tab_type_obj.unregistered_tab_type_identify('Type1', 'Keyword for Type1')
+        self.assertEqual(['Type2'], registered_tab_type_obj.get_tab_type_by_keywords(['Keyword for Type1']))
+        registered_tab_type_obj.unregistered_tab_type_identify('Type2', 'Keyword for Type1')
+        self.assertEqual([], registered_tab_type_obj.get_tab_type_by_keywords(['Keyword for Type1']))
+        self.assertNotIn('Keyword for Type1', registered_tab_type_obj.tab_type_list_by_keyword.keys())
+
+    def registered_tab_type_rule_tests(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('Type1', 'Keyword for Type1')
+
+        all_of_rule_id = registered_tab_type_obj.registered_tab_type_rule('Type2', RULE_ALL_OF, ['Name', 'Value'])
+        registered_tab_type_obj.registered_tab_type_rule('Type1', RULE_NONE_OF, ['deprecated'], ignore_case=True)
+        registered_tab_type_obj.registered_tab_type_rule('Type3', RULE_ANY_OF, patterns=[r'Test ?Case.*', r'.*#\d+'],
+                                                         ignore_case=True)
+        self.assertEqual(['Type1', 'Type2', 'Type3'], list(registered_tab_type_obj.get_registered_tab_type_list()))
+        self.assertIsNone(registered_tab_type_obj.registered_tab_type_rule('Type2', RULE_ANY_OF, []))
+        self.assertRaises(ValueError, registered_tab_type_obj.registered_tab_type_rule, 'Type2', 'some_of', ['Name'])
+        self.assertRaises(re.error, registered_tab_type_obj.registered_tab_type_rule, 'Type2', RULE_ANY_OF, None, ['('])
+        # Group names and numbers are shared by all patterns compiled together.
+        for pattern in [r'(?P<id>\d+)', r'(a)\1', r'(a)?(?(1)b|c)']:
+            self.assertRaises(ValueError, registered_tab_type_obj.registered_tab_type_rule, 'Type2', RULE_ANY_OF, None,
+                              [pattern])
+        # Global inline flags can not be wrapped in the group of the pattern, the registry is kept usable.
+        self.assertRaises(ValueError, registered_tab_type_obj.registered_tab_type_rule, 'Type2', RULE_ANY_OF, None,
+                          ['(?i)abc'])
+        self.assertEqual([], registered_tab_type_obj.get_tab_type_by_keywords(['ABC']))
+        self.assertEqual(['Type1', 'Type2', 'Type3'], list(registered_tab_type_obj.get_registered_tab_type_list()))
+
+        self.assertEqual(['Type1'], registered_tab_type_obj.get_tab_type_by_keywords(['Keyword for Type1', 'Name']))
+        self.assertEqual(['Type1', 'Type2'], registered_tab_type_obj.get_tab_type_by_keywords(['Value', 'Keyword for Type1', 'Name']))
+        self.assertEqual(['Type2'], registered_tab_type_obj.get_tab_type_by_keywords(['Keyword for Type1', 'Name', 'Value', ' DEPRECATED ']))
+        self.assertEqual(['Type3'], registered_tab_type_obj.get_tab_type_by_keywords(['testcase ID', 1.0]))
+        self.assertEqual(['Type3'], registered_tab_type_obj.get_tab_type_by_keywords(['Step #12']))
+        self.assertEqual([], registered_tab_type_obj.get_tab_type_by_keywords(['Step #12a', 'A Test Case']))
+        self.assertTrue(registered_tab_type_obj.is_registered_keyword('Test Case Name'))
+        self.assertFalse(registered_tab_type_obj.is_registered_keyword('Deprecated'))
+        self.assertFalse(registered_tab_type_obj.is_registered_keyword(['Not hashable']))
+
+        self.assertEqual([all_of_rule_id], list(registered_tab_type_obj.get_rules_by_tab_type('Type2').keys()))
+        registered_tab_type_obj.unregistered_tab_type_rule(all_of_rule_id)
+        registered_tab_type_obj.unregistered_tab_type_rule(all_of_rule_id)
+        self.assertEqual({}, registered_tab_type_obj.get_rules_by_tab_type('Type2'))
+        self.assertEqual(['Type1'], registered_tab_type_obj.get_tab_type_by_keywords(['Value', 'Keyword for Type1', 'Name']))
+
+        registered_tab_type_obj.registered_tab_type_rule('Type4', RULE_ANY_OF, patterns=['(?i:abc)'])
+        self.assertEqual(['Type4'], registered_tab_type_obj.get_tab_type_by_keywords(['ABC']))
+
 
 def registered_tab_type_tests():
     suite = unittest.TestSuite()
@@ -175,6 +643,7 @@ def registered_tab_type_tests():
     suite.addTest(RegisteredTabTypeTest('registered_tab_type_identify_error_tests'))
     suite.addTest(RegisteredTabTypeTest('unregistered_tab_type_identify_tests'))
     suite.addTest(RegisteredTabTypeTest('get_tab_type_by_keywords_tests'))
+    suite.addTest(RegisteredTabTypeTest('registered_tab_type_rule_tests'))
     return suite
 
 
@@ -202,10 +671,168 @@ class WorksheetWithHeaderTest(unittest.TestCase):
         self.assertIn("Parameters", worksheet_obj.get_keyword_list())
         self.assertIn("Key1", worksheet_obj.get_keyword_list())
 
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.set_header_row_number(5)
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("Configs"))
+        self.assertEqual([], worksheet_obj.get_keyword_list())
+
+    def iterate_rows_test(self):
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("KeysInHeader"))
+
+        row_list = list(worksheet_obj.iterate_rows())
+        self.assertEqual(11, len(row_list))
+        self.assertEqual('AreaA', row_list[0]['TestArea'])
+        self.assertEqual('Value1', row_list[0]['Key1'])
+        self.assertEqual(15, len(row_list[0]))
+
+        row_list = list(worksheet_obj.iterate_rows(['StepName', 'Method', 'NotExist']))
+        self.assertEqual({'StepName': 'Step#002', 'Method': 'GET'}, row_list[1])
+
+        row_list = list(worksheet_obj.iterate_rows(['TestID'], as_namedtuple=True))
+        self.assertEqual(6, len(row_list))
+        self.assertEqual('Case#1', row_list[0].TestID)
+
+        self.assertEqual(16, len(list(worksheet_obj.iterate_rows(skip_empty_row=False))))
+
+    def parameters_test(self):
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("KeysInHeader"))
+        self.assertEqual(PARAMETER_KEYS_IN_HEADER, worksheet_obj.get_parameter_layout())
+
+        parameter_list = list(worksheet_obj.iterate_parameters())
+        self.assertEqual(11, len(parameter_list))
+        self.assertEqual((1, {'Key1': 'Value1', 'Key2': 'Value2', 'Key3': 'Value3', 'Key4': 'Value4', 'Key5': 'Value5'}),
+                         parameter_list[0])
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("KeysInRows"))
+        self.assertEqual(PARAMETER_KEYS_IN_ROWS, worksheet_obj.get_parameter_layout())
+        self.assertEqual({'Key1': 'Value1', 'Key2': 'Value2', 'Key3': 'Value3', 'Key4': 'Value4'},
+                         worksheet_obj.get_parameters(1))
+        self.assertEqual(6, len(worksheet_obj.get_parameters(2)))
+        self.assertEqual({}, worksheet_obj.get_parameters(3))
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("Configs"))
+        self.assertIsNone(worksheet_obj.get_parameter_layout())
+        self.assertEqual([], list(worksheet_obj.iterate_parameters()))
+
+    def to_columns_test(self):
+
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('numpy is not installed')
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("KeysInHeader"))
+
+        column_dict = worksheet_obj.to_columns(['ReturnCode', 'Method', 'NotExist'])
+        self.assertEqual(['ReturnCode', 'Method'], list(column_dict.keys()))
+
+        self.assertEqual(numpy.float64, column_dict['ReturnCode'].dtype)
+        self.assertEqual(16, len(column_dict['ReturnCode']))
+        self.assertEqual(2200.0, numpy.nansum(column_dict['ReturnCode']))
+
+        self.assertIsInstance(column_dict['Method'], CategoricalColumn)
+        self.assertEqual(['', 'GET', 'PUT'], list(column_dict['Method'].categories))
+        self.assertEqual('PUT', column_dict['Method'].categories[column_dict['Method'].codes[0]])
+
+
+    def typed_columns_test(self):
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name("KeysInHeader"))
+        self.assertEqual(COLUMN_TYPE_INTEGER, worksheet_obj.get_column_schema()['ReturnCode'])
+        self.assertEqual(COLUMN_TYPE_TEXT, worksheet_obj.get_column_schema()['Method'])
+
+        column_dict = worksheet_obj.get_typed_columns(['ReturnCode', 'Method', 'NotExist'])
+        self.assertEqual(['ReturnCode', 'Method'], list(column_dict.keys()))
+        self.assertEqual(200, column_dict['ReturnCode'][0])
+        self.assertIsInstance(column_dict['ReturnCode'][0], int)
+        self.assertEqual(2200, sum(value for value in column_dict['ReturnCode'] if value is not None))
+        self.assertEqual('PUT', column_dict['Method'][0])
+
+        sheet_obj = MemorySheet('Typed', ReaderBackend('Typed.csv'), [
+            [SheetCell(CELL_TEXT, keyword) for keyword in ['Created', 'Due', 'Count', 'Passed', 'Note']],
+            [SheetCell(CELL_DATE, 45000.5), SheetCell(CELL_NUMBER, 45001.0), SheetCell(CELL_TEXT, ' 7 '),
+             SheetCell(CELL_BOOLEAN, 1), SheetCell(CELL_NUMBER, 3.0)],
+            [EMPTY_CELL, SheetCell(CELL_TEXT, '2023-03-17'), SheetCell(CELL_NUMBER, 2.5),
+             SheetCell(CELL_TEXT, 'No'), SheetCell(CELL_TEXT, 'n/a')],
+            [EMPTY_CELL, EMPTY_CELL, EMPTY_CELL, EMPTY_CELL, EMPTY_CELL],
+            [SheetCell(CELL_DATE, 45002.0), SheetCell(CELL_TEXT, 'soon'), SheetCell(CELL_TEXT, 'many'),
+             SheetCell(CELL_NUMBER, 0.0), SheetCell(CELL_ERROR, 7)],
+        ])
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(sheet_obj)
+        worksheet_obj.set_column_schema({'Due': COLUMN_TYPE_DATE, 'Count': COLUMN_TYPE_INTEGER,
+                                         'Passed': COLUMN_TYPE_BOOLEAN, 'Note': 'unknown'})
+        self.assertEqual({'Created': COLUMN_TYPE_DATE, 'Due': COLUMN_TYPE_DATE, 'Count': COLUMN_TYPE_INTEGER,
+                          'Passed': COLUMN_TYPE_BOOLEAN, 'Note': COLUMN_TYPE_RAW}, worksheet_obj.get_column_schema())
+
+        row_list = list(worksheet_obj.iterate_typed_rows(chunk_row_count=2))
+        self.assertEqual(3, len(row_list))
+        self.assertEqual({'Created': datetime.datetime(2023, 3, 15, 12, 0), 'Due': datetime.datetime(2023, 3, 16),
+                          'Count': 7, 'Passed': True, 'Note': 3.0}, row_list[0])
+        self.assertEqual({'Created': None, 'Due': datetime.datetime(2023, 3, 17), 'Count': 2.5, 'Passed': False,
+                          'Note': 'n/a'}, row_list[1])
+        self.assertEqual({'Created': datetime.datetime(2023, 3, 17), 'Due': None, 'Count': None, 'Passed': False,
+                          'Note': None}, row_list[2])
+        self.assertEqual(4, len(list(worksheet_obj.iterate_typed_rows(skip_empty_row=False))))
+
+        worksheet_obj.set_column_schema({'Count': COLUMN_TYPE_TEXT})
+        self.assertEqual([' 7 ', '2.5', None, 'many'], worksheet_obj.get_typed_columns(['Count'])['Count'])
+
+        # Serial numbers before 1900-03-01 are converted as xlrd does, text nan is not a number.
+        sheet_obj = MemorySheet('Early', ReaderBackend('Early.csv'), [
+            [SheetCell(CELL_TEXT, 'Date'), SheetCell(CELL_TEXT, 'Score')],
+            [SheetCell(CELL_DATE, 1.0), SheetCell(CELL_TEXT, 'nan')],
+            [SheetCell(CELL_DATE, 59.5), SheetCell(CELL_NUMBER, 1.5)],
+            [SheetCell(CELL_DATE, 61.0), SheetCell(CELL_TEXT, ' inf ')],
+        ])
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(sheet_obj)
+        expected_date_list = [xlrd.xldate.xldate_as_datetime(serial, 0) for serial in [1.0, 59.5, 61.0]]
+        self.assertEqual(expected_date_list, worksheet_obj.get_typed_columns(['Date'])['Date'])
+        self.assertEqual(expected_date_list, get_datetime_list([1.0, 59.5, 61.0], 0))
+        worksheet_obj.set_column_schema({'Date': COLUMN_TYPE_TEXT, 'Score': COLUMN_TYPE_FLOAT})
+        self.assertEqual(['1900-01-01T00:00:00', '1900-02-28T12:00:00', '1900-03-01T00:00:00'],
+                         worksheet_obj.get_typed_columns(['Date'])['Date'])
+        self.assertEqual([None, 1.5, None], worksheet_obj.get_typed_columns(['Score'])['Score'])
+        worksheet_obj.set_column_schema({'Score': COLUMN_TYPE_RAW})
+        self.assertEqual(['nan', 1.5, ' inf '], worksheet_obj.get_typed_columns(['Score'])['Score'])
+
+    def mixed_type_range_test(self):
+
+        sheet_obj = MemorySheet('Mixed', ReaderBackend('Mixed.csv'), [
+            [SheetCell(CELL_TEXT, 'Code')],
+            [SheetCell(CELL_NUMBER, 200.0)], [SheetCell(CELL_TEXT, 'n/a')], [SheetCell(CELL_NUMBER, 404.0)],
+            [SheetCell(CELL_TEXT, 'moved')], [EMPTY_CELL], [SheetCell(CELL_TEXT, 'error')], [SheetCell(CELL_NUMBER, 50.0)],
+        ])
+
+        worksheet_obj = WorksheetWithHeader()
+        worksheet_obj.load_worksheet(sheet_obj)
+        self.assertEqual({1, 3}, worksheet_obj.find_row_no_set('Code', QUERY_RANGE, (200, None)))
+        self.assertEqual({1, 7}, worksheet_obj.find_row_no_set('Code', QUERY_RANGE, (None, 300)))
+        self.assertEqual({6}, worksheet_obj.find_row_no_set('Code', QUERY_RANGE, (None, 'm')))
+        self.assertEqual({2, 4}, worksheet_obj.find_row_no_set('Code', QUERY_RANGE, ('m', None)))
+        self.assertEqual({1, 3, 7}, worksheet_obj.find_row_no_set('Code', QUERY_RANGE, (0, 1000)))
+        self.assertEqual({1, 2, 3, 4, 6, 7}, worksheet_obj.find_row_no_set('Code', QUERY_RANGE, (None, None)))
+        self.assertRaises(ValueError, worksheet_obj.find_row_no_set, 'Code', QUERY_RANGE, (0, 'z'))
+
 
 def worksheet_with_header_tests():
     suite = unittest.TestSuite()
     suite.addTest(WorksheetWithHeaderTest('load_worksheet_test'))
+    suite.addTest(WorksheetWithHeaderTest('iterate_rows_test'))
+    suite.addTest(WorksheetWithHeaderTest('parameters_test'))
+    suite.addTest(WorksheetWithHeaderTest('to_columns_test'))
+    suite.addTest(WorksheetWithHeaderTest('typed_columns_test'))
+    suite.addTest(WorksheetWithHeaderTest('mixed_type_range_test'))
     return suite
 
 
@@ -0,0 +1,101 @@
+# encoding: utf-8
+
+import unittest
+import sys
+sys.path.append('..')
+
+from workbookwithheader import *
+from xlsxreader import *
+
+
+class XlsxHeaderReaderTest(unittest.TestCase):
+
+    workbook_path = os.path.abspath(os.path.join(os.path.dirname(os.getcwd()), 'samp', 'Sample_Spread_with_Header.xlsx'))
+
+    def setUp(self):
+        print('Setup for XlsxHeaderReaderTest')
+
+    def tearDown(self):
+        print('Teardown for XlsxHeaderReaderTest')
+
+    def get_header_row_test(self):
+
+        # Only the shared strings up to the highest index used are resolved.
+        with XlsxHeaderReader(self.workbook_path) as header_reader:
+            header_reader.get_header_row('KeysInHeader', 0)
+            self.assertEqual(15, len(header_reader.shared_string_table.string_list))
+
+        with XlsxHeaderReader(self.workbook_path) as header_reader:
+            self.assertEqual(['KeysInHeader', 'KeysInRows', 'Configs'], header_reader.sheet_names())
+            self.assertEqual([(0, 'ConfigName'), (1, 'Section'), (2, 'Key'), (3, 'Values')],
+                             header_reader.get_header_row('Configs', 0))
+            self.assertEqual([(1, 'variable'), (2, 'hostip'), (3, 'localhost')], header_reader.get_header_row('Configs', 2))
+            self.assertEqual([], header_reader.get_header_row('Configs', 5))
+
+            self.assertEqual((8, 200.0), header_reader.get_header_row('KeysInHeader', 1)[8])
+
+            # Row 2 of KeysInHeader has no cell before column 4, row 3 is empty.
+            row_list = list(header_reader.iterate_rows('KeysInHeader', 4))
+            self.assertEqual([0, 1, 2, 3], [row_no for row_no, _ in row_list])
+            self.assertEqual(200.0, row_list[1][1][8])
+            self.assertEqual('Step#002', row_list[2][1][4])
+            self.assertEqual({}, row_list[3][1])
+
+    def xlsx_header_backend_test(self):
+
+        registered_tab_type_obj = RegisteredTabType()
+        registered_tab_type_obj.registered_tab_type_identify('TestCases', 'TestFileName')
+        registered_tab_type_obj.registered_tab_type_identify('Configs', 'ConfigName')
+
+        xlrd_workbook_obj = WorkbookWithHeader()
+        xlrd_workbook_obj.load_workbook(self.workbook_path)
+
+        # In lazy mode the stream backend reads only the header rows to classify the tabs.
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_tab_type_list(registered_tab_type_obj)
+        workbook_obj.set_reader_backend(READER_BACKEND_XLSX_STREAM)
+        workbook_obj.set_lazy_load(True)
+        workbook_obj.load_workbook(self.workbook_path)
+
+        self.assertIsInstance(workbook_obj.workbook_obj, XlsxStreamReaderBackend)
+        self.assertEqual(xlrd_workbook_obj.get_tab_list(), workbook_obj.get_tab_list())
+        for tab_name in workbook_obj.get_tab_list():
+            self.assertEqual(xlrd_workbook_obj.get_keyword_list_by_name(tab_name),
+                             workbook_obj.get_keyword_list_by_name(tab_name))
+        self.assertEqual(['KeysInHeader', 'KeysInRows'], workbook_obj.get_tab_list_by_type('TestCases'))
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+        self.assertEqual({}, workbook_obj.workbook_obj.sheet_obj_by_name)
+
+        self.assertEqual(2, len(list(workbook_obj.get_worksheet_by_name('Configs').iterate_rows())))
+        self.assertEqual(['Configs'], list(workbook_obj.workbook_obj.sheet_obj_by_name.keys()))
+
+        # Header row is detected by the same scoring as the worksheets, from the streamed top rows.
+        workbook_obj.set_default_header_row_no(1)
+        workbook_obj.set_header_auto_detect(3)
+        workbook_obj.load_workbook(self.workbook_path)
+        self.assertEqual(['Configs'], workbook_obj.get_tab_list_by_type('Configs'))
+        self.assertEqual(0, workbook_obj.get_worksheet_metadata('Configs').header_row_no)
+        self.assertEqual({}, workbook_obj.workbook_obj.sheet_obj_by_name)
+        self.assertEqual(0, workbook_obj.get_worksheet_by_name('Configs').header_row_no)
+
+        self.assertRaises(WorkbookNotValid, XlsxHeaderReaderTest.load_invalid_workbook)
+
+    @staticmethod
+    def load_invalid_workbook():
+        workbook_obj = WorkbookWithHeader()
+        workbook_obj.set_reader_backend(READER_BACKEND_XLSX_STREAM)
+        workbook_obj.set_lazy_load(True)
+        workbook_obj.load_workbook(io.BytesIO(b'Not a workbook'))
+
+
+def xlsx_header_reader_tests():
+    suite = unittest.TestSuite()
+    suite.addTest(XlsxHeaderReaderTest('get_header_row_test'))
+    suite.addTest(XlsxHeaderReaderTest('xlsx_header_backend_test'))
+    return suite
+
+
+if __name__ == '__main__':
+        runner = unittest.TextTestRunner()
+
+        runner.run(xlsx_header_reader_tests())
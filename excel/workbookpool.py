@@ -0,0 +1,453 @@
+# encoding: utf-8
+
+import collections
+import concurrent.futures
+from workbookwithheader import *
+
+
+# Estimated memory of one loaded cell in bytes, used by the default size estimator of WorkbookPool.
+POOL_CELL_SIZE = 64
+
+# Default memory budget of WorkbookPool in bytes.
+POOL_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Attributes and methods of WorkbookWithHeader available from PooledWorkbook, which do not change the workbook.
+# Methods filling caches on first use, e.g. get_join_index(), are defined by PooledWorkbook under the entry lock.
+WORKBOOK_READER_NAME_SET = frozenset([
+    'workbook_path', 'tab_list', 'tab_list_by_type', 'worksheet_list_by_name', 'worksheet_metadata_by_name',
+    'registered_tab_type', 'default_header_row_no', 'reader_backend', 'file_stat_fingerprint',
+    'get_tab_list', 'get_keyword_list_by_name', 'get_tab_list_by_type', 'get_worksheet_metadata',
+    'get_worksheet_metadata_list', 'is_worksheet_loaded', 'is_workbook_file_changed', 'get_reader_backend_name',
+    'export_tab_type',
+])
+
+# Attributes and methods of WorksheetWithHeader available from PooledWorksheet, which do not change the worksheet.
+# Column converters are built before the workbook is pooled, column indexes are built by PooledWorksheet under the
+# entry lock.
+WORKSHEET_READER_NAME_SET = frozenset([
+    'header_row_no', 'keywords_in_header', 'keyword_set', 'column_no_by_keyword', 'parameter_keyword',
+    'parameter_layout', 'parameter_column_plan', 'worksheet_object',
+    'get_parameter_layout', 'get_parameters', 'iterate_parameters', 'get_keyword_list', 'get_keyword_set',
+    'get_metadata', 'get_worksheet_name', 'iterate_rows', 'infer_column_schema', 'get_column_schema',
+    'get_typed_columns', 'iterate_typed_rows', 'get_record', 'get_sort_key', 'to_columns',
+])
+
+
+# Process wide pool returned by get_workbook_pool(), created on first use.
+default_workbook_pool = None
+default_workbook_pool_lock = threading.Lock()
+
+
+def configure_workbook_pool(registered_tab_type=None, memory_budget=POOL_MEMORY_BUDGET, header_row_no=0):
+    """
+    Replace the process wide pool returned by get_workbook_pool().
+    Workbooks acquired from the previous pool are still usable until they are released.
+
+    :param registered_tab_type: RegisteredTabType object used to classify the tabs of pooled workbooks.
+    :param memory_budget: estimated bytes of idle workbooks kept in the pool.
+    :param header_row_no: default row number of the header row in worksheet.
+    :return: the new WorkbookPool object.
+    """
+
+    global default_workbook_pool
+
+    with default_workbook_pool_lock:
+        default_workbook_pool = WorkbookPool(registered_tab_type, memory_budget, header_row_no)
+        return default_workbook_pool
+
+
+def get_workbook_pool():
+    """
+    Return the process wide pool, a pool without RegisteredTabType is created if it was not configured.
+
+    :return: WorkbookPool object.
+    """
+
+    global default_workbook_pool
+
+    with default_workbook_pool_lock:
+        if default_workbook_pool is None: default_workbook_pool = WorkbookPool()
+        return default_workbook_pool
+
+
+def estimate_workbook_size(workbook_obj):
+    """
+    Estimate the memory held by a loaded workbook, by the number of cells in its loaded worksheets.
+
+    :param workbook_obj: loaded WorkbookWithHeader object.
+    :return: estimated bytes.
+    """
+
+    return sum(worksheet_obj.worksheet_object.nrows * worksheet_obj.worksheet_object.ncols * POOL_CELL_SIZE
+               for worksheet_obj in workbook_obj.worksheet_list_by_name.values()
+               if worksheet_obj.worksheet_object is not None)
+
+
+class WorkbookPoolEntry(object):
+    """
+    One loaded workbook in WorkbookPool.
+    """
+
+    __slots__ = ('pool_key', 'load_future', 'reference_count', 'estimated_size', 'cache_lock')
+
+    def __init__(self, pool_key):
+
+        self.pool_key = pool_key                    # tuple of (absolute path, size, mtime in nanoseconds).
+        self.load_future = concurrent.futures.Future()  # Future of the loaded WorkbookWithHeader object.
+        self.reference_count = 0                    # Number of PooledWorkbook objects not released.
+        self.estimated_size = 0                     # Estimated bytes of the loaded workbook.
+        self.cache_lock = threading.RLock()         # Lock of the indexes built on demand in the shared workbook.
+
+
+class PooledWorksheet(object):
+    """
+    Read-only view of a WorksheetWithHeader of a workbook shared by WorkbookPool.
+    Attributes and methods in WORKSHEET_READER_NAME_SET are forwarded to the worksheet, others raise AttributeError.
+    So typed rows are converted by the inferred column schema, load the workbook out of the pool to set another schema.
+    Column indexes are built under the lock of the pool entry, so threads querying the same worksheet do not race.
+    """
+
+    pooled_worksheet_obj = None             # Shared WorksheetWithHeader object.
+    cache_lock = None                       # Lock of the pool entry, held while an index is built.
+
+    def __init__(self, pooled_worksheet_obj, cache_lock):
+
+        self.pooled_worksheet_obj = pooled_worksheet_obj
+        self.cache_lock = cache_lock
+
+    def __getattr__(self, name):
+
+        if name not in WORKSHEET_READER_NAME_SET:
+            raise AttributeError('%s is not available on pooled worksheet, which is shared read-only.' % name)
+
+        return getattr(self.pooled_worksheet_obj, name)
+
+    def get_hash_index(self, keyword):
+        with self.cache_lock:
+            return self.pooled_worksheet_obj.get_hash_index(keyword)
+
+    def get_sorted_index(self, keyword):
+        with self.cache_lock:
+            return self.pooled_worksheet_obj.get_sorted_index(keyword)
+
+    def find_row_no_set(self, keyword, operator, value):
+        with self.cache_lock:
+            return self.pooled_worksheet_obj.find_row_no_set(keyword, operator, value)
+
+    def query_rows(self, condition_list=None, keyword_list=None):
+        """
+        Query the data rows of the worksheet, see WorksheetWithHeader.query_rows().
+        The indexes of the conditions are built under the lock before the rows are streamed.
+
+        :param condition_list: list of (<keyword>, <operator>, <value>), all data rows are matched if it is empty.
+        :param keyword_list: list of keyword in header to be projected. All keywords in header by default.
+        :return: generator of (<row number>, <record dict>) of matched rows, in row order.
+        """
+
+        for condition in condition_list or []: self.find_row_no_set(*condition)
+
+        return self.pooled_worksheet_obj.query_rows(condition_list, keyword_list)
+
+
+class PooledWorkbook(object):
+    """
+    Read-only view of a WorkbookWithHeader shared by WorkbookPool.
+    Attributes and methods in WORKBOOK_READER_NAME_SET are forwarded to the workbook, others raise AttributeError.
+    Worksheets are returned as PooledWorksheet, and join indexes are built under the lock of the pool entry.
+    Attributes holding the shared objects, e.g. worksheet_list_by_name, are forwarded as they are and must not be
+    changed.
+    Release it by release(), or use it in a with block.
+    """
+
+    workbook_pool = None                    # WorkbookPool object the workbook was acquired from.
+    pool_entry = None                       # WorkbookPoolEntry object of the workbook, None after release.
+    pooled_workbook_obj = None              # Shared WorkbookWithHeader object.
+    cache_lock = None                       # Lock of the pool entry, held while an index is built.
+
+    def __init__(self, workbook_pool, pool_entry, pooled_workbook_obj):
+
+        self.workbook_pool = workbook_pool
+        self.pool_entry = pool_entry
+        self.pooled_workbook_obj = pooled_workbook_obj
+        self.cache_lock = pool_entry.cache_lock
+
+    def __getattr__(self, name):
+
+        if name not in WORKBOOK_READER_NAME_SET:
+            raise AttributeError('%s is not available on pooled workbook, which is shared read-only.' % name)
+
+        return getattr(self.pooled_workbook_obj, name)
+
+    def get_worksheet_by_name(self, worksheet_name):
+        """
+        Return the read-only view of the worksheet, see WorkbookWithHeader.get_worksheet_by_name().
+
+        :param worksheet_name: name of worksheet need be returned
+        :return: PooledWorksheet object of the worksheet.
+                 Will raise WorksheetNotFound exception if specified worksheet name was not found in tab list.
+        """
+
+        return PooledWorksheet(self.pooled_workbook_obj.get_worksheet_by_name(worksheet_name), self.cache_lock)
+
+    def get_join_index(self, tab_type, key_keyword):
+        with self.cache_lock:
+            return self.pooled_workbook_obj.get_join_index(tab_type, key_keyword)
+
+    def join_tab_types(self, left_tab_type, right_tab_type, key_keyword, right_key_keyword=None, join_type=JOIN_INNER,
+                       left_keyword_list=None, right_keyword_list=None, join_report=None):
+        """
+        Join the data rows of two tab types on the key column, see WorkbookWithHeader.join_tab_types().
+        The join reads the workbook through this view, so its indexes are built under the lock.
+        """
+
+        return iterate_joined_records(self, left_tab_type, right_tab_type, key_keyword, right_key_keyword, join_type,
+                                      left_keyword_list, right_keyword_list, join_report)
+
+    def query_rows(self, tab_type, condition_list=None, keyword_list=None):
+        """
+        Query the data rows across every tab of specified tab type, see WorkbookWithHeader.query_rows().
+        """
+
+        for tab_name in self.get_tab_list_by_type(tab_type):
+            for row_no, record in self.get_worksheet_by_name(tab_name).query_rows(condition_list, keyword_list):
+                yield tab_name, row_no, record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def release(self):
+        """
+        Return the workbook to the pool. Calling it again has no effect.
+
+        :return: None.
+        """
+
+        if self.pool_entry is None: return
+
+        pool_entry = self.pool_entry
+        self.pool_entry = None
+        self.workbook_pool.release_entry(pool_entry)
+
+
+class WorkbookPool(object):
+    """
+    Thread safe pool of loaded WorkbookWithHeader objects, shared read-only across threads.
+
+    Workbooks are keyed by absolute path, size and mtime, so a changed file is loaded again as a new entry and the
+    previous version is dropped once it is idle. Each workbook is loaded once however many threads acquire it at the
+    same time, the other threads wait for the same load. Entries are reference counted, and idle entries are evicted
+    in least recently used order while the estimated size of the pool is over the memory budget. Entries in use are
+    never evicted, so the budget can be exceeded while they are held.
+
+    Pooled workbooks are loaded fully (not lazily) and do not listen to RegisteredTabType, so they are not changed
+    after load. A change of the registry drops all entries instead, and later acquires load the workbook again.
+    """
+
+    registered_tab_type = None              # RegisteredTabType object used to classify the tabs.
+    memory_budget = None                    # Estimated bytes of idle workbooks kept in the pool.
+    header_row_no = None                    # Default row number of the header row in worksheet.
+    size_estimator = None                   # Callable returning the estimated bytes of a loaded workbook.
+    entry_by_key = None                     # OrderedDict of WorkbookPoolEntry, least recently used first.
+    latest_pool_key_by_path = None          # dict of the pool key of the latest version acquired of each file.
+    estimated_size = None                   # Estimated bytes of the entries in the pool.
+    pool_lock = None                        # Lock of entry_by_key, estimated_size and the counters.
+    hit_count = None                        # Number of acquires answered by a loaded or loading entry.
+    load_count = None                       # Number of workbooks loaded.
+    eviction_count = None                   # Number of entries evicted.
+
+    def __init__(self, registered_tab_type=None, memory_budget=POOL_MEMORY_BUDGET, header_row_no=0,
+                 size_estimator=estimate_workbook_size):
+
+        self.registered_tab_type = registered_tab_type
+        self.memory_budget = memory_budget
+        self.header_row_no = header_row_no
+        self.size_estimator = size_estimator
+        self.entry_by_key = collections.OrderedDict()
+        self.latest_pool_key_by_path = dict()
+        self.estimated_size = 0
+        self.pool_lock = threading.Lock()
+        self.hit_count = 0
+        self.load_count = 0
+        self.eviction_count = 0
+
+        if registered_tab_type is not None: registered_tab_type.add_change_listener(self.on_tab_type_changed)
+
+    @staticmethod
+    def get_pool_key(workbook_path):
+        """
+        Return the pool key of the workbook file, from its stat.
+
+        :param workbook_path: Path of workbook located.
+        :return: tuple of (absolute path, size, mtime in nanoseconds).
+                 Will raise WorkbookNotValid exception if specified path is not found.
+        """
+
+        try:
+            file_stat = os.stat(workbook_path)
+        except OSError:
+            raise WorkbookNotValid(workbook_path, 'Workbook file Not Found.')
+
+        return os.path.abspath(workbook_path), file_stat.st_size, file_stat.st_mtime_ns
+
+    def acquire(self, workbook_path, timeout=None):
+        """
+        Return the shared workbook of the file, loaded once for all threads.
+
+        :param workbook_path: Path of workbook located.
+        :param timeout: seconds to wait for the load by another thread, None to wait without limit.
+        :return: PooledWorkbook object, to be released by release() or used in a with block.
+                 Will raise WorkbookNotValid exception if specified path is invalid or not a workbook file.
+                 Will raise concurrent.futures.TimeoutError if the load does not complete in timeout.
+        """
+
+        pool_key = self.get_pool_key(workbook_path)
+        with self.pool_lock:
+            pool_entry = self.entry_by_key.get(pool_key)
+            is_loader = pool_entry is None
+            if is_loader:
+                pool_entry = WorkbookPoolEntry(pool_key)
+                self.entry_by_key[pool_key] = pool_entry
+                self.latest_pool_key_by_path[pool_key[0]] = pool_key
+            else:
+                self.entry_by_key.move_to_end(pool_key)
+                self.hit_count += 1
+            pool_entry.reference_count += 1
+
+        if is_loader: self.load_entry(pool_entry, workbook_path)
+
+        try:
+            pooled_workbook_obj = pool_entry.load_future.result(timeout)
+        except BaseException:
+            self.release_entry(pool_entry)
+            raise
+
+        return PooledWorkbook(self, pool_entry, pooled_workbook_obj)
+
+    def load_entry(self, pool_entry, workbook_path):
+        """
+        Load the workbook of a new entry, outside of the pool lock. A failed entry is removed from the pool, so the
+        workbook is loaded again on next acquire.
+
+        :param pool_entry: WorkbookPoolEntry object to be loaded.
+        :param workbook_path: Path of workbook located.
+        :return: None. The load_future of the entry will be resolved.
+        """
+
+        try:
+            # The registry is given without listening to it, the pool drops its entries on registry change instead.
+            workbook_obj = WorkbookWithHeader()
+            workbook_obj.registered_tab_type = self.registered_tab_type
+            workbook_obj.set_default_header_row_no(self.header_row_no)
+            workbook_obj.load_workbook(workbook_path)
+            # Built before the workbook is shared, so typed extraction only reads the worksheets.
+            for worksheet_obj in workbook_obj.worksheet_list_by_name.values(): worksheet_obj.build_column_converters()
+            estimated_size = self.size_estimator(workbook_obj)
+            # The file changed between the stat of the pool key and the load, the workbook may be the new version.
+            is_file_changed = self.get_pool_key(workbook_path) != pool_entry.pool_key
+        except BaseException as workbook_error:
+            with self.pool_lock:
+                if self.entry_by_key.get(pool_entry.pool_key) is pool_entry: del self.entry_by_key[pool_entry.pool_key]
+            pool_entry.load_future.set_exception(workbook_error)
+            return
+
+        with self.pool_lock:
+            self.load_count += 1
+            # Handed to the threads waiting for it, but not kept under the key of another version.
+            if is_file_changed and self.entry_by_key.get(pool_entry.pool_key) is pool_entry:
+                self.remove_entry(pool_entry)
+            if self.entry_by_key.get(pool_entry.pool_key) is pool_entry:
+                pool_entry.estimated_size = estimated_size
+                self.estimated_size += estimated_size
+                # Idle entries of previous versions of the file will not be acquired again.
+                for pool_key, other_entry in list(self.entry_by_key.items()):
+                    if pool_key[0] == pool_entry.pool_key[0] and other_entry is not pool_entry and \
+                            other_entry.reference_count == 0 and other_entry.load_future.done():
+                        self.remove_entry(other_entry)
+                self.evict_idle_entries()
+        pool_entry.load_future.set_result(workbook_obj)
+
+    def release_entry(self, pool_entry):
+        """
+        Release one reference of the entry, and evict idle entries over the memory budget.
+        An idle entry of a previous version of the file is removed, it will not be acquired again.
+
+        :param pool_entry: WorkbookPoolEntry object.
+        :return: None.
+        """
+
+        with self.pool_lock:
+            pool_entry.reference_count -= 1
+            if pool_entry.reference_count == 0 and self.entry_by_key.get(pool_entry.pool_key) is pool_entry and \
+                    self.latest_pool_key_by_path.get(pool_entry.pool_key[0]) != pool_entry.pool_key:
+                self.remove_entry(pool_entry)
+            self.evict_idle_entries()
+
+    def evict_idle_entries(self):
+        """
+        Evict idle entries in least recently used order until the pool is within the memory budget.
+        The pool lock should be held by the caller.
+
+        :return: None.
+        """
+
+        for pool_entry in list(self.entry_by_key.values()):
+            if self.estimated_size <= self.memory_budget: break
+            if pool_entry.reference_count == 0 and pool_entry.load_future.done():
+                self.remove_entry(pool_entry)
+                self.eviction_count += 1
+
+    def remove_entry(self, pool_entry):
+        """
+        Remove the entry from the pool, the pool lock should be held by the caller.
+        PooledWorkbook objects of the entry are still usable until they are released.
+
+        :param pool_entry: WorkbookPoolEntry object.
+        :return: None.
+        """
+
+        del self.entry_by_key[pool_entry.pool_key]
+        self.estimated_size -= pool_entry.estimated_size
+        if self.latest_pool_key_by_path.get(pool_entry.pool_key[0]) == pool_entry.pool_key:
+            del self.latest_pool_key_by_path[pool_entry.pool_key[0]]
+
+    def clear(self):
+        """
+        Remove all entries from the pool, workbooks in use or being loaded are still returned to their holders.
+
+        :return: None.
+        """
+
+        with self.pool_lock:
+            for pool_entry in list(self.entry_by_key.values()):
+                self.remove_entry(pool_entry)
+
+    def on_tab_type_changed(self, change_event, tab_type, keyword):
+        """
+        Listener of RegisteredTabType, the classification of pooled workbooks is out of date after a change.
+
+        :return: None. All loaded entries are removed.
+        """
+
+        self.clear()
+
+    def get_statistics(self):
+        """
+        Return the statistics of the pool.
+
+        :return: dict of entry_count, in_use_count, estimated_size, memory_budget, hit_count, load_count and
+                 eviction_count.
+        """
+
+        with self.pool_lock:
+            return {
+                'entry_count': len(self.entry_by_key),
+                'in_use_count': sum(1 for pool_entry in self.entry_by_key.values() if pool_entry.reference_count > 0),
+                'estimated_size': self.estimated_size,
+                'memory_budget': self.memory_budget,
+                'hit_count': self.hit_count,
+                'load_count': self.load_count,
+                'eviction_count': self.eviction_count,
+            }
@@ -1,13 +1,168 @@
 # encoding: utf-8
 
+import asyncio
+import bisect
+import concurrent.futures
+import functools
+import hashlib
+import io
+import mmap
 import os
+import re
+import sys
+import threading
+import weakref
+from collections import namedtuple
 import xlrd
 from internallogging import *
+from instrumentation import *
+from readerbackend import *
+from columnschema import *
+from exporter import *
+from tabtyperule import *
+from tabtypejoin import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Change events emitted by RegisteredTabType to the registered listeners.
+TAB_TYPE_ADDED = 'tab_type_added'
+TAB_TYPE_KEYWORD_ADDED = 'tab_type_keyword_added'
+TAB_TYPE_KEYWORD_REMOVED = 'tab_type_keyword_removed'
+TAB_TYPE_RULE_ADDED = 'tab_type_rule_added'
+TAB_TYPE_RULE_REMOVED = 'tab_type_rule_removed'
+
+# Layouts of the key value pairs in Parameter section.
+PARAMETER_KEYS_IN_HEADER = 'keys_in_header'
+PARAMETER_KEYS_IN_ROWS = 'keys_in_rows'
+
+# Text column extracted by WorksheetWithHeader.to_columns(), codes are the index of each value in categories.
+CategoricalColumn = namedtuple('CategoricalColumn', ['categories', 'codes'])
+
+# Operators of the query condition (<keyword>, <operator>, <value>).
+QUERY_EQUAL = '=='                          # value is the expected cell value.
+QUERY_IN = 'in'                             # value is a list of expected cell values.
+QUERY_RANGE = 'range'                       # value is (low, high), both inclusive, None for open end.
+
+# Reader backends to load workbook, besides the backends registered in readerbackend.
+READER_BACKEND_AUTO = 'auto'                # Route each workbook to the backend of its format.
+
+# Name used as workbook_path of the workbook loaded from contents in memory.
+WORKBOOK_CONTENTS_NAME = '<workbook contents>'
+
+
+# Shared executor of WorkbookWithHeader.aload_workbook(), created on first use.
+async_load_executor = None
+async_load_max_workers = 4
+async_load_executor_lock = threading.Lock()
+
+
+def set_async_load_concurrency(max_workers):
+    """
+    Set the number of workbooks parsed concurrently by WorkbookWithHeader.aload_workbook().
+
+    :param max_workers: max number of worker threads of the shared executor.
+    :return: None. The shared executor is replaced on next use. The previous executor is not shut down, as callers
+             may still hold it, its threads exit once it is garbage collected.
+    """
+
+    global async_load_executor, async_load_max_workers
+
+    with async_load_executor_lock:
+        async_load_executor = None
+        async_load_max_workers = max_workers
+
+
+def get_async_load_executor():
+    """
+    Return the shared executor of WorkbookWithHeader.aload_workbook().
+
+    :return: ThreadPoolExecutor object.
+    """
+
+    global async_load_executor
+
+    with async_load_executor_lock:
+        if async_load_executor is None:
+            async_load_executor = concurrent.futures.ThreadPoolExecutor(max_workers=async_load_max_workers,
+                                                                        thread_name_prefix='aload_workbook')
+        return async_load_executor
+
+
+def get_file_fingerprint(workbook_path):
+    """
+    Return the fingerprint of the workbook file from its stat, the content is not read.
+
+    :param workbook_path: Path of workbook located.
+    :return: tuple of (absolute path, size, mtime in nanoseconds).
+    """
+
+    file_stat = os.stat(workbook_path)
+    return os.path.abspath(workbook_path), file_stat.st_size, file_stat.st_mtime_ns
+
+
+def get_file_content_hash(workbook_path):
+    """
+    Return the hash of the content of the workbook file, the whole file is read.
+
+    :param workbook_path: Path of workbook located.
+    :return: sha1 hex digest of the content.
+    """
+
+    content_hash = hashlib.sha1()
+    with open(workbook_path, 'rb') as workbook_file:
+        for file_block in iter(lambda: workbook_file.read(1024 * 1024), b''):
+            content_hash.update(file_block)
+
+    return content_hash.hexdigest()
+
+
+def get_sheet_digest(sheet_obj):
+    """
+    Return the digest of the cell types and values of the sheet.
+
+    :param sheet_obj: xlrd sheet or MemorySheet object.
+    :return: sha1 hex digest of the sheet content.
+    """
+
+    sheet_hash = hashlib.sha1(repr((sheet_obj.nrows, sheet_obj.ncols)).encode('utf-8'))
+    for row_no in range(sheet_obj.nrows):
+        sheet_hash.update(repr((sheet_obj.row_types(row_no), sheet_obj.row_values(row_no))).encode('utf-8'))
+
+    return sheet_hash.hexdigest()
+
+
+def detect_header_row_no(row_iterable, registered_tab_type):
+    """
+    Detect the header row among the first rows of a worksheet.
+    Each row is scored by the number of its cells registered as keyword in registered_tab_type, the first row with
+    the highest score is the header row.
+
+    :param row_iterable: iterable of (<row number>, [<SheetCell>, ......]) of the rows read as header row.
+    :param registered_tab_type: RegisteredTabType object with registered keywords.
+    :return: the detected header row number, or None if no registered keyword was found.
+    """
+
+    detected_row_no = None
+    highest_score = 0
+    for row_no, cell_list in row_iterable:
+        score = sum(1 for cell in cell_list
+                    if cell.ctype not in NO_VALUE_CELL_TYPES and registered_tab_type.is_registered_keyword(cell.value))
+        if score > highest_score:
+            detected_row_no = row_no
+            highest_score = score
+
+    return detected_row_no
 
 
 class WorkbookNotValid(Exception):
 
     def __init__(self, expression, message):
+        # Pass the arguments to Exception, so the exception can be pickled back from worker process.
+        super(WorkbookNotValid, self).__init__(expression, message)
         self.expression = expression
         self.message = message
 
@@ -25,12 +180,81 @@ class RegisteredTabType(object):
     """
 
     type_identify_list = None               # List of the type and related identifying keywords.
+    tab_type_list_by_keyword = None         # Inverted index of type_identify_list, keyword to list of tab type.
+    tab_type_order = None                   # Registration order of each tab type, to keep lookup result ordered.
     internal_logger = None                  # Internal logger object.
     multiple_type_allowed = None            # Whether to allow one keyword to be registered for more than one type of tab.
+    change_listener_list = None             # List of references to the listeners of registry change events.
+    rule_by_id = None                       # dict of registered TabTypeRule by rule id.
+    next_rule_id = None                     # Rule id of the next registered rule.
+    rule_matcher = None                     # TabTypeRuleMatcher compiled from rule_by_id, None until next lookup.
 
     def __init__(self):
         self.type_identify_list = dict()
+        self.tab_type_list_by_keyword = dict()
+        self.tab_type_order = dict()
         self.multiple_type_allowed = False
+        self.change_listener_list = []
+        self.rule_by_id = dict()
+        self.next_rule_id = 0
+
+    def __getstate__(self):
+        # Listeners are bound to local objects, they are not passed when the registry is pickled to other process.
+        state = self.__dict__.copy()
+        state['change_listener_list'] = []
+        return state
+
+    def add_change_listener(self, listener):
+        """
+        Add a listener of registry change events.
+        The listener will be called as listener(change_event, tab_type, keyword) where change_event is one of
+        TAB_TYPE_ADDED, TAB_TYPE_KEYWORD_ADDED, TAB_TYPE_KEYWORD_REMOVED, TAB_TYPE_RULE_ADDED and
+        TAB_TYPE_RULE_REMOVED. keyword is None for TAB_TYPE_ADDED, and the TabTypeRule for the rule events.
+
+        Bound methods are referenced weakly, so the registry does not keep its listening objects alive.
+
+        :param listener: callable to be notified.
+        :return: None.
+        """
+
+        if not callable(listener): return
+
+        self.remove_change_listener(listener)
+        if hasattr(listener, '__self__'):
+            self.change_listener_list.append(weakref.WeakMethod(listener))
+        else:
+            self.change_listener_list.append(lambda: listener)
+
+    def remove_change_listener(self, listener):
+        """
+        Remove a listener of registry change events.
+
+        :param listener: callable added by add_change_listener().
+        :return: None.
+        """
+
+        self.change_listener_list = [listener_ref for listener_ref in self.change_listener_list
+                                     if listener_ref() is not None and listener_ref() != listener]
+
+    def notify_change_listener(self, change_event, tab_type, keyword=None):
+        """
+        Call every alive listener with the change event. References to garbage collected listeners are dropped.
+
+        :param change_event: one of TAB_TYPE_ADDED, TAB_TYPE_KEYWORD_ADDED, TAB_TYPE_KEYWORD_REMOVED,
+                             TAB_TYPE_RULE_ADDED and TAB_TYPE_RULE_REMOVED.
+        :param tab_type: the tab type changed.
+        :param keyword: the keyword or the TabTypeRule added or removed.
+        :return: None.
+        """
+
+        alive_listener_list = []
+        for listener_ref in self.change_listener_list:
+            listener = listener_ref()
+            if listener is None: continue
+            alive_listener_list.append(listener_ref)
+            listener(change_event, tab_type, keyword)
+
+        self.change_listener_list = alive_listener_list
 
     def registered_one_keyword_to_multiple_type(self, multiple_type_allowed):
         if multiple_type_allowed: self.multiple_type_allowed = multiple_type_allowed is True
@@ -52,6 +276,12 @@ class RegisteredTabType(object):
             ......
         }
 
+        tab_type_list_by_keyword is kept as the inverted index of type_identify_list:
+        {
+            <keyword>: [ <type of tab>, <type of tab>, ...... ],
+            ......
+        }
+
         :param tab_type: A user defined tab type string.
         :param identifying_keywords: The keyword related to tab type. Should be a element in header row.
         :return: None. The identifying keyword was add to related tab type in the type_identify_list
@@ -62,13 +292,119 @@ class RegisteredTabType(object):
 
         # Check if identifying_keywords was already registered.
         if not self.multiple_type_allowed:
-            for registered_tab_type in self.type_identify_list.keys():
-                if identifying_keywords in self.type_identify_list[registered_tab_type]: return
+            if self.tab_type_list_by_keyword.get(identifying_keywords): return
 
         # Registered the keyword.
-        if tab_type not in self.type_identify_list.keys(): self.type_identify_list[tab_type] = []
-        if identifying_keywords not in self.type_identify_list[tab_type]:
+        self.add_tab_type(tab_type)
+
+        tab_type_list = self.tab_type_list_by_keyword.setdefault(identifying_keywords, [])
+        if tab_type not in tab_type_list:
+            tab_type_list.append(tab_type)
             self.type_identify_list[tab_type].append(identifying_keywords)
+            self.notify_change_listener(TAB_TYPE_KEYWORD_ADDED, tab_type, identifying_keywords)
+
+    def add_tab_type(self, tab_type):
+        """
+        Add the tab type to the registry if it was not registered yet.
+
+        :param tab_type: A user defined tab type string.
+        :return: None.
+        """
+
+        if tab_type not in self.type_identify_list.keys():
+            self.type_identify_list[tab_type] = []
+            self.tab_type_order[tab_type] = len(self.tab_type_order)
+            self.notify_change_listener(TAB_TYPE_ADDED, tab_type)
+
+    def registered_tab_type_rule(self, tab_type, rule_type, keywords=None, patterns=None, ignore_case=False):
+        """
+        A tab type rule identifies the tab type by a combination of elements in header row, besides the identifying
+        keywords registered by registered_tab_type_identify().
+        e.g.:
+            RULE_ALL_OF with keywords ['Section', 'Key'] matches only the header having both 'Section' and 'Key'.
+            RULE_NONE_OF with keywords ['Deprecated'] excludes the header having 'Deprecated' from the tab type.
+            RULE_ANY_OF with patterns ['Test ?Case.*'] and ignore_case matches 'testcase id', 'Test Case Name', ...
+
+        A tab is of the tab type if any of its identifying keywords or any_of/all_of rules matches, and none of its
+        none_of rules matches. Each keyword or pattern of the rule is a token, a keyword token matches the equal
+        keyword in header (after whitespace is collapsed and case is folded if ignore_case), and a pattern token
+        matches the keyword in header if the regular expression matches the whole keyword. Patterns can not have
+        named groups or refer to groups, since all patterns are compiled into one regular expression.
+
+        Rules are compiled on next lookup, into one TabTypeRuleMatcher with all registered rules.
+
+        :param tab_type: A user defined tab type string.
+        :param rule_type: RULE_ANY_OF, RULE_ALL_OF or RULE_NONE_OF.
+        :param keywords: list of keyword tokens.
+        :param patterns: list of regular expression tokens.
+        :param ignore_case: True to match the tokens case insensitively.
+        :return: rule id to unregister the rule, or None if no token was given.
+                 Will raise ValueError if the rule type is unknown or a pattern has named groups or group references,
+                 and re.error if a pattern is not valid.
+        """
+
+        if rule_type not in [RULE_ANY_OF, RULE_ALL_OF, RULE_NONE_OF]:
+            raise ValueError('Unknown tab type rule %s' % rule_type)
+
+        if not tab_type: return None
+        keywords = tuple(keywords or [])
+        patterns = tuple(patterns or [])
+        if not keywords and not patterns: return None
+
+        # Fail on registration instead of the lookup of every later workbook.
+        for pattern in patterns: validate_pattern(pattern, ignore_case is True)
+
+        tab_type_rule = TabTypeRule(tab_type, rule_type, keywords, patterns, ignore_case is True)
+
+        self.add_tab_type(tab_type)
+        rule_id = self.next_rule_id
+        self.next_rule_id += 1
+        self.rule_by_id[rule_id] = tab_type_rule
+        self.rule_matcher = None
+        self.notify_change_listener(TAB_TYPE_RULE_ADDED, tab_type, tab_type_rule)
+
+        return rule_id
+
+    def unregistered_tab_type_rule(self, rule_id):
+        """
+        Unregistered the rule registered by registered_tab_type_rule().
+
+        :param rule_id: rule id returned by registered_tab_type_rule().
+        :return: None. specified rule will be removed from rule_by_id
+        """
+
+        tab_type_rule = self.rule_by_id.pop(rule_id, None)
+        if tab_type_rule is None: return
+
+        self.rule_matcher = None
+        self.notify_change_listener(TAB_TYPE_RULE_REMOVED, tab_type_rule.tab_type, tab_type_rule)
+
+    def get_rules_by_tab_type(self, tab_type_name):
+        """
+        Return the registered rules by given tab type.
+
+        :param tab_type_name: given tab type for querying
+        :return: dict of TabTypeRule by rule id for given tab type.
+        """
+
+        return dict((rule_id, tab_type_rule) for rule_id, tab_type_rule in self.rule_by_id.items()
+                    if tab_type_rule.tab_type == tab_type_name)
+
+    def get_rule_matcher(self):
+        """
+        Return the matcher compiled from the registered rules, it is compiled again after the rules are changed.
+
+        :return: TabTypeRuleMatcher object, or None if no rule was registered.
+        """
+
+        if not self.rule_by_id: return None
+
+        rule_matcher = self.rule_matcher
+        if rule_matcher is None:
+            rule_matcher = TabTypeRuleMatcher(self.rule_by_id.values())
+            self.rule_matcher = rule_matcher
+
+        return rule_matcher
 
     def unregistered_tab_type_identify(self, tab_type, identifying_keywords):
         """
@@ -81,6 +417,12 @@ class RegisteredTabType(object):
         if (tab_type in self.type_identify_list.keys()) and (identifying_keywords in self.type_identify_list[tab_type]):
             self.type_identify_list[tab_type].remove(identifying_keywords)
 
+            self.tab_type_list_by_keyword[identifying_keywords].remove(tab_type)
+            if not self.tab_type_list_by_keyword[identifying_keywords]:
+                del self.tab_type_list_by_keyword[identifying_keywords]
+
+            self.notify_change_listener(TAB_TYPE_KEYWORD_REMOVED, tab_type, identifying_keywords)
+
     def get_identifying_keywords_by_tab_type(self, tab_type_name):
         """
         Return the registered identifying keywords by given tab type.
@@ -91,6 +433,22 @@ class RegisteredTabType(object):
         if tab_type_name in self.type_identify_list.keys():
             return self.type_identify_list[tab_type_name].copy()
 
+    def is_registered_keyword(self, keyword):
+        """
+        Return whether the keyword was registered for any tab type, or matches a token of any any_of or all_of rule.
+
+        :param keyword: keyword need be checked.
+        :return: True if the keyword was registered.
+        """
+
+        try:
+            if keyword in self.tab_type_list_by_keyword: return True
+        except TypeError:
+            return False
+
+        rule_matcher = self.get_rule_matcher()
+        return rule_matcher is not None and rule_matcher.is_matched_keyword(keyword)
+
     def get_registered_tab_type_list(self):
         """
         Return the list of registered tab type.
@@ -103,21 +461,56 @@ class RegisteredTabType(object):
         """
         Identify the tab type by given list of keyword.
         Multiple tab type will be returned if keywords in more than one kind of type was found.
+        Each keyword is looked up in tab_type_list_by_keyword, so the cost depends on the number of given keywords
+        only. The found tab types are returned in the order they were registered.
+        If rules were registered, the keywords are matched with the compiled rules in one more pass, tab types
+        matched by any_of or all_of rules are added and tab types matched by none_of rules are removed.
 
         :param keyword_list: list of keyword need be parsed.
         :return: list of found tab type.
         """
 
-        tab_type_list = []
+        tab_type_set = set()
+
+        if isinstance(keyword_list, (list, tuple, set, frozenset)):
+            keyword_set = set(keyword_list)
+            for keyword in keyword_set:
+                tab_type_set.update(self.tab_type_list_by_keyword.get(keyword, []))
+
+            rule_matcher = self.get_rule_matcher()
+            if rule_matcher is not None:
+                matched_tab_type_set, excluded_tab_type_set = rule_matcher.match(keyword_set)
+                tab_type_set.update(matched_tab_type_set)
+                tab_type_set.difference_update(excluded_tab_type_set)
+
+        return sorted(tab_type_set, key=self.tab_type_order.get)
+
+
+class WorksheetMetadata(object):
+    """
+    Compact metadata of a worksheet, detached from the sheet data.
+    """
+
+    __slots__ = ('worksheet_name', 'header_row_no', 'keywords_in_header', 'nrows', 'ncols')
+
+    def __init__(self, worksheet_name, header_row_no, keywords_in_header, nrows=None, ncols=None):
+
+        self.worksheet_name = sys.intern(worksheet_name)
+        self.header_row_no = header_row_no
+        self.keywords_in_header = tuple(sys.intern(keyword) if isinstance(keyword, str) else keyword
+                                        for keyword in keywords_in_header)
+        self.nrows = nrows                  # Row count of the worksheet, None if it is not known.
+        self.ncols = ncols                  # Column count of the worksheet, None if it is not known.
 
-        if isinstance(keyword_list, list):
-            for tab_type in self.type_identify_list.keys():
-                for tab_keyword in self.type_identify_list[tab_type]:
-                    if tab_keyword in keyword_list:
-                        tab_type_list.append(tab_type)
-                        break
+    def __eq__(self, other):
+        if not isinstance(other, WorksheetMetadata): return NotImplemented
+        return all(getattr(self, slot_name) == getattr(other, slot_name) for slot_name in self.__slots__)
 
-        return tab_type_list.copy()
+    def __hash__(self):
+        return hash((self.worksheet_name, self.header_row_no, self.keywords_in_header))
+
+    def __repr__(self):
+        return 'WorksheetMetadata(%r, %r, %r, %r, %r)' % tuple(getattr(self, slot_name) for slot_name in self.__slots__)
 
 
 class WorkbookWithHeader(object):
@@ -127,10 +520,28 @@ class WorkbookWithHeader(object):
 
     default_header_row_no = None            # Default settings of the row number of header locate
     registered_tab_type = None              # Object of registered tab type
-    workbook_obj = None                     # Object of workbook used in this class
+    workbook_obj = None                     # ReaderBackend object of workbook used in this class
     workbook_path = None                    # Path of workbook located.
+    workbook_mmap = None                    # mmap object of the workbook contents mapped by load_workbook_contents().
     tab_list_by_type = None                 # dict of tab name in opened workbook, grouped by tab type in keys.
+    tab_list = None                         # list of tab name in opened workbook.
     worksheet_list_by_name = None           # dict of WorksheetWithHeader objects relate to worksheets in the workbook.
+    worksheet_metadata_by_name = None       # dict of WorksheetMetadata of each loaded or classified tab, kept after
+                                            # unload. The only copy of the header keywords of the workbook object.
+    header_cache = None                     # Object of header cache, None if cache is disabled.
+    header_cache_fingerprint = None         # Fingerprint of the workbook file, until it is stored to header cache.
+    file_stat_fingerprint = None            # (size, mtime) of the workbook file when it was loaded.
+    sheet_digest_by_name = None             # dict of content digest of each loaded tab, computed once by reload().
+    workbook_lock = None                    # Lock held by reload() and the methods reading the workbook state, so
+                                            # the file watching thread does not change it while it is read.
+    watch_thread = None                     # Thread of file watching mode.
+    watch_stop_event = None                 # Event to stop the file watching thread.
+    tab_list_by_type_built = None           # Whether tab_list_by_type was built and can be updated incrementally.
+    lazy_load = None                        # Whether to load worksheets on demand instead of all at once.
+    use_mmap = None                         # Whether the reader backend memory maps the workbook file.
+    header_scan_row_count = None            # Number of top rows scanned to detect header row, 0 to use default row.
+    reader_backend = None                   # Reader backend to load tab names and header keywords.
+    join_index_by_key = None                # dict of TabTypeJoinIndex by (tab type, key keyword), reused across joins.
     internal_logger = None                  # Internal logger object.
 
     def __init__(self):
@@ -138,18 +549,33 @@ class WorkbookWithHeader(object):
         self.internal_logger = get_internal_logger()
         self.default_header_row_no = 0
         self.tab_list_by_type = dict()
+        self.tab_list = []
         self.worksheet_list_by_name = dict()
+        self.worksheet_metadata_by_name = dict()
+        self.sheet_digest_by_name = dict()
+        self.workbook_lock = threading.RLock()
+        self.tab_list_by_type_built = False
+        self.lazy_load = False
+        self.use_mmap = True
+        self.header_scan_row_count = 0
+        self.reader_backend = READER_BACKEND_XLRD
+        self.join_index_by_key = dict()
 
     def set_tab_type_list(self, tab_type_list):
         """
         Give a RegisteredTabType to the workbook object.
+        The workbook listens to the change events of the registry, and updates tab_list_by_type incrementally.
 
         :param tab_type_list: A RegisteredTabType object need passed to workbook object.
         :return: None.
         """
 
         if isinstance(tab_type_list, RegisteredTabType):
+            if self.registered_tab_type is not None:
+                self.registered_tab_type.remove_change_listener(self.on_tab_type_changed)
+
             self.registered_tab_type = tab_type_list
+            self.registered_tab_type.add_change_listener(self.on_tab_type_changed)
 
     def set_default_header_row_no(self, header_row_no):
         """
@@ -162,45 +588,656 @@ class WorkbookWithHeader(object):
         try:
             if int(header_row_no) >= 0: self.default_header_row_no = header_row_no
         except Exception:
-            self.internal_logger.exception("Error occurs when set default header row number to %s" % header_row_no)
+            self.internal_logger.exception('Error occurs when set default header row number to %s', header_row_no)
+
+    def set_header_auto_detect(self, header_scan_row_count):
+        """
+        Set the header row to be detected in each worksheet, instead of using the default header row number.
+        Only the first header_scan_row_count rows of each worksheet are scanned, once when the worksheet is loaded.
+        The row with most keywords registered in RegisteredTabType is used as header row. The default header row
+        number is used if no registered keyword was found. Header cache is not used in auto detect mode, as the
+        detected header row depends on the registered keywords.
+
+        :param header_scan_row_count: number of rows to scan, 0 to disable auto detection.
+        :return: None. header_scan_row_count was changed if it is valid (is positive integer)
+        """
+
+        try:
+            if int(header_scan_row_count) >= 0: self.header_scan_row_count = int(header_scan_row_count)
+        except Exception:
+            self.internal_logger.exception('Error occurs when set header scan row count to %s', header_scan_row_count)
+
+    def set_reader_backend(self, reader_backend):
+        """
+        Set the reader backend to load the workbook.
+
+        Any backend registered in readerbackend can be used, e.g. READER_BACKEND_XLRD, READER_BACKEND_CSV or
+        READER_BACKEND_XLSX_STREAM. With READER_BACKEND_AUTO, each workbook is routed to the backend of its format.
+        In lazy mode, READER_BACKEND_XLSX_STREAM streams each sheet XML of .xlsx workbook only up to its header row
+        to classify the tabs, so classification cost depends on the header size instead of the workbook size. A
+        sheet is parsed only when its worksheet is requested.
+
+        :param reader_backend: name of the reader backend.
+        :return: None. reader_backend will be updated if it is valid, and takes effect from next load_workbook().
+        """
+
+        if reader_backend == READER_BACKEND_AUTO or reader_backend in reader_backend_class_by_name.keys():
+            self.reader_backend = reader_backend
+
+    def set_lazy_load(self, lazy_load):
+        """
+        Set whether worksheets are loaded on demand.
+
+        In lazy mode the workbook is opened with on demand sheet loading, and the WorksheetWithHeader object of a
+        tab is only built when get_worksheet_by_name() or build_tab_list_by_type() touches it.
+        Loaded worksheets can be released again by unload_worksheet().
+
+        :param lazy_load: True to load worksheets on demand.
+        :return: None. lazy_load will be updated, and takes effect from next load_workbook().
+        """
+
+        self.lazy_load = lazy_load is True
+
+    def set_use_mmap(self, use_mmap):
+        """
+        Set whether the workbook file is memory mapped.
+        When enabled, .xls file is memory mapped by xlrd and .xlsx file is read by zipfile from the file directly,
+        so the workbook bytes are not copied into a Python buffer.
+
+        :param use_mmap: True to memory map the workbook file.
+        :return: None. use_mmap will be updated, and takes effect from next load_workbook().
+        """
+
+        self.use_mmap = use_mmap is True
+
+    def set_header_cache(self, header_cache):
+        """
+        Give a header cache to the workbook object, e.g. a headercache.WorkbookHeaderCache object.
+        When the file fingerprint of the workbook matches the cache, tab names and header keywords are answered
+        from the cache, and the workbook file is only opened when a worksheet is requested.
+
+        :param header_cache: the header cache object, or None to disable the cache.
+        :return: None.
+        """
+
+        self.header_cache = header_cache
 
     def load_workbook(self, workbook_path):
         """
         Open specified workbook file and load all tab name to the list.
+        In lazy mode only the tab names are loaded, worksheets are loaded when they are requested.
+        If the header cache has the workbook, tab names and keywords are loaded from cache without opening the file.
 
-        :param workbook_path: Path of workbook located.
+        :param workbook_path: Path of workbook located,
+                              or the workbook contents as bytes, bytearray, memoryview or file-like object.
         :return: None.
                     workbook_path and list_of_worksheet will be updated.
                     Will raise WorkbookNotValid exception if specified path is invalid or not a workbook file.
         """
 
-        if workbook_path:
-            if not os.path.exists(workbook_path):
-                raise WorkbookNotValid(workbook_path, 'Workbook file Not Found.')
-            else:
+        if isinstance(workbook_path, (bytes, bytearray, memoryview)) or hasattr(workbook_path, 'read'):
+            self.load_workbook_contents(workbook_path)
+            return
+
+        with self.workbook_lock:
+            if workbook_path:
+                if not os.path.exists(workbook_path):
+                    raise WorkbookNotValid(workbook_path, 'Workbook file Not Found.')
+
+                file_stat = os.stat(workbook_path)
+                header_cache_fingerprint = None
+                keyword_list_by_name = None
+                if self.header_cache is not None and not self.header_scan_row_count:
+                    header_cache_fingerprint = self.header_cache.get_fingerprint(
+                        workbook_path, self.get_reader_backend_name(workbook_path))
+                    keyword_list_by_name = self.header_cache.get(header_cache_fingerprint, self.default_header_row_no)
+
+                previous_workbook_obj = self.workbook_obj
+                if keyword_list_by_name is None:
+                    self.open_workbook_file(workbook_path)
+                else:
+                    self.workbook_obj = None
+                self.close_replaced_workbook(previous_workbook_obj)
+
+                self.workbook_path = workbook_path
+                self.file_stat_fingerprint = (file_stat.st_size, file_stat.st_mtime_ns)
+                self.header_cache_fingerprint = None if keyword_list_by_name is not None else header_cache_fingerprint
+                self.clear_loaded_worksheets()
+
+                if keyword_list_by_name is not None:
+                    self.tab_list = list(keyword_list_by_name.keys())
+                    for tab_name, keyword_list in keyword_list_by_name.items():
+                        self.worksheet_metadata_by_name[tab_name] = WorksheetMetadata(
+                            tab_name, self.default_header_row_no, keyword_list)
+                    self.build_tab_list_by_type()
+                    return
+
+                self.load_all_worksheets()
+
+    def load_workbook_contents(self, file_contents, workbook_name=WORKBOOK_CONTENTS_NAME):
+        """
+        Load the workbook from contents in memory, without writing it to a file.
+        For a file-like object backed by a real file at its start, the file is memory mapped instead of being read
+        into memory, and the mapping is closed when the workbook is released or replaced. Otherwise the object is
+        read from its current position. Header cache is not used for workbook loaded from contents.
+        Contents of .xlsx workbook are read in place by READER_BACKEND_XLSX_STREAM, also when the reader backend is
+        READER_BACKEND_XLRD, so they are not copied. Contents of .xls workbook are parsed by xlrd, which copies the
+        workbook stream out of the compound document, and CSV contents are decoded to text.
+
+        :param file_contents: the workbook contents as bytes, bytearray, memoryview or file-like object.
+        :param workbook_name: name used as workbook_path in messages.
+        :return: None.
+                    Will raise WorkbookNotValid exception if the contents is not a workbook.
+        """
+
+        workbook_mmap = None
+        if hasattr(file_contents, 'read'):
+            file_contents = self.read_workbook_contents(file_contents)
+            if isinstance(file_contents, mmap.mmap): workbook_mmap = file_contents
+
+        with self.workbook_lock:
+            previous_workbook_obj = self.workbook_obj
+            try:
+                if not len(file_contents): raise WorkbookNotValid(workbook_name, 'Workbook contents is empty.')
+                self.open_workbook_file(workbook_name, file_contents)
+            except Exception:
+                if workbook_mmap is not None: workbook_mmap.close()
+                raise
+
+            self.close_replaced_workbook(previous_workbook_obj)
+            self.workbook_mmap = workbook_mmap
+            self.workbook_path = workbook_name
+            self.file_stat_fingerprint = None
+            self.header_cache_fingerprint = None
+            self.clear_loaded_worksheets()
+            self.load_all_worksheets()
+
+    @staticmethod
+    def read_workbook_contents(file_obj):
+        """
+        Return the contents of the file-like object from its current position, memory mapped if it is backed by a
+        real file and positioned at the start of the file.
+
+        :param file_obj: file-like object of the workbook.
+        :return: mmap object or bytes of the contents.
+        """
+
+        try:
+            # The mapping starts at the start of the file, whatever the position of the file object.
+            if file_obj.tell() == 0: return mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            pass
+
+        return file_obj.read()
+
+    def close_replaced_workbook(self, previous_workbook_obj):
+        """
+        Close the reader backend replaced by a new load, then the memory mapped contents it was reading.
+
+        :param previous_workbook_obj: the reader backend before the load, or None.
+        :return: None. workbook_mmap will be None.
+        """
+
+        if previous_workbook_obj is not None and previous_workbook_obj is not self.workbook_obj:
+            previous_workbook_obj.close()
+        self.close_workbook_mmap()
+
+    def close_workbook_mmap(self):
+        """
+        Close the memory mapped workbook contents, once the reader backend using it is released or replaced.
+
+        :return: None. workbook_mmap will be None.
+        """
+
+        if self.workbook_mmap is not None: self.workbook_mmap.close()
+        self.workbook_mmap = None
+
+    def clear_loaded_worksheets(self):
+        """
+        Clear the worksheets, keywords and tab list by type of previous loaded workbook.
+
+        :return: None.
+        """
+
+        self.worksheet_list_by_name.clear()
+        self.worksheet_metadata_by_name.clear()
+        self.sheet_digest_by_name.clear()
+        self.tab_list_by_type.clear()
+        self.tab_list_by_type_built = False
+        self.join_index_by_key.clear()
+
+    def load_all_worksheets(self):
+        """
+        Load tab list from the opened workbook, then load all worksheets and build tab list by type.
+        In lazy mode only the tab list and the header rows are loaded.
+
+        :return: None.
+        """
+
+        self.tab_list = self.workbook_obj.sheet_names()
+        if not self.lazy_load:
+            for tab_name in self.tab_list:
+                self.load_worksheet_by_name(tab_name)
+
+        # Build tab list by type after load, from the header rows only in lazy mode.
+        self.build_tab_list_by_type()
+        self.store_header_cache()
+
+    async def aload_workbook(self, workbook_path, executor=None, timeout=None):
+        """
+        Asyncio variant of load_workbook().
+        The file check, file reading, parsing and worksheet loading all run in the executor, so the event loop is
+        not blocked. The workbook is loaded into a new WorkbookWithHeader object, and its state is only taken over
+        when loading completes and the caller was not cancelled, so a cancelled or timed out load leaves this object
+        unchanged. A thread can not be interrupted, so a cancelled load keeps running in the executor and using CPU
+        until the parse completes, then its result is discarded.
+
+        :param workbook_path: Path of workbook located, or the workbook contents as accepted by load_workbook().
+        :param executor: executor to run the load, the shared executor of set_async_load_concurrency() by default.
+        :param timeout: seconds to wait for the load, None to wait without limit.
+        :return: None.
+                    Will raise WorkbookNotValid exception if specified path is invalid or not a workbook file.
+                    Will raise asyncio.TimeoutError if the load does not complete in timeout.
+        """
+
+        loaded_workbook_obj = WorkbookWithHeader()
+        loaded_workbook_obj.internal_logger = self.internal_logger
+        loaded_workbook_obj.default_header_row_no = self.default_header_row_no
+        loaded_workbook_obj.lazy_load = self.lazy_load
+        loaded_workbook_obj.use_mmap = self.use_mmap
+        loaded_workbook_obj.header_scan_row_count = self.header_scan_row_count
+        loaded_workbook_obj.reader_backend = self.reader_backend
+        loaded_workbook_obj.header_cache = self.header_cache
+        loaded_workbook_obj.registered_tab_type = self.registered_tab_type
+
+        if executor is None: executor = get_async_load_executor()
+        load_future = asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(loaded_workbook_obj.load_workbook, workbook_path))
+        await asyncio.wait_for(load_future, timeout)
+
+        # wait_for() may return the completed load even though the caller was cancelled meanwhile (Python 3.11+).
+        current_task = asyncio.current_task()
+        if hasattr(current_task, 'cancelling') and current_task.cancelling(): raise asyncio.CancelledError()
+        if loaded_workbook_obj.workbook_path: self.take_over_loaded_state(loaded_workbook_obj)
+
+    def take_over_loaded_state(self, loaded_workbook_obj):
+        """
+        Take over the loaded workbook state from another WorkbookWithHeader object.
+
+        :param loaded_workbook_obj: WorkbookWithHeader object which loaded the workbook.
+        :return: None.
+        """
+
+        with self.workbook_lock:
+            previous_workbook_obj = self.workbook_obj
+            self.workbook_obj = loaded_workbook_obj.workbook_obj
+            if previous_workbook_obj is not None and previous_workbook_obj is not self.workbook_obj:
+                previous_workbook_obj.close()
+            if self.workbook_mmap is not loaded_workbook_obj.workbook_mmap: self.close_workbook_mmap()
+            self.workbook_path = loaded_workbook_obj.workbook_path
+            self.workbook_mmap = loaded_workbook_obj.workbook_mmap
+            self.tab_list = loaded_workbook_obj.tab_list
+            self.worksheet_list_by_name = loaded_workbook_obj.worksheet_list_by_name
+            self.worksheet_metadata_by_name = loaded_workbook_obj.worksheet_metadata_by_name
+            self.sheet_digest_by_name = loaded_workbook_obj.sheet_digest_by_name
+            self.file_stat_fingerprint = loaded_workbook_obj.file_stat_fingerprint
+            self.tab_list_by_type = loaded_workbook_obj.tab_list_by_type
+            self.tab_list_by_type_built = loaded_workbook_obj.tab_list_by_type_built
+            self.join_index_by_key = loaded_workbook_obj.join_index_by_key
+            self.header_cache_fingerprint = loaded_workbook_obj.header_cache_fingerprint
+
+            # Registry may be changed while loading.
+            if self.tab_list_by_type_built: self.build_tab_list_by_type()
+
+    def is_workbook_file_changed(self):
+        """
+        Return whether the workbook file was changed since it was loaded, by comparing the file size and mtime.
+
+        :return: True if the file was changed, False if it was not changed or not loaded from a file.
+        """
+
+        if self.file_stat_fingerprint is None: return False
+
+        try:
+            file_stat = os.stat(self.workbook_path)
+        except OSError:
+            return False
+
+        return (file_stat.st_size, file_stat.st_mtime_ns) != self.file_stat_fingerprint
+
+    def reload(self):
+        """
+        Reload the workbook file if it was changed, and reparse only the worksheets whose content changed.
+        The file fingerprint is checked first. Then the content digest of each loaded worksheet is compared with
+        the new file, the digest of the new file is kept so the next reload digests the changed file only. Unchanged worksheets keep their WorksheetWithHeader objects, with their indexes, bound to the
+        sheets of the new file. Tabs not loaded are compared by their header keywords only, as their data is read
+        from the new file when requested. Changed and new worksheets are loaded again (on demand in lazy mode), and
+        only they are reclassified.
+
+        :return: list of tab name added, changed or removed. Empty list if the workbook was not changed.
+                 Will raise WorkbookNotValid exception if the changed file is not a workbook file.
+        """
+
+        with self.workbook_lock:
+            if not self.is_workbook_file_changed(): return []
+
+            # Digest the loaded worksheets before their sheet data is replaced, unless it was digested by the previous
+            # reload, so each sheet content is digested once.
+            for tab_name, worksheet_obj in self.worksheet_list_by_name.items():
+                if tab_name not in self.sheet_digest_by_name.keys():
+                    self.sheet_digest_by_name[tab_name] = get_sheet_digest(worksheet_obj.worksheet_object)
+
+            previous_workbook_obj = self.workbook_obj
+            file_stat = os.stat(self.workbook_path)
+            self.open_workbook_file(self.workbook_path)
+            self.file_stat_fingerprint = (file_stat.st_size, file_stat.st_mtime_ns)
+            self.header_cache_fingerprint = None
+            # Join indexes keep the sheets of the previous file.
+            self.join_index_by_key.clear()
+
+            previous_tab_list = self.tab_list
+            self.tab_list = self.workbook_obj.sheet_names()
+
+            changed_tab_list = [tab_name for tab_name in previous_tab_list if tab_name not in self.tab_list]
+            for tab_name in changed_tab_list:
+                self.worksheet_list_by_name.pop(tab_name, None)
+                self.worksheet_metadata_by_name.pop(tab_name, None)
+                self.sheet_digest_by_name.pop(tab_name, None)
+
+            for tab_name in self.tab_list:
+                worksheet_obj = self.worksheet_list_by_name.get(tab_name)
+                if worksheet_obj is not None:
+                    sheet_obj = self.workbook_obj.sheet_by_name(tab_name)
+                    sheet_digest = get_sheet_digest(sheet_obj)
+                    if sheet_digest == self.sheet_digest_by_name.get(tab_name):
+                        worksheet_obj.worksheet_object = sheet_obj
+                        continue
+                    if self.lazy_load:
+                        self.unload_worksheet(tab_name)
+                        self.load_worksheet_header(tab_name)
+                    else:
+                        # The sheet just read is loaded without reading it again, and its digest kept for next reload.
+                        self.load_worksheet_by_name(tab_name)
+                        self.sheet_digest_by_name[tab_name] = sheet_digest
+                elif tab_name in self.worksheet_metadata_by_name.keys():
+                    previous_metadata = self.worksheet_metadata_by_name[tab_name]
+                    self.load_worksheet_header(tab_name)
+                    worksheet_metadata = self.worksheet_metadata_by_name[tab_name]
+                    if (previous_metadata.header_row_no, previous_metadata.keywords_in_header) == \
+                            (worksheet_metadata.header_row_no, worksheet_metadata.keywords_in_header):
+                        continue
+                elif tab_name in previous_tab_list:
+                    # Neither loaded nor classified, nothing was read from the tab.
+                    continue
+                elif not self.lazy_load:
+                    self.load_worksheet_by_name(tab_name)
+                changed_tab_list.append(tab_name)
+
+            if previous_workbook_obj is not None: previous_workbook_obj.close()
+            if self.tab_list_by_type_built: self.reclassify_tabs(changed_tab_list)
+
+            return changed_tab_list
+
+    def reclassify_tabs(self, tab_name_list):
+        """
+        Update tab_list_by_type for specified tabs only.
+
+        :param tab_name_list: list of tab name to be reclassified. Tabs no longer in tab list are removed.
+        :return: None. tab_list_by_type will be updated.
+        """
+
+        if self.registered_tab_type is None: return
+
+        changed_tab_name_set = set(tab_name_list)
+        tab_name_set_by_type = dict((tab_type, set(tab_name for tab_name in tab_name_list_of_type
+                                                   if tab_name not in changed_tab_name_set))
+                                    for tab_type, tab_name_list_of_type in self.tab_list_by_type.items())
+
+        for tab_name in tab_name_list:
+            if tab_name not in self.tab_list: continue
+            if tab_name not in self.worksheet_metadata_by_name.keys(): self.load_worksheet_header(tab_name)
+            for tab_type in self.registered_tab_type.get_tab_type_by_keywords(
+                    self.worksheet_metadata_by_name[tab_name].keywords_in_header):
+                tab_name_set_by_type.setdefault(tab_type, set()).add(tab_name)
+
+        self.tab_list_by_type.clear()
+        for tab_type, tab_name_set in tab_name_set_by_type.items():
+            if tab_name_set:
+                self.tab_list_by_type[tab_type] = [tab_name for tab_name in self.tab_list if tab_name in tab_name_set]
+
+    def start_watching(self, interval=1.0, reload_callback=None):
+        """
+        Start a daemon thread to check the workbook file every interval seconds, and reload() it when it changes.
+        The workbook object is updated from the watching thread under workbook_lock, which is also held by the methods
+        reading the tab list, keywords, tab types and worksheets, so they never see a partly reloaded workbook.
+        WorksheetWithHeader objects returned before a reload keep the sheet data they were loaded with.
+
+        :param interval: seconds between two checks.
+        :param reload_callback: callable called as reload_callback(workbook_obj, changed_tab_list) after a reload,
+                                or reload_callback(workbook_obj, exception) if the reload failed.
+        :return: None.
+        """
+
+        self.stop_watching()
+        self.watch_stop_event = threading.Event()
+
+        def watch_workbook_file(stop_event):
+            while not stop_event.wait(interval):
+                if not self.is_workbook_file_changed(): continue
                 try:
-                    self.workbook_obj = xlrd.open_workbook(workbook_path)
-                except Exception as workbook_error:
-                    self.internal_logger.exception('Failed to open Workbook file %s' % workbook_path)
-                    raise WorkbookNotValid(workbook_path, 'Failed to open Workbook file: %s' % workbook_error)
+                    changed_tab_list = self.reload()
+                except Exception as reload_error:
+                    self.internal_logger.exception('Failed to reload Workbook file %s', self.workbook_path)
+                    changed_tab_list = reload_error
+                if reload_callback is not None: reload_callback(self, changed_tab_list)
 
-            self.workbook_path = workbook_path
+        self.watch_thread = threading.Thread(target=watch_workbook_file, args=(self.watch_stop_event,),
+                                             name='watch_workbook', daemon=True)
+        self.watch_thread.start()
 
-            # Add related WorksheetWithHeader object to the worksheet_list_by_name
+    def stop_watching(self):
+        """
+        Stop the file watching thread.
+
+        :return: None.
+        """
+
+        if self.watch_thread is None: return
+
+        self.watch_stop_event.set()
+        if self.watch_thread is not threading.current_thread(): self.watch_thread.join()
+        self.watch_thread = None
+        self.watch_stop_event = None
+
+    def open_workbook_file(self, workbook_path, file_contents=None):
+        """
+        Open the workbook file by the reader backend.
+
+        :param workbook_path: Path of workbook located.
+        :param file_contents: the workbook contents passed to the backend, workbook_path is only used in messages if
+                              given.
+        :return: None. workbook_obj will be updated to the ReaderBackend object.
+                 Will raise WorkbookNotValid exception if specified path is not a workbook file.
+        """
+
+        start_time = start_timer()
+        try:
+            backend_class = get_reader_backend_class(self.get_reader_backend_name(workbook_path, file_contents))
+            self.workbook_obj = backend_class(workbook_path, file_contents=file_contents, on_demand=self.lazy_load,
+                                              use_mmap=self.use_mmap)
+        except Exception as workbook_error:
+            self.internal_logger.exception('Failed to open Workbook file %s', workbook_path)
+            raise WorkbookNotValid(workbook_path, 'Failed to open Workbook file: %s' % workbook_error)
+        emit_elapsed_time(METRIC_WORKBOOK_OPEN_TIME, start_time, workbook_path=workbook_path)
+
+    def get_reader_backend_name(self, workbook_path, file_contents=None):
+        """
+        Return the reader backend to open the workbook.
+
+        :param workbook_path: Path of workbook located.
+        :param file_contents: the workbook contents, if the workbook is not read from workbook_path.
+        :return: name of the reader backend.
+        """
+
+        if self.reader_backend == READER_BACKEND_AUTO:
+            return get_reader_backend_name_by_format(workbook_path, file_contents)
+
+        # xlrd copies .xlsx contents into a BytesIO, the contents are streamed in place instead.
+        if self.reader_backend == READER_BACKEND_XLRD and file_contents is not None:
+            return get_reader_backend_name_by_format(workbook_path, file_contents)
+
+        return self.reader_backend
+
+    def store_header_cache(self):
+        """
+        Store tab names and header keywords to the header cache, once keywords of all tabs are known.
+
+        :return: None.
+        """
+
+        if self.header_cache is None or self.header_cache_fingerprint is None: return
+        if len(self.worksheet_metadata_by_name) < len(self.tab_list): return
+
+        self.header_cache.put(self.header_cache_fingerprint, self.default_header_row_no,
+                              dict((tab_name, list(self.worksheet_metadata_by_name[tab_name].keywords_in_header))
+                                   for tab_name in self.tab_list))
+        self.header_cache_fingerprint = None
+
+    def load_worksheet_by_name(self, worksheet_name):
+        """
+        Build the WorksheetWithHeader object for specified tab and add it to worksheet_list_by_name.
+
+        :param worksheet_name: name of worksheet need be loaded.
+        :return: the loaded WorksheetWithHeader object.
+        """
+
+        with self.workbook_lock:
+            if self.workbook_obj is None: self.open_workbook_file(self.workbook_path)
+
+            start_time = start_timer()
+            self.sheet_digest_by_name.pop(worksheet_name, None)
+            worksheet_obj = WorksheetWithHeader()
+            worksheet_obj.set_header_row_number(self.default_header_row_no)
+            sheet_obj = self.workbook_obj.sheet_by_name(worksheet_name)
+            if self.header_scan_row_count and self.registered_tab_type is not None:
+                worksheet_obj.detect_header_row(sheet_obj, self.registered_tab_type, self.header_scan_row_count)
+            worksheet_obj.load_worksheet(sheet_obj)
+            if start_time is not None:
+                emit_elapsed_time(METRIC_SHEET_HEADER_PARSE_TIME, start_time, worksheet_name=worksheet_name)
+                emit_metric(METRIC_SHEET_CELL_COUNT,
+                            worksheet_obj.worksheet_object.nrows * worksheet_obj.worksheet_object.ncols,
+                            worksheet_name=worksheet_name)
+            self.worksheet_list_by_name[worksheet_name] = worksheet_obj
+            self.worksheet_metadata_by_name[worksheet_name] = worksheet_obj.get_metadata()
+
+            return worksheet_obj
+
+    def load_worksheet_header(self, worksheet_name):
+        """
+        Read the header keywords of specified tab without building its WorksheetWithHeader object, to classify the
+        tab in lazy mode. Only the top rows are read by the reader backend, see ReaderBackend.get_header_row(), and
+        sheet data read on demand is released afterwards if the worksheet was not loaded.
+
+        :param worksheet_name: name of worksheet.
+        :return: None. worksheet_metadata_by_name will be updated.
+        """
+
+        with self.workbook_lock:
+            if self.workbook_obj is None: self.open_workbook_file(self.workbook_path)
+
+            start_time = start_timer()
+            header_row_no = self.default_header_row_no
+            if self.header_scan_row_count and self.registered_tab_type is not None:
+                detected_row_no = detect_header_row_no(
+                    self.workbook_obj.iterate_header_rows(worksheet_name, self.header_scan_row_count),
+                    self.registered_tab_type)
+                if detected_row_no is not None: header_row_no = detected_row_no
+            keyword_list = [cell.value for _, cell in self.workbook_obj.get_header_row(worksheet_name, header_row_no)]
+            emit_elapsed_time(METRIC_SHEET_HEADER_PARSE_TIME, start_time, worksheet_name=worksheet_name)
+
+            self.worksheet_metadata_by_name[worksheet_name] = WorksheetMetadata(worksheet_name, header_row_no,
+                                                                                keyword_list)
+            if self.workbook_obj.on_demand and worksheet_name not in self.worksheet_list_by_name.keys():
+                self.workbook_obj.unload_sheet(worksheet_name)
+
+    def unload_worksheet(self, worksheet_name):
+        """
+        Release the WorksheetWithHeader object of specified tab.
+        In lazy mode the sheet data is released from the reader backend too, and will be loaded again on next request.
+        The sheet data of .xlsx workbook read by xlrd is kept, as xlrd does not support on demand loading for .xlsx.
+
+        :param worksheet_name: name of worksheet need be released.
+        :return: None. specified worksheet will be removed from worksheet_list_by_name.
+        """
+
+        with self.workbook_lock:
+            if worksheet_name in self.worksheet_list_by_name.keys():
+                del self.worksheet_list_by_name[worksheet_name]
+                self.sheet_digest_by_name.pop(worksheet_name, None)
+                # Join indexes keep the sheet data of their tabs.
+                self.join_index_by_key = dict(
+                    (join_key, join_index) for join_key, join_index in self.join_index_by_key.items()
+                    if worksheet_name not in [tab_name for tab_name, _ in join_index.source_list])
+                if self.workbook_obj is not None and self.workbook_obj.on_demand:
+                    self.workbook_obj.unload_sheet(worksheet_name)
+
+    def release_worksheet_data(self):
+        """
+        Release the workbook and all WorksheetWithHeader objects, so the sheet data can be garbage collected.
+        The reader backend is closed. Tab list, header keywords, worksheet metadata and tab list by type are kept. The
+        workbook file will be opened again when a worksheet is requested, which is not possible for workbook loaded
+        from contents.
+
+        :return: None.
+        """
+
+        with self.workbook_lock:
             self.worksheet_list_by_name.clear()
-            for tab_name in self.workbook_obj.sheet_names():
-                worksheet_obj = WorksheetWithHeader()
-                worksheet_obj.set_header_row_number(self.default_header_row_no)
-                worksheet_obj.load_worksheet(self.workbook_obj.sheet_by_name(tab_name))
-                self.worksheet_list_by_name[tab_name] = worksheet_obj
+            self.join_index_by_key.clear()
+            if self.workbook_obj is not None: self.workbook_obj.close()
+            self.workbook_obj = None
+            self.close_workbook_mmap()
+
+    def get_worksheet_metadata(self, worksheet_name):
+        """
+        Return the compact metadata of specified tab, the worksheet is loaded if it was not loaded yet.
 
-            # Build tab list by type after load.
-            self.build_tab_list_by_type()
+        :param worksheet_name: name of worksheet.
+        :return: WorksheetMetadata object of the worksheet.
+                 Will raise WorksheetNotFound exception if specified worksheet name was not found in tab list.
+        """
+
+        with self.workbook_lock:
+            if worksheet_name not in self.worksheet_metadata_by_name.keys(): self.get_worksheet_by_name(worksheet_name)
+
+            return self.worksheet_metadata_by_name[worksheet_name]
+
+    def get_worksheet_metadata_list(self):
+        """
+        Return the compact metadata of all tabs in the workbook.
+
+        :return: list of WorksheetMetadata object, in the same order as tab list.
+        """
+
+        with self.workbook_lock:
+            return [self.get_worksheet_metadata(tab_name) for tab_name in self.tab_list]
+
+    def is_worksheet_loaded(self, worksheet_name):
+        """
+        Return whether the WorksheetWithHeader object of specified tab was loaded.
+
+        :param worksheet_name: name of worksheet need be checked.
+        :return: True if the worksheet was loaded.
+        """
+
+        with self.workbook_lock:
+            return worksheet_name in self.worksheet_list_by_name.keys()
 
     def build_tab_list_by_type(self):
         """
         Build tab list by type:
-            - Find keywords in each tab/worksheet
+            - Find keywords in each tab/worksheet, from the keywords kept for loaded or cached tabs if possible,
+              otherwise from the header row only, see load_worksheet_header()
             - Detect the tab type list by calling RegisteredTabType.get_tab_type_by_keywords()
             - Group tab name by the returned tab type list.
 
@@ -215,25 +1252,80 @@ class WorkbookWithHeader(object):
 
         if self.registered_tab_type is None: return
 
-        self.tab_list_by_type.clear()
-        for worksheet_obj in self.worksheet_list_by_name.values():
-            for tab_type in self.registered_tab_type.get_tab_type_by_keywords(worksheet_obj.get_keyword_list()):
-                if tab_type not in self.tab_list_by_type.keys(): self.tab_list_by_type[tab_type] = []
-                self.tab_list_by_type[tab_type].append(worksheet_obj.get_worksheet_name())
+        with self.workbook_lock:
+            start_time = start_timer()
+            self.tab_list_by_type.clear()
+            for tab_name in self.tab_list:
+                if tab_name not in self.worksheet_metadata_by_name.keys(): self.load_worksheet_header(tab_name)
+                for tab_type in self.registered_tab_type.get_tab_type_by_keywords(
+                        self.worksheet_metadata_by_name[tab_name].keywords_in_header):
+                    if tab_type not in self.tab_list_by_type.keys(): self.tab_list_by_type[tab_type] = []
+                    self.tab_list_by_type[tab_type].append(tab_name)
+
+            self.tab_list_by_type_built = True
+            emit_elapsed_time(METRIC_CLASSIFICATION_TIME, start_time, workbook_path=self.workbook_path)
+            self.store_header_cache()
+
+    def on_tab_type_changed(self, change_event, tab_type, keyword):
+        """
+        Listener of RegisteredTabType change events.
+        Only the bucket of the changed tab type is updated, using the cached keyword set of each tab. The bucket of a
+        tab type with rules is matched again for every tab, since a keyword can be excluded by its none_of rules.
+
+        :param change_event: one of TAB_TYPE_ADDED, TAB_TYPE_KEYWORD_ADDED, TAB_TYPE_KEYWORD_REMOVED,
+                             TAB_TYPE_RULE_ADDED and TAB_TYPE_RULE_REMOVED.
+        :param tab_type: the tab type changed.
+        :param keyword: the keyword or the TabTypeRule added or removed.
+        :return: None. tab_list_by_type will be updated.
+        """
+
+        with self.workbook_lock:
+            if not self.tab_list_by_type_built: return
+
+            tab_name_set = set(self.tab_list_by_type.get(tab_type, []))
+
+            if change_event in [TAB_TYPE_RULE_ADDED, TAB_TYPE_RULE_REMOVED] or \
+                    (change_event in [TAB_TYPE_KEYWORD_ADDED, TAB_TYPE_KEYWORD_REMOVED] and
+                     self.registered_tab_type.get_rules_by_tab_type(tab_type)):
+                tab_name_set = set(tab_name for tab_name, worksheet_metadata in self.worksheet_metadata_by_name.items()
+                                   if tab_type in self.registered_tab_type.get_tab_type_by_keywords(
+                                       worksheet_metadata.keywords_in_header))
+            elif change_event == TAB_TYPE_KEYWORD_ADDED:
+                for tab_name, worksheet_metadata in self.worksheet_metadata_by_name.items():
+                    if keyword in worksheet_metadata.keywords_in_header: tab_name_set.add(tab_name)
+            elif change_event == TAB_TYPE_KEYWORD_REMOVED:
+                identifying_keyword_set = set(
+                    self.registered_tab_type.get_identifying_keywords_by_tab_type(tab_type) or [])
+                for tab_name in list(tab_name_set):
+                    keywords_in_header = self.worksheet_metadata_by_name[tab_name].keywords_in_header
+                    if keyword in keywords_in_header and identifying_keyword_set.isdisjoint(keywords_in_header):
+                        tab_name_set.remove(tab_name)
+            else:
+                return
+
+            # Keep the tab name in the same order as the workbook.
+            if tab_name_set:
+                self.tab_list_by_type[tab_type] = [tab_name for tab_name in self.tab_list if tab_name in tab_name_set]
+            elif tab_type in self.tab_list_by_type.keys():
+                del self.tab_list_by_type[tab_type]
 
     def get_worksheet_by_name(self, worksheet_name):
         """
         Return the WorksheetWithHeader object with specified sheet name.
+        The worksheet will be loaded if it was not loaded yet.
 
         :param worksheet_name: name of worksheet need be returned
         :return:  WorksheetWithHeader object with specified sheet name.
                    Will raise WorksheetNotFound exception if specified worksheet name was not found in tab list.
         """
 
-        if worksheet_name and worksheet_name in self.worksheet_list_by_name.keys():
-            return self.worksheet_list_by_name[worksheet_name]
-        else:
-            raise WorksheetNotFound(worksheet_name, 'Worksheet Not Found in workbook %s.' % self.workbook_path)
+        with self.workbook_lock:
+            if worksheet_name and worksheet_name in self.worksheet_list_by_name.keys():
+                return self.worksheet_list_by_name[worksheet_name]
+            elif worksheet_name and worksheet_name in self.tab_list:
+                return self.load_worksheet_by_name(worksheet_name)
+            else:
+                raise WorksheetNotFound(worksheet_name, 'Worksheet Not Found in workbook %s.' % self.workbook_path)
 
     def get_tab_list(self):
         """
@@ -242,7 +1334,23 @@ class WorkbookWithHeader(object):
         :return: tab name list of current workbook
         """
 
-        return self.workbook_obj.sheet_names() if self.workbook_obj else []
+        with self.workbook_lock:
+            return self.tab_list.copy()
+
+    def get_keyword_list_by_name(self, worksheet_name):
+        """
+        Return the keyword list in header of specified tab, without loading the worksheet if keywords are known.
+
+        :param worksheet_name: name of worksheet.
+        :return: list of keyword in header row of the worksheet.
+                 Will raise WorksheetNotFound exception if specified worksheet name was not found in tab list.
+        """
+
+        with self.workbook_lock:
+            if worksheet_name in self.worksheet_metadata_by_name.keys():
+                return list(self.worksheet_metadata_by_name[worksheet_name].keywords_in_header)
+            else:
+                return self.get_worksheet_by_name(worksheet_name).get_keyword_list()
 
     def get_tab_list_by_type(self, tab_type):
         """
@@ -252,10 +1360,100 @@ class WorkbookWithHeader(object):
         :return: list of the tab name match the specified tab type.
         """
 
-        if tab_type in self.tab_list_by_type.keys():
-            return self.tab_list_by_type[tab_type].copy()
-        else:
-            return []
+        with self.workbook_lock:
+            if tab_type in self.tab_list_by_type.keys():
+                return self.tab_list_by_type[tab_type].copy()
+            else:
+                return []
+
+    def export_tab_type(self, tab_type, output_path, export_format=EXPORT_FORMAT_JSON_LINES, chunk_row_count=1000,
+                        keyword_list=None, add_tab_name=True, add_tab_type=False):
+        """
+        Export the data rows of every tab of specified tab type to one file, typed by the column schema of each tab.
+        Rows are written in chunks of chunk_row_count rows by TabTypeExporter, see it for the details of the schema.
+
+        :param tab_type: Name of the tab type in registered tab type list.
+        :param output_path: Path of the output file.
+        :param export_format: EXPORT_FORMAT_JSON_LINES, EXPORT_FORMAT_PARQUET or EXPORT_FORMAT_ARROW.
+        :param chunk_row_count: number of rows converted and written in each chunk.
+        :param keyword_list: list of keyword in header to be exported. All keywords in header by default.
+        :param add_tab_name: True to add the tab name as EXPORT_TAB_NAME_COLUMN.
+        :param add_tab_type: True to add the tab type as EXPORT_TAB_TYPE_COLUMN.
+        :return: number of rows written.
+                 Will raise ImportError if pyarrow is not installed for Parquet and Arrow format.
+        """
+
+        with TabTypeExporter(output_path, export_format, tab_type, chunk_row_count, keyword_list,
+                             add_tab_name=add_tab_name, add_tab_type=add_tab_type) as tab_type_exporter:
+            return tab_type_exporter.write_workbook(self)
+
+    def get_join_index(self, tab_type, key_keyword):
+        """
+        Return the hash index of the key column over every tab of specified tab type, built on first request and
+        reused while the tabs of the tab type and their sheet data are not changed.
+
+        :param tab_type: Name of the tab type in registered tab type list.
+        :param key_keyword: keyword of the key column in header.
+        :return: TabTypeJoinIndex object.
+        """
+
+        with self.workbook_lock:
+            join_index = self.join_index_by_key.get((tab_type, key_keyword))
+            if join_index is None or not join_index.is_valid(self):
+                join_index = TabTypeJoinIndex(self, tab_type, key_keyword)
+                self.join_index_by_key[(tab_type, key_keyword)] = join_index
+
+            return join_index
+
+    def join_tab_types(self, left_tab_type, right_tab_type, key_keyword, right_key_keyword=None, join_type=JOIN_INNER,
+                       left_keyword_list=None, right_keyword_list=None, join_report=None):
+        """
+        Join the data rows of two tab types on the key column, e.g. each test case to the config of its ConfigName:
+            join_tab_types('TestCases', 'Configs', 'ConfigName')
+
+        The hash index of the key column is built over the smaller side once, and reused by later joins on the same
+        side and key. Rows of the larger side are streamed and looked up in the index. Joined records follow the
+        order of the larger side, and for JOIN_LEFT with the left side indexed, unmatched left rows follow at the end.
+        Keys are compared by cell value, so a key number 1.0 does not match a key text '1'. Empty rows are ignored,
+        rows with empty key never match.
+
+        Rows without match and keys of more than one row on each side are filled to join_report, which is complete
+        when the generator is exhausted.
+
+        :param left_tab_type: Name of the tab type of left side.
+        :param right_tab_type: Name of the tab type of right side.
+        :param key_keyword: keyword of the key column in header of left side.
+        :param right_key_keyword: keyword of the key column in header of right side, same as left side by default.
+        :param join_type: JOIN_INNER for the matched rows only, JOIN_LEFT to also yield unmatched left rows.
+        :param left_keyword_list: list of keyword in header of left side to be projected. All keywords by default.
+        :param right_keyword_list: list of keyword in header of right side to be projected. All keywords by default.
+        :param join_report: TabTypeJoinReport object to be filled, or None.
+        :return: generator of JoinedRecord of (key, left tab name, left row number, left record,
+                 right tab name, right row number, right record).
+                 Will raise ValueError if the join type is unknown.
+        """
+
+        return iterate_joined_records(self, left_tab_type, right_tab_type, key_keyword, right_key_keyword, join_type,
+                                      left_keyword_list, right_keyword_list, join_report)
+
+    def query_rows(self, tab_type, condition_list=None, keyword_list=None):
+        """
+        Query the data rows across every tab of specified tab type.
+        Each condition is a tuple of (<keyword>, <operator>, <value>), operator is one of QUERY_EQUAL, QUERY_IN and
+        QUERY_RANGE. Rows matching all conditions are returned. Column indexes are built on demand by each worksheet,
+        and reused by later queries.
+        e.g.:
+            query_rows('TestCases', [('Method', QUERY_EQUAL, 'PUT'), ('ReturnCode', QUERY_RANGE, (200, 299))])
+
+        :param tab_type: Name of the tab type in registered tab type list.
+        :param condition_list: list of query condition, all data rows are matched if it is empty.
+        :param keyword_list: list of keyword in header to be projected. All keywords in header by default.
+        :return: generator of (<tab name>, <row number>, <record dict>) of matched rows.
+        """
+
+        for tab_name in self.get_tab_list_by_type(tab_type):
+            for row_no, record in self.get_worksheet_by_name(tab_name).query_rows(condition_list, keyword_list):
+                yield tab_name, row_no, record
 
 
 class WorksheetWithHeader(object):
@@ -265,6 +1463,16 @@ class WorksheetWithHeader(object):
 
     header_row_no = None                # The row number of header locates in the worksheet
     keywords_in_header = None           # The list of keywords present in header row
+    keyword_set = None                  # The set of keywords present in header row, for fast lookup
+    column_no_by_keyword = None         # dict of the column number of each keyword in header row
+    parameter_keyword = None            # The keyword in header row where Parameter section starts
+    parameter_layout = None             # Layout of Parameter section, PARAMETER_KEYS_IN_HEADER or PARAMETER_KEYS_IN_ROWS
+    parameter_column_plan = None        # Precomputed list of (key, key column, value column) of Parameter section
+    hash_index_by_keyword = None        # dict of the hash index of each queried column, value to list of row number
+    sorted_index_by_keyword = None      # dict of the sorted index of each queried column, list of (sort key, row number)
+    declared_column_type_by_keyword = None  # dict of the column type declared by set_column_schema()
+    column_type_by_keyword = None       # Compiled column schema, declared or inferred type of each keyword in header
+    column_converter_by_keyword = None  # dict of (column number, converter) of each keyword in header
     max_row_usage = None                # Use self.worksheet_object.nrows
     worksheet_object = None             # Related worksheet object.
 
@@ -272,6 +1480,13 @@ class WorksheetWithHeader(object):
 
         self.header_row_no = 0
         self.keywords_in_header = []
+        self.keyword_set = frozenset()
+        self.column_no_by_keyword = dict()
+        self.parameter_keyword = 'Parameters'
+        self.parameter_column_plan = []
+        self.hash_index_by_keyword = dict()
+        self.sorted_index_by_keyword = dict()
+        self.declared_column_type_by_keyword = dict()
 
     def set_header_row_number(self, header_row_no=0):
         """
@@ -283,22 +1498,147 @@ class WorksheetWithHeader(object):
 
         if header_row_no >=0: self.header_row_no = header_row_no
 
+    def detect_header_row(self, worksheet_obj, registered_tab_type, header_scan_row_count):
+        """
+        Detect the header row by scanning the first rows of the worksheet, see detect_header_row_no().
+
+        :param worksheet_obj: Object of worksheet need be scanned.
+        :param registered_tab_type: RegisteredTabType object with registered keywords.
+        :param header_scan_row_count: number of rows to scan.
+        :return: the detected header row number, or None if no registered keyword was found.
+                 header_row_no will be updated if header row was detected.
+        """
+
+        detected_row_no = detect_header_row_no(((row_no, get_sheet_header_row(worksheet_obj, row_no))
+                                                for row_no in range(min(header_scan_row_count, worksheet_obj.nrows))),
+                                               registered_tab_type)
+        if detected_row_no is not None: self.header_row_no = detected_row_no
+
+        return detected_row_no
+
+    def set_parameter_keyword(self, parameter_keyword):
+        """
+        Set the keyword in header row where Parameter section starts.
+
+        :param parameter_keyword: keyword of Parameter section.
+        :return: None, parameter_keyword will be updated, and the Parameter section plan is rebuilt if loaded.
+        """
+
+        if parameter_keyword:
+            self.parameter_keyword = parameter_keyword
+            self.build_parameter_plan()
+
     def load_worksheet(self, worksheet_obj):
         """
         Load worksheet then detect max row usage and keywords in header.
 
-        :param worksheet_obj: Object of worksheet need be handled.
+        :param worksheet_obj: Object of worksheet need be handled, the sheet object of any reader backend.
+                              Objects without the attributes in SHEET_PROTOCOL_NAME_LIST are ignored.
         :return: None, worksheet_object, and keywords_in_header will be handled.
         """
 
-        if isinstance(worksheet_obj, xlrd.sheet.Sheet):
+        if is_sheet_object(worksheet_obj):
             self.worksheet_object = worksheet_obj
+            self.max_row_usage = worksheet_obj.nrows
             self.keywords_in_header.clear()
-
-            # load keywords in header
-            for current_cell in self.worksheet_object.row(self.header_row_no):
-                if current_cell.ctype not in [xlrd.XL_CELL_BLANK, xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_ERROR]:
+            self.column_no_by_keyword.clear()
+            self.hash_index_by_keyword.clear()
+            self.sorted_index_by_keyword.clear()
+            self.column_type_by_keyword = None
+            self.column_converter_by_keyword = None
+
+            # load keywords in header, a worksheet shorter than the header row has no keyword.
+            header_cell_list = get_sheet_header_row(worksheet_obj, self.header_row_no) \
+                if self.header_row_no < worksheet_obj.nrows else []
+            for column_no, current_cell in enumerate(header_cell_list):
+                if current_cell.ctype not in NO_VALUE_CELL_TYPES:
                     self.keywords_in_header.append(current_cell.value)
+                    self.column_no_by_keyword.setdefault(current_cell.value, column_no)
+
+            self.keyword_set = frozenset(self.keywords_in_header)
+            self.build_parameter_plan()
+
+    def build_parameter_plan(self):
+        """
+        Detect the layout of Parameter section from the header row once, and build the column plan for all rows.
+        Parameter section is the columns after the Parameter keyword in header row. There are two layouts:
+            - Keys in header: keys are in the header row, values are in the same column below the header.
+            - Keys in rows: header row is empty after Parameter keyword, keys and values are in contiguous cells
+              at same row.
+
+        Data structure of parameter_column_plan:
+        [
+            (<key>, None, <value column>),                  for keys in header layout.
+            (None, <key column>, <value column>),           for keys in rows layout.
+            ......
+        ]
+        :return: None. parameter_layout and parameter_column_plan will be updated.
+        """
+
+        self.parameter_layout = None
+        self.parameter_column_plan = []
+
+        if self.worksheet_object is None: return
+        if self.parameter_keyword not in self.column_no_by_keyword.keys(): return
+
+        section_column_no = self.column_no_by_keyword[self.parameter_keyword] + 1
+        for keyword in self.keywords_in_header:
+            column_no = self.column_no_by_keyword[keyword]
+            if column_no >= section_column_no: self.parameter_column_plan.append((keyword, None, column_no))
+
+        if self.parameter_column_plan:
+            self.parameter_layout = PARAMETER_KEYS_IN_HEADER
+        else:
+            self.parameter_layout = PARAMETER_KEYS_IN_ROWS
+            for column_no in range(section_column_no, self.worksheet_object.ncols - 1, 2):
+                self.parameter_column_plan.append((None, column_no, column_no + 1))
+
+    def get_parameter_layout(self):
+        """
+        Return the layout of Parameter section.
+
+        :return: PARAMETER_KEYS_IN_HEADER, PARAMETER_KEYS_IN_ROWS, or None if there is no Parameter section.
+        """
+
+        return self.parameter_layout
+
+    def get_parameters(self, row_no):
+        """
+        Return the key value pairs in Parameter section of specified row, by applying parameter_column_plan.
+        For keys in rows layout, the pairs which key cell is empty are ignored.
+
+        :param row_no: row number of the data row.
+        :return: dict of the parameters in the row.
+        """
+
+        parameter_dict = dict()
+
+        current_row_len = self.worksheet_object.row_len(row_no)
+        cell_value = self.worksheet_object.cell_value
+        for key, key_column_no, value_column_no in self.parameter_column_plan:
+            if value_column_no >= current_row_len: break
+            if key_column_no is not None:
+                key = cell_value(row_no, key_column_no)
+                if key == '': continue
+            parameter_dict[key] = cell_value(row_no, value_column_no)
+
+        return parameter_dict
+
+    def iterate_parameters(self, skip_empty_row=True):
+        """
+        Yield the parameters of each data row below the header row.
+
+        :param skip_empty_row: True to skip the row which has no parameter value.
+        :return: generator of (row number, dict of parameters) of each data row.
+        """
+
+        if not self.parameter_column_plan: return
+
+        for row_no in range(self.header_row_no + 1, self.worksheet_object.nrows):
+            parameter_dict = self.get_parameters(row_no)
+            if skip_empty_row and all(value == '' for value in parameter_dict.values()): continue
+
+            yield row_no, parameter_dict
 
     def get_keyword_list(self):
         """
@@ -309,6 +1649,25 @@ class WorksheetWithHeader(object):
 
         return self.keywords_in_header.copy()
 
+    def get_keyword_set(self):
+        """
+        Return the keyword set load from the spreadsheet.
+
+        :return: frozenset of keyword load from the spreadsheet.
+        """
+
+        return self.keyword_set
+
+    def get_metadata(self):
+        """
+        Return the compact metadata of the worksheet, which does not reference the sheet data.
+
+        :return: WorksheetMetadata object of the worksheet.
+        """
+
+        return WorksheetMetadata(self.worksheet_object.name, self.header_row_no, self.keywords_in_header,
+                                 self.worksheet_object.nrows, self.worksheet_object.ncols)
+
     def get_worksheet_name(self):
         """
         Return the worksheet name
@@ -316,3 +1675,332 @@ class WorksheetWithHeader(object):
         """
 
         return self.worksheet_object.name
+
+    def iterate_rows(self, keyword_list=None, as_namedtuple=False, skip_empty_row=True):
+        """
+        Yield one record per data row below the header row, keyed by the keywords in header.
+        Rows are read one at a time, and only the cells of the projected columns are read.
+
+        :param keyword_list: list of keyword in header to be projected. All keywords in header by default.
+                             Keyword not in header will be ignored.
+        :param as_namedtuple: True to yield named tuples instead of dict. Keywords which are not valid field names
+                              are renamed to positional names, e.g. _0, _1.
+        :param skip_empty_row: True to skip the row which all projected cells are empty.
+        :return: generator of the record of each data row.
+        """
+
+        if self.worksheet_object is None: return
+
+        if keyword_list is None: keyword_list = self.keywords_in_header
+        keyword_list = [keyword for keyword in keyword_list if keyword in self.column_no_by_keyword.keys()]
+        column_no_list = [self.column_no_by_keyword[keyword] for keyword in keyword_list]
+
+        row_type = namedtuple('WorksheetRow', [str(keyword) for keyword in keyword_list], rename=True) if as_namedtuple else None
+
+        cell_value = self.worksheet_object.cell_value
+        row_len = self.worksheet_object.row_len
+        for row_no in range(self.header_row_no + 1, self.worksheet_object.nrows):
+            current_row_len = row_len(row_no)
+            value_list = [cell_value(row_no, column_no) if column_no < current_row_len else ''
+                          for column_no in column_no_list]
+
+            if skip_empty_row and all(value == '' for value in value_list): continue
+
+            yield row_type._make(value_list) if as_namedtuple else dict(zip(keyword_list, value_list))
+
+    def set_column_schema(self, column_type_by_keyword):
+        """
+        Declare the column type of keywords in header, e.g. { 'StartDate': COLUMN_TYPE_DATE, 'Port': COLUMN_TYPE_INTEGER }.
+        Columns not declared are inferred from a sample of data rows. Declare COLUMN_TYPE_DATE for dates read as numbers,
+        e.g. by the CSV or streaming .xlsx reader backend.
+
+        :param column_type_by_keyword: dict of the column type of each keyword, one of COLUMN_TYPE_TEXT,
+                                       COLUMN_TYPE_INTEGER, COLUMN_TYPE_FLOAT, COLUMN_TYPE_BOOLEAN, COLUMN_TYPE_DATE
+                                       and COLUMN_TYPE_RAW. Keywords with unknown column type are ignored.
+        :return: None. The column schema will be compiled again on next typed extraction.
+        """
+
+        for keyword, column_type in column_type_by_keyword.items():
+            if column_type in COLUMN_CONVERTER_BY_TYPE.keys(): self.declared_column_type_by_keyword[keyword] = column_type
+
+        self.column_type_by_keyword = None
+        self.column_converter_by_keyword = None
+
+    def infer_column_schema(self, sample_row_count=COLUMN_SCHEMA_SAMPLE_ROW_COUNT):
+        """
+        Infer the column type of each keyword in header from the first data rows.
+
+        :param sample_row_count: number of data rows sampled.
+        :return: dict of { <keyword>: <column type>, ......}
+        """
+
+        column_type_by_keyword = dict()
+        if self.worksheet_object is None: return column_type_by_keyword
+
+        start_row_no = self.header_row_no + 1
+        end_row_no = min(start_row_no + sample_row_count, self.worksheet_object.nrows)
+        for keyword in self.keywords_in_header:
+            if keyword in column_type_by_keyword.keys(): continue
+            column_no = self.column_no_by_keyword[keyword]
+            column_type_by_keyword[keyword] = infer_column_type(
+                self.worksheet_object.col_values(column_no, start_row_no, end_row_no),
+                self.worksheet_object.col_types(column_no, start_row_no, end_row_no))
+
+        return column_type_by_keyword
+
+    def build_column_converters(self):
+        """
+        Compile the column schema into the converter of each keyword in header.
+        Declared column types are used first, other columns are inferred from a sample of data rows.
+
+        :return: None. column_type_by_keyword and column_converter_by_keyword will be updated.
+        """
+
+        # Compiled into new dicts which are assigned at last, so a worksheet shared by threads never exposes a
+        # partially compiled schema.
+        column_type_by_keyword = dict()
+        column_converter_by_keyword = dict()
+        inferred_column_type_by_keyword = None
+        for keyword in self.keywords_in_header if self.worksheet_object is not None else []:
+            if keyword in column_type_by_keyword.keys(): continue
+
+            column_type = self.declared_column_type_by_keyword.get(keyword)
+            if column_type is None:
+                if inferred_column_type_by_keyword is None: inferred_column_type_by_keyword = self.infer_column_schema()
+                column_type = inferred_column_type_by_keyword[keyword]
+
+            column_type_by_keyword[keyword] = column_type
+            column_converter_by_keyword[keyword] = (self.column_no_by_keyword[keyword], COLUMN_CONVERTER_BY_TYPE[column_type])
+
+        self.column_type_by_keyword = column_type_by_keyword
+        self.column_converter_by_keyword = column_converter_by_keyword
+
+    def get_column_schema(self):
+        """
+        Return the compiled column schema, it is compiled on first request.
+
+        :return: dict of { <keyword>: <column type>, ......}
+        """
+
+        if self.column_type_by_keyword is None: self.build_column_converters()
+
+        return self.column_type_by_keyword.copy()
+
+    def get_typed_columns(self, keyword_list=None, start_row_no=None, end_row_no=None):
+        """
+        Extract columns below the header row, converted by the column schema.
+        Each column is read and converted as one batch, dates are converted by numpy if it is installed.
+        Empty cells and cells which can not be converted to the column type are None.
+
+        :param keyword_list: list of keyword in header to be extracted. All keywords in header by default.
+                             Keyword not in header will be ignored.
+        :param start_row_no: first row number to extract, the row below the header row by default.
+        :param end_row_no: row number after the last row to extract, the end of worksheet by default.
+        :return: dict of { <keyword>: [ <typed value>, ......], ......}
+        """
+
+        column_dict = dict()
+        if self.worksheet_object is None: return column_dict
+
+        if self.column_converter_by_keyword is None: self.build_column_converters()
+        if keyword_list is None: keyword_list = self.keywords_in_header
+        if start_row_no is None: start_row_no = self.header_row_no + 1
+        if end_row_no is None: end_row_no = self.worksheet_object.nrows
+
+        datemode = get_sheet_datemode(self.worksheet_object)
+        for keyword in keyword_list:
+            if keyword not in self.column_converter_by_keyword.keys(): continue
+
+            column_no, converter = self.column_converter_by_keyword[keyword]
+            column_dict[keyword] = converter(self.worksheet_object.col_values(column_no, start_row_no, end_row_no),
+                                             self.worksheet_object.col_types(column_no, start_row_no, end_row_no),
+                                             datemode)
+
+        return column_dict
+
+    def iterate_typed_rows(self, keyword_list=None, skip_empty_row=True, chunk_row_count=1000):
+        """
+        Yield one typed record per data row below the header row, keyed by the keywords in header.
+        Rows are converted by get_typed_columns() in chunks, so large worksheets are converted in batches without
+        holding all typed values at once.
+
+        :param keyword_list: list of keyword in header to be projected. All keywords in header by default.
+                             Keyword not in header will be ignored.
+        :param skip_empty_row: True to skip the row which all projected values are None.
+        :param chunk_row_count: number of rows converted in each batch.
+        :return: generator of the dict of each data row.
+        """
+
+        if self.worksheet_object is None: return
+
+        if keyword_list is None: keyword_list = self.keywords_in_header
+        keyword_list = [keyword for keyword in keyword_list if keyword in self.column_no_by_keyword.keys()]
+
+        for chunk_start_row_no in range(self.header_row_no + 1, self.worksheet_object.nrows, chunk_row_count):
+            column_dict = self.get_typed_columns(keyword_list, chunk_start_row_no,
+                                                 min(chunk_start_row_no + chunk_row_count, self.worksheet_object.nrows))
+            for value_list in zip(*[column_dict[keyword] for keyword in keyword_list]):
+                if skip_empty_row and all(value is None for value in value_list): continue
+                yield dict(zip(keyword_list, value_list))
+
+    def get_record(self, row_no, keyword_list):
+        """
+        Return the record of one data row, keyed by the keywords in header.
+
+        :param row_no: row number of the data row.
+        :param keyword_list: list of keyword in header to be projected.
+        :return: dict of the record.
+        """
+
+        current_row_len = self.worksheet_object.row_len(row_no)
+        return dict((keyword, self.worksheet_object.cell_value(row_no, self.column_no_by_keyword[keyword])
+                     if self.column_no_by_keyword[keyword] < current_row_len else '') for keyword in keyword_list)
+
+    def get_hash_index(self, keyword):
+        """
+        Return the hash index of the column, built on first request.
+
+        :param keyword: keyword of the column in header.
+        :return: dict of { <cell value>: [ <row number>, ......], ......}
+        """
+
+        if keyword not in self.hash_index_by_keyword.keys():
+            hash_index = dict()
+            column_no = self.column_no_by_keyword[keyword]
+            start_row_no = self.header_row_no + 1
+            for row_no, value in enumerate(self.worksheet_object.col_values(column_no, start_row_no), start_row_no):
+                hash_index.setdefault(value, []).append(row_no)
+            self.hash_index_by_keyword[keyword] = hash_index
+
+        return self.hash_index_by_keyword[keyword]
+
+    @staticmethod
+    def get_sort_key(value):
+        # Numbers are sorted before text, so a column with mixed types can still be sorted.
+        return isinstance(value, str), value
+
+    def get_sorted_index(self, keyword):
+        """
+        Return the sorted index of the column, built on first request. Empty cells are not indexed.
+
+        :param keyword: keyword of the column in header.
+        :return: list of (<sort key>, <row number>) sorted by sort key.
+        """
+
+        if keyword not in self.sorted_index_by_keyword.keys():
+            column_no = self.column_no_by_keyword[keyword]
+            start_row_no = self.header_row_no + 1
+            self.sorted_index_by_keyword[keyword] = sorted(
+                (self.get_sort_key(value), row_no)
+                for row_no, value in enumerate(self.worksheet_object.col_values(column_no, start_row_no), start_row_no)
+                if value != '')
+
+        return self.sorted_index_by_keyword[keyword]
+
+    def find_row_no_set(self, keyword, operator, value):
+        """
+        Return the row numbers matching the condition, by the column index.
+
+        :param keyword: keyword of the column in header.
+        :param operator: one of QUERY_EQUAL, QUERY_IN and QUERY_RANGE.
+        :param value: value of the condition.
+        :return: set of matched row number. A range only matches the values of the type of its bounds, numbers or
+                 text.
+                 Will raise ValueError if the operator is not supported, or the range bounds mix number and text.
+        """
+
+        if keyword not in self.column_no_by_keyword.keys(): return set()
+
+        if operator == QUERY_EQUAL:
+            return set(self.get_hash_index(keyword).get(value, []))
+        elif operator == QUERY_IN:
+            hash_index = self.get_hash_index(keyword)
+            return set(row_no for expected_value in value for row_no in hash_index.get(expected_value, []))
+        elif operator == QUERY_RANGE:
+            low_value, high_value = value
+            sorted_index = self.get_sorted_index(keyword)
+            start_index, end_index = 0, len(sorted_index)
+            # A range of numbers does not match text and a range of text does not match numbers.
+            is_text_set = set(isinstance(bound_value, str) for bound_value in value if bound_value is not None)
+            if len(is_text_set) > 1: raise ValueError('Query range %s mixes number and text bounds.' % (value,))
+            # ((True,),) sorts after every number and before every text, as the sort key starts with is_text.
+            if is_text_set == {True}:
+                start_index = bisect.bisect_left(sorted_index, ((True,),))
+            elif is_text_set == {False}:
+                end_index = bisect.bisect_left(sorted_index, ((True,),))
+            # (low,) sorts before every entry of low, and (high, inf) after every entry of high.
+            if low_value is not None: start_index = bisect.bisect_left(sorted_index, (self.get_sort_key(low_value),))
+            if high_value is not None:
+                end_index = bisect.bisect_left(sorted_index, (self.get_sort_key(high_value), float('inf')))
+            return set(row_no for _, row_no in sorted_index[start_index:end_index])
+        else:
+            raise ValueError('Query operator %s is not supported.' % operator)
+
+    def query_rows(self, condition_list=None, keyword_list=None):
+        """
+        Query the data rows of the worksheet. See WorkbookWithHeader.query_rows() for the conditions.
+
+        :param condition_list: list of (<keyword>, <operator>, <value>), all data rows are matched if it is empty.
+        :param keyword_list: list of keyword in header to be projected. All keywords in header by default.
+        :return: generator of (<row number>, <record dict>) of matched rows, in row order.
+        """
+
+        if self.worksheet_object is None: return
+
+        if keyword_list is None: keyword_list = self.keywords_in_header
+        keyword_list = [keyword for keyword in keyword_list if keyword in self.column_no_by_keyword.keys()]
+
+        if condition_list:
+            row_no_set_list = sorted((self.find_row_no_set(*condition) for condition in condition_list), key=len)
+            row_no_list = sorted(row_no_set_list[0].intersection(*row_no_set_list[1:]))
+        else:
+            row_no_list = range(self.header_row_no + 1, self.worksheet_object.nrows)
+
+        for row_no in row_no_list:
+            yield row_no, self.get_record(row_no, keyword_list)
+
+    def to_columns(self, keyword_list=None):
+        """
+        Extract whole columns below the header row into typed NumPy arrays.
+        Cell types are checked once per column, empty cells are ignored in the check:
+            - Number and boolean columns are returned as float64 array, empty cell is NaN.
+            - Date columns are returned as datetime64[ms] array based on the workbook datemode, empty cell is NaT.
+            - Text columns are returned as CategoricalColumn of unique values and int codes, empty cell is ''.
+            - Columns with mixed types are returned as object array.
+
+        :param keyword_list: list of keyword in header to be extracted. All keywords in header by default.
+                             Keyword not in header will be ignored.
+        :return: dict of the array of each keyword.
+                 Will raise ImportError if numpy is not installed.
+        """
+
+        if numpy is None: raise ImportError('numpy is required to extract worksheet columns.')
+
+        column_dict = dict()
+        if self.worksheet_object is None: return column_dict
+
+        if keyword_list is None: keyword_list = self.keywords_in_header
+
+        start_row_no = self.header_row_no + 1
+        for keyword in keyword_list:
+            if keyword not in self.column_no_by_keyword.keys(): continue
+
+            column_no = self.column_no_by_keyword[keyword]
+            value_list = self.worksheet_object.col_values(column_no, start_row_no)
+            type_list = self.worksheet_object.col_types(column_no, start_row_no)
+            type_set = set(type_list) - {CELL_EMPTY, CELL_BLANK}
+
+            if type_set and type_set <= {CELL_NUMBER, CELL_BOOLEAN}:
+                column_dict[keyword] = numpy.array([numpy.nan if value == '' else value for value in value_list],
+                                                   dtype=numpy.float64)
+            elif type_set == {CELL_DATE}:
+                serial_array = numpy.array([numpy.nan if value == '' else value for value in value_list],
+                                           dtype=numpy.float64)
+                column_dict[keyword] = get_datetime64_array(serial_array, get_sheet_datemode(self.worksheet_object))
+            elif type_set <= {CELL_TEXT}:
+                categories, codes = numpy.unique(numpy.array(value_list, dtype=str), return_inverse=True)
+                column_dict[keyword] = CategoricalColumn(categories, codes.astype(numpy.int32))
+            else:
+                column_dict[keyword] = numpy.array(value_list, dtype=object)
+
+        return column_dict
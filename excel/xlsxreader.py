@@ -0,0 +1,304 @@
+# encoding: utf-8
+
+import io
+import mmap
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+
+RELATIONSHIP_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+STRICT_RELATIONSHIP_ID = '{http://purl.oclc.org/ooxml/officeDocument/relationships}id'
+
+
+def get_local_name(tag):
+    """
+    Return the tag name without namespace, so both transitional and strict OOXML are handled.
+
+    :param tag: tag of the element, e.g. {namespace}row
+    :return: local name of the tag, e.g. row
+    """
+
+    return tag.rsplit('}', 1)[-1]
+
+
+def get_column_no(cell_name):
+    """
+    Return the column number of the cell name, e.g. A1 to 0, AB12 to 27.
+
+    :param cell_name: cell name in A1 style.
+    :return: column number start from 0.
+    """
+
+    column_no = 0
+    for cell_char in cell_name:
+        if not cell_char.isalpha(): break
+        column_no = column_no * 26 + ord(cell_char.upper()) - 64
+
+    return column_no - 1
+
+
+class BufferFile(io.RawIOBase):
+    """
+    Read-only seekable file over a buffer, e.g. bytes, memoryview or mmap, so zipfile reads the workbook from the
+    buffer without copying it into another buffer first. The buffer is released when the file is closed.
+    """
+
+    buffer_view = None                      # memoryview of the buffer, as unsigned bytes.
+    position = None                         # Current position in the buffer.
+
+    def __init__(self, workbook_buffer):
+
+        super(BufferFile, self).__init__()
+        self.buffer_view = memoryview(workbook_buffer).cast('B')
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, read_buffer):
+        read_size = max(0, min(len(read_buffer), len(self.buffer_view) - self.position))
+        read_buffer[:read_size] = self.buffer_view[self.position:self.position + read_size]
+        self.position += read_size
+        return read_size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer_view)
+        elif whence != io.SEEK_SET:
+            raise ValueError('Invalid whence %s' % whence)
+        if offset < 0: raise ValueError('Negative seek position %s' % offset)
+
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        if self.buffer_view is not None: self.buffer_view.release()
+        super(BufferFile, self).close()
+
+
+class SharedStringTable(object):
+    """
+    Shared strings of the workbook, parsed incrementally up to the highest index requested.
+    """
+
+    string_list = None                      # Shared strings parsed so far.
+    string_iterator = None                  # iterparse iterator of sharedStrings.xml, None when fully parsed.
+    string_file = None                      # Opened zip member of sharedStrings.xml.
+
+    def __init__(self, zip_file, member_name):
+
+        self.string_list = []
+        if member_name in zip_file.namelist():
+            self.string_file = zip_file.open(member_name)
+            self.string_iterator = ElementTree.iterparse(self.string_file, events=('end',))
+
+    def get(self, string_index):
+        """
+        Return the shared string by index.
+
+        :param string_index: index of the shared string.
+        :return: the shared string, or '' if the index is out of the table.
+        """
+
+        while string_index >= len(self.string_list) and self.string_iterator is not None:
+            try:
+                _, element = next(self.string_iterator)
+            except StopIteration:
+                self.close()
+                break
+
+            if get_local_name(element.tag) == 'si':
+                self.string_list.append(self.get_text(element))
+                element.clear()
+
+        return self.string_list[string_index] if string_index < len(self.string_list) else ''
+
+    @staticmethod
+    def get_text(string_element):
+        # Plain text is in <t>, rich text is in <r><t>. Phonetic runs <rPh> are not part of the value.
+        text_list = []
+        for child in string_element:
+            child_name = get_local_name(child.tag)
+            if child_name == 't':
+                text_list.append(child.text or '')
+            elif child_name == 'r':
+                text_list.extend(run_child.text or '' for run_child in child if get_local_name(run_child.tag) == 't')
+
+        return ''.join(text_list)
+
+    def close(self):
+        if self.string_file is not None: self.string_file.close()
+        self.string_file = None
+        self.string_iterator = None
+
+
+class XlsxHeaderReader(object):
+    """
+    Reader of .xlsx workbook which streams only the top rows of each sheet.
+    Sheet XML is parsed incrementally and reading stops after the requested rows, shared strings are resolved
+    lazily. Cell values are str for text, float for number and date, bool for boolean. Error cells are skipped.
+    """
+
+    zip_file = None                         # Opened zip file of the workbook.
+    sheet_member_by_name = None             # dict of zip member name of each sheet, in workbook order.
+    shared_string_table = None              # SharedStringTable object.
+    buffer_file = None                      # BufferFile object over the workbook contents, None for path or file.
+
+    def __init__(self, workbook_source):
+        """
+        Open the workbook.
+
+        :param workbook_source: Path of workbook, or the workbook contents as bytes, memoryview, mmap or file-like
+                                object. Contents in a buffer are read in place through BufferFile.
+                                Will raise zipfile.BadZipFile or KeyError if it is not a .xlsx workbook.
+        """
+
+        if isinstance(workbook_source, (bytes, bytearray, memoryview, mmap.mmap)):
+            workbook_source = BufferFile(workbook_source)
+            self.buffer_file = workbook_source
+
+        try:
+            self.zip_file = zipfile.ZipFile(workbook_source)
+            self.load_sheet_list()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load_sheet_list(self):
+        """
+        Load sheet names from xl/workbook.xml and their zip members from xl/_rels/workbook.xml.rels.
+
+        :return: None. sheet_member_by_name and shared_string_table will be updated.
+        """
+
+        target_by_id = dict()
+        shared_strings_member = 'xl/sharedStrings.xml'
+        for element in ElementTree.fromstring(self.zip_file.read('xl/_rels/workbook.xml.rels')):
+            target = element.get('Target', '')
+            member_name = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            target_by_id[element.get('Id')] = member_name
+            if element.get('Type', '').endswith('/sharedStrings'): shared_strings_member = member_name
+
+        self.sheet_member_by_name = dict()
+        for element in ElementTree.fromstring(self.zip_file.read('xl/workbook.xml')).iter():
+            if get_local_name(element.tag) != 'sheet': continue
+            relationship_id = element.get(RELATIONSHIP_ID) or element.get(STRICT_RELATIONSHIP_ID)
+            self.sheet_member_by_name[element.get('name')] = target_by_id[relationship_id]
+
+        self.shared_string_table = SharedStringTable(self.zip_file, shared_strings_member)
+
+    def sheet_names(self):
+        """
+        Return the sheet names in workbook order.
+
+        :return: list of sheet name.
+        """
+
+        return list(self.sheet_member_by_name.keys())
+
+    def iterate_rows(self, sheet_name, row_count):
+        """
+        Yield the first rows of the sheet, the sheet XML is not read after row_count rows.
+        Rows without any cell are yielded as empty dict, rows after the last row in the sheet are not yielded.
+
+        :param sheet_name: name of the sheet.
+        :param row_count: number of rows to read, None to read all rows.
+        :return: generator of (<row number>, { <column number>: <cell value>, ......}), row number start from 0.
+        """
+
+        if row_count is not None and row_count <= 0: return
+
+        next_row_no = 0
+        with self.zip_file.open(self.sheet_member_by_name[sheet_name]) as sheet_file:
+            for _, element in ElementTree.iterparse(sheet_file, events=('end',)):
+                if get_local_name(element.tag) != 'row': continue
+
+                row_number = element.get('r')
+                row_no = int(row_number) - 1 if row_number else next_row_no
+                if row_count is not None and row_no >= row_count: return
+
+                # Rows without cells may be omitted in the XML.
+                for empty_row_no in range(next_row_no, row_no): yield empty_row_no, dict()
+
+                yield row_no, self.get_row_values(element)
+                element.clear()
+                next_row_no = row_no + 1
+                if row_count is not None and next_row_no >= row_count: return
+
+    def get_row_values(self, row_element):
+        """
+        Return the cell values of the row element.
+
+        :param row_element: <row> element.
+        :return: dict of { <column number>: <cell value>, ......}, empty and error cells are not included.
+        """
+
+        value_by_column_no = dict()
+        column_no = -1
+        for cell_element in row_element:
+            if get_local_name(cell_element.tag) != 'c': continue
+
+            cell_name = cell_element.get('r')
+            column_no = get_column_no(cell_name) if cell_name else column_no + 1
+            cell_type = cell_element.get('t', 'n')
+
+            value_text = None
+            for child in cell_element:
+                child_name = get_local_name(child.tag)
+                if child_name == 'v':
+                    value_text = child.text
+                elif child_name == 'is':
+                    value_text = SharedStringTable.get_text(child)
+
+            if value_text is None or value_text == '' or cell_type == 'e': continue
+
+            if cell_type == 's':
+                value_by_column_no[column_no] = self.shared_string_table.get(int(value_text))
+            elif cell_type in ('str', 'inlineStr'):
+                value_by_column_no[column_no] = value_text
+            elif cell_type == 'b':
+                value_by_column_no[column_no] = value_text.strip() in ('1', 'true')
+            else:
+                value_by_column_no[column_no] = float(value_text)
+
+        return value_by_column_no
+
+    def get_header_row(self, sheet_name, header_row_no):
+        """
+        Return the header row of the sheet, the sheet XML is not read after the header row.
+
+        :param sheet_name: name of the sheet.
+        :param header_row_no: row number of the header row, start from 0.
+        :return: list of (<column number>, <cell value>) in column order.
+        """
+
+        for row_no, value_by_column_no in self.iterate_rows(sheet_name, header_row_no + 1):
+            if row_no == header_row_no: return sorted(value_by_column_no.items())
+
+        return []
+
+    def close(self):
+        """
+        Close the workbook file.
+
+        :return: None.
+        """
+
+        if self.shared_string_table is not None: self.shared_string_table.close()
+        if self.zip_file is not None: self.zip_file.close()
+        if self.buffer_file is not None: self.buffer_file.close()